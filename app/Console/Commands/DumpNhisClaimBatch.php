@@ -0,0 +1,127 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Models\ClaimBatch;
+use App\Services\NhisXmlExportService;
+use Illuminate\Console\Command;
+use Illuminate\Support\Facades\Schema;
+
+class DumpNhisClaimBatch extends Command
+{
+    protected $signature = 'nhis:dump-claim-batch
+                            {batch : Claim batch id}
+                            {directory : Directory to write claims.csv, diagnoses.csv and items.csv to}';
+
+    protected $description = 'Dump a claim batch to CSV for nhis-data/export_claims_xml.py, which writes the same XML as the batch export';
+
+    public function handle(NhisXmlExportService $service): int
+    {
+        $batch = ClaimBatch::find($this->argument('batch'));
+        if (! $batch) {
+            $this->error("Claim batch {$this->argument('batch')} not found.");
+
+            return self::FAILURE;
+        }
+
+        $directory = rtrim($this->argument('directory'), '/');
+        if (! is_dir($directory) && ! mkdir($directory, 0755, true)) {
+            $this->error("Cannot create {$directory}.");
+
+            return self::FAILURE;
+        }
+
+        // The model's own columns plus the related values the export reads through relations
+        $claimColumns = array_merge(Schema::getColumnListing('insurance_claims'), [
+            'patient_insurance_membership_id', 'gdrg_tariff_code',
+        ]);
+        $itemColumns = array_merge(Schema::getColumnListing('insurance_claim_items'), [
+            'claim_id', 'nhis_tariff_code', 'prescription_dose_quantity', 'prescription_frequency',
+            'prescription_duration', 'prescription_quantity_to_dispense', 'prescription_quantity',
+            'drug_nhis_claim_qty_as_one',
+        ]);
+        $diagnosisColumns = ['claim_id', 'is_primary', 'icd_10', 'code', 'diagnosis'];
+
+        $claims = $this->open("{$directory}/claims.csv", $claimColumns);
+        $diagnoses = $this->open("{$directory}/diagnoses.csv", $diagnosisColumns);
+        $items = $this->open("{$directory}/items.csv", $itemColumns);
+        $count = 0;
+
+        // Same query and order as the batch export, so each claim's rows are written together
+        $service->batchItemsQuery($batch)->chunk(50, function ($batchItems) use (
+            $claims, $diagnoses, $items, $claimColumns, $itemColumns, $diagnosisColumns, &$count
+        ) {
+            foreach ($batchItems as $batchItem) {
+                $claim = $batchItem->insuranceClaim;
+                if (! $claim) {
+                    continue;
+                }
+
+                $this->write($claims, $claimColumns, $claim->getAttributes() + [
+                    // Only read when the claim has no membership_id, as in the export
+                    'patient_insurance_membership_id' => $claim->membership_id
+                        ? null : $claim->patientInsurance?->membership_id,
+                    'gdrg_tariff_code' => $claim->gdrgTariff?->code,
+                ]);
+                foreach ($claim->claimDiagnoses as $claimDiagnosis) {
+                    $this->write($diagnoses, $diagnosisColumns, [
+                        'claim_id' => $claim->id,
+                        'is_primary' => $claimDiagnosis->is_primary,
+                        'icd_10' => $claimDiagnosis->diagnosis?->icd_10,
+                        'code' => $claimDiagnosis->diagnosis?->code,
+                        'diagnosis' => $claimDiagnosis->diagnosis?->diagnosis,
+                    ]);
+                }
+                foreach ($claim->items as $item) {
+                    $prescription = $item->charge?->prescription;
+                    $this->write($items, $itemColumns, $item->getAttributes() + [
+                        'claim_id' => $claim->id,
+                        'nhis_tariff_code' => $item->nhisTariff?->nhis_code,
+                        'prescription_dose_quantity' => $prescription?->dose_quantity,
+                        'prescription_frequency' => $prescription?->frequency,
+                        'prescription_duration' => $prescription?->duration,
+                        'prescription_quantity_to_dispense' => $prescription?->quantity_to_dispense,
+                        'prescription_quantity' => $prescription?->quantity,
+                        'drug_nhis_claim_qty_as_one' => $prescription?->drug?->nhis_claim_qty_as_one,
+                    ]);
+                }
+                $count++;
+            }
+        });
+
+        fclose($claims);
+        fclose($diagnoses);
+        fclose($items);
+
+        $this->info("Dumped {$count} claims of batch {$batch->id} to {$directory}");
+        $this->line("Write its XML with: python3 nhis-data/export_claims_xml.py {$directory}");
+
+        return self::SUCCESS;
+    }
+
+    /**
+     * @return resource
+     */
+    protected function open(string $path, array $columns)
+    {
+        $handle = fopen($path, 'w');
+        fputcsv($handle, $columns, ',', '"', '');
+
+        return $handle;
+    }
+
+    /**
+     * Write a row in column order; NULL and false are written as a blank cell, true as 1.
+     *
+     * @param  resource  $handle
+     */
+    protected function write($handle, array $columns, array $values): void
+    {
+        $row = [];
+        foreach ($columns as $column) {
+            $value = $values[$column] ?? null;
+            $row[] = $value instanceof \DateTimeInterface ? $value->format('Y-m-d H:i:s') : $value;
+        }
+        fputcsv($handle, $row, ',', '"', '');
+    }
+}
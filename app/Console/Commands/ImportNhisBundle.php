@@ -0,0 +1,44 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Imports\NhisImportBundle;
+use Illuminate\Console\Command;
+
+class ImportNhisBundle extends Command
+{
+    protected $signature = 'nhis:import-bundle
+                            {paths* : Bundle files written by the nhis-data converters with --bundle (*.bundle.jsonl)}';
+
+    protected $description = 'Bulk-load drugs, lab services or procedures from validated nhis-data import bundles';
+
+    public function handle(): int
+    {
+        $failed = false;
+
+        foreach ($this->argument('paths') as $path) {
+            $this->info("Loading {$path}");
+
+            try {
+                $results = (new NhisImportBundle)->load($path);
+            } catch (\Throwable $e) {
+                $this->error("  {$e->getMessage()}");
+                $failed = true;
+
+                continue;
+            }
+
+            $this->line("  {$results['created']} created, {$results['updated']} updated, "
+                ."{$results['mapped']} mapped, {$results['skipped']} skipped");
+
+            foreach (array_slice($results['errors'], 0, 10) as $error) {
+                $this->warn("  Row {$error['row']}: {$error['error']}");
+            }
+            if (count($results['errors']) > 10) {
+                $this->warn('  ... and '.(count($results['errors']) - 10).' more.');
+            }
+        }
+
+        return $failed ? self::FAILURE : self::SUCCESS;
+    }
+}
@@ -106,19 +106,23 @@ public function destroy(NhisTariff $nhisTariff): RedirectResponse
     }
 
     /**
-     * Import NHIS tariffs from a file.
+     * Import NHIS tariffs from a file; with a changed-codes manifest, only its added and changed codes.
      */
     public function import(ImportNhisTariffRequest $request): RedirectResponse
     {
         $this->authorize('create', NhisTariff::class);
 
-        $result = $this->nhisTariffService->importTariffs($request->file('file'));
+        $onlyCodes = $request->onlyCodes();
+        $result = $this->nhisTariffService->importTariffs($request->file('file'), $onlyCodes);
 
         if (! $result['success']) {
             return back()->with('error', 'Import failed: '.implode(', ', $result['errors']));
         }
 
         $message = "Import completed: {$result['imported']} created, {$result['updated']} updated.";
+        if ($onlyCodes !== null) {
+            $message .= " {$result['skipped']} rows not in the manifest skipped.";
+        }
 
         if (! empty($result['errors'])) {
             $message .= ' Some rows had errors: '.implode('; ', array_slice($result['errors'], 0, 3));
@@ -3,6 +3,7 @@
 namespace App\Http\Requests;
 
 use Illuminate\Foundation\Http\FormRequest;
+use Illuminate\Validation\Validator;
 
 class ImportNhisTariffRequest extends FormRequest
 {
@@ -20,9 +21,48 @@ public function rules(): array
                 'mimes:csv,txt,xlsx,xls',
                 'max:10240', // 10MB max
             ],
+            // The extractor's <output>.changes.json: only its added and changed codes are imported
+            'manifest' => [
+                'nullable',
+                'file',
+                'mimes:json,txt',
+                'max:2048',
+            ],
         ];
     }
 
+    /**
+     * Check that the manifest is a changed-codes manifest.
+     */
+    public function withValidator(Validator $validator): void
+    {
+        $validator->after(function (Validator $validator) {
+            if ($this->hasFile('manifest') && ! $validator->errors()->has('manifest') && $this->onlyCodes() === null) {
+                $validator->errors()->add('manifest', 'The manifest is not a changed-codes manifest (*.changes.json).');
+            }
+        });
+    }
+
+    /**
+     * The added and changed codes of the uploaded manifest, or null without one.
+     *
+     * @return array<string>|null
+     */
+    public function onlyCodes(): ?array
+    {
+        $manifest = $this->file('manifest');
+        if (! $manifest) {
+            return null;
+        }
+
+        $data = json_decode((string) file_get_contents($manifest->getRealPath()), true);
+        if (! is_array($data) || ! is_array($data['added'] ?? null) || ! is_array($data['changed'] ?? null)) {
+            return null;
+        }
+
+        return array_values(array_map('strval', array_merge($data['added'], $data['changed'])));
+    }
+
     public function messages(): array
     {
         return [
@@ -30,6 +70,7 @@ public function messages(): array
             'file.file' => 'The uploaded item must be a file.',
             'file.mimes' => 'Invalid file format. Please use CSV, TXT, XLSX, or XLS format.',
             'file.max' => 'File size cannot exceed 10MB.',
+            'manifest.mimes' => 'The manifest must be the JSON file written next to the tariff CSV.',
         ];
     }
 }
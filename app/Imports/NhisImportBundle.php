@@ -0,0 +1,258 @@
+<?php
+
+namespace App\Imports;
+
+use App\Models\BillingService;
+use App\Models\Drug;
+use App\Models\GdrgTariff;
+use App\Models\LabService;
+use App\Models\MinorProcedureType;
+use App\Models\NhisItemMapping;
+use App\Models\NhisTariff;
+use Illuminate\Support\Facades\DB;
+
+/**
+ * Bulk loader for the validated import bundles written by the nhis-data
+ * converters (--bundle).
+ *
+ * Bundle rows are already typed, deduplicated and resolved against the
+ * table enums, so instead of DrugImport's per-row normalization and
+ * updateOrCreate calls the rows are written with chunked upserts, followed
+ * by one upsert for the billing services and one for the NHIS mappings.
+ *
+ * Upserts bypass model observers: the billing services the Drug and
+ * LabService observers would create are upserted here, named as the
+ * observers name them (a drug's brand name in brackets), and the per-item
+ * "new item" notifications to insurance admins are not sent.
+ */
+class NhisImportBundle
+{
+    public const FORMAT = 'hms-import-bundle';
+
+    public const SCHEMA_VERSION = 1;
+
+    private const CHUNK_SIZE = 500;
+
+    /**
+     * Bundle kinds: target model, unique key, mapping item type, writable columns and billing service.
+     */
+    private const KINDS = [
+        'drugs' => [
+            'model' => Drug::class,
+            'key' => 'drug_code',
+            'item_type' => 'drug',
+            'columns' => [
+                'drug_code', 'name', 'generic_name', 'form', 'strength', 'category', 'unit_price', 'unit_type',
+                'bottle_size', 'description', 'minimum_stock_level', 'maximum_stock_level', 'is_active',
+            ],
+            'billing' => ['prefix' => 'DRUG_', 'type' => 'medication', 'price' => 'unit_price', 'brand' => 'brand_name'],
+        ],
+        'lab_services' => [
+            'model' => LabService::class,
+            'key' => 'code',
+            'item_type' => 'lab_service',
+            'columns' => [
+                'code', 'name', 'price', 'category', 'sample_type', 'turnaround_time', 'description', 'is_active',
+            ],
+            'billing' => ['prefix' => 'LAB_', 'type' => 'lab_test', 'price' => 'price'],
+        ],
+        'procedures' => [
+            'model' => MinorProcedureType::class,
+            'key' => 'code',
+            'item_type' => 'procedure',
+            'columns' => ['code', 'name', 'category', 'type', 'description', 'price', 'is_active'],
+            'billing' => null,
+        ],
+    ];
+
+    private array $results = [
+        'created' => 0,
+        'updated' => 0,
+        'mapped' => 0,
+        'skipped' => 0,
+        'errors' => [],
+    ];
+
+    /**
+     * Bundle line number of each item code, for the errors (the header is line 1).
+     */
+    private array $lines = [];
+
+    /**
+     * Verify and load a bundle file.
+     *
+     * @return array{created: int, updated: int, mapped: int, skipped: int, errors: array}
+     *
+     * @throws \RuntimeException if the file is not a valid bundle of a supported schema version
+     */
+    public function load(string $path): array
+    {
+        [$header, $rows] = $this->read($path);
+        $kind = self::KINDS[$header['kind']];
+
+        foreach ($header['rejected'] ?? [] as $rejected) {
+            $this->results['skipped']++;
+            $this->results['errors'][] = $rejected;
+        }
+
+        DB::transaction(function () use ($kind, $rows) {
+            $nhisCodes = $this->upsertItems($kind, $rows);
+            $this->upsertMappings($kind, $nhisCodes);
+        });
+
+        return $this->results;
+    }
+
+    /**
+     * Read the header and rows, checking the format, version and checksum.
+     *
+     * @return array{0: array, 1: array}
+     */
+    private function read(string $path): array
+    {
+        $handle = @fopen($path, 'r');
+        if (! $handle) {
+            throw new \RuntimeException("Cannot open bundle '{$path}'");
+        }
+
+        try {
+            $header = json_decode((string) fgets($handle), true);
+            if (! is_array($header) || ($header['format'] ?? null) !== self::FORMAT) {
+                throw new \RuntimeException("'{$path}' is not an import bundle");
+            }
+            if (($header['schema_version'] ?? null) !== self::SCHEMA_VERSION) {
+                throw new \RuntimeException("Unsupported bundle schema version '".($header['schema_version'] ?? '').
+                    "' (expected ".self::SCHEMA_VERSION.')');
+            }
+            if (! isset(self::KINDS[$header['kind'] ?? ''])) {
+                throw new \RuntimeException("Unknown bundle kind '".($header['kind'] ?? '')."'");
+            }
+
+            $hash = hash_init('sha256');
+            $rows = [];
+            while (($line = fgets($handle)) !== false) {
+                hash_update($hash, $line);
+                $rows[] = json_decode($line, true, flags: JSON_THROW_ON_ERROR);
+            }
+        } finally {
+            fclose($handle);
+        }
+
+        if (! hash_equals((string) ($header['checksum'] ?? ''), hash_final($hash))) {
+            throw new \RuntimeException("Bundle '{$path}' failed its checksum (file truncated or edited)");
+        }
+
+        return [$header, $rows];
+    }
+
+    /**
+     * Upsert the item rows and their billing services; return [item code => nhis code] for mapped rows.
+     */
+    private function upsertItems(array $kind, array $rows): array
+    {
+        $model = $kind['model'];
+        $key = $kind['key'];
+        $columns = array_flip($kind['columns']);
+        $nhisCodes = [];
+
+        foreach (array_chunk($rows, self::CHUNK_SIZE, true) as $chunk) {
+            $values = [];
+            foreach ($chunk as $index => $row) {
+                $this->lines[$row[$key]] = $index + 2;
+                if (! empty($row['nhis_code'])) {
+                    $nhisCodes[$row[$key]] = $row['nhis_code'];
+                }
+                $values[] = array_intersect_key($row, $columns);
+            }
+
+            $codes = array_column($values, $key);
+            $existing = $model::whereIn($key, $codes)->count();
+            $this->results['created'] += count($codes) - $existing;
+            $this->results['updated'] += $existing;
+
+            $model::upsert($values, [$key], array_values(array_diff($kind['columns'], [$key])));
+
+            if ($kind['billing']) {
+                $this->upsertBillingServices($kind['billing'], $model, $key, $values);
+            }
+        }
+
+        return $nhisCodes;
+    }
+
+    private function upsertBillingServices(array $billing, string $model, string $key, array $values): void
+    {
+        // The brand name is not a bundle column, so it is read back from the items the upsert left in place
+        $brands = isset($billing['brand'])
+            ? $model::whereIn($key, array_column($values, $key))->pluck($billing['brand'], $key)
+            : collect();
+
+        $services = array_map(function (array $row) use ($billing, $key, $brands) {
+            $brand = $brands[$row[$key]] ?? null;
+
+            return [
+                'service_code' => $billing['prefix'].$row[$key],
+                'service_name' => $row['name'].($brand ? " ({$brand})" : ''),
+                'service_type' => $billing['type'],
+                'base_price' => $row[$billing['price']],
+                'is_active' => $row['is_active'],
+            ];
+        }, $values);
+
+        BillingService::upsert($services, ['service_code'], ['service_name', 'base_price', 'is_active']);
+    }
+
+    /**
+     * Resolve the NHIS/G-DRG codes in bulk and upsert one mapping per item.
+     */
+    private function upsertMappings(array $kind, array $nhisCodes): void
+    {
+        $itemType = $kind['item_type'];
+        $model = $kind['model'];
+        $key = $kind['key'];
+
+        foreach (array_chunk($nhisCodes, self::CHUNK_SIZE, true) as $chunk) {
+            $itemIds = $model::whereIn($key, array_keys($chunk))->pluck('id', $key);
+            $codes = array_values(array_unique($chunk));
+            // Drugs map to NHIS medicines, procedures to G-DRG tariffs, lab services to G-DRG first
+            $gdrgIds = $itemType === 'drug' ? collect() : GdrgTariff::whereIn('code', $codes)->pluck('id', 'code');
+            $nhisIds = $itemType === 'procedure' ? collect() : NhisTariff::whereIn('nhis_code', $codes)->pluck('id', 'nhis_code');
+
+            $byColumn = ['gdrg_tariff_id' => [], 'nhis_tariff_id' => []];
+            foreach ($chunk as $itemCode => $nhisCode) {
+                $column = isset($gdrgIds[$nhisCode]) ? 'gdrg_tariff_id' : (isset($nhisIds[$nhisCode]) ? 'nhis_tariff_id' : null);
+                if (! $column || ! isset($itemIds[$itemCode])) {
+                    $this->results['errors'][] = [
+                        'row' => $this->lines[$itemCode] ?? 0,
+                        'error' => "NHIS code '{$nhisCode}' not found ({$itemType} '{$itemCode}' loaded without mapping)",
+                    ];
+
+                    continue;
+                }
+
+                $byColumn[$column][] = [
+                    'item_type' => $itemType,
+                    'item_id' => $itemIds[$itemCode],
+                    'item_code' => $itemCode,
+                    $column => $column === 'gdrg_tariff_id' ? $gdrgIds[$nhisCode] : $nhisIds[$nhisCode],
+                ];
+            }
+
+            // Like updateOrCreate in the row imports, only the resolved tariff column is written
+            foreach ($byColumn as $column => $mappings) {
+                if ($mappings) {
+                    NhisItemMapping::upsert($mappings, ['item_type', 'item_id'], ['item_code', $column]);
+                    $this->results['mapped'] += count($mappings);
+                }
+            }
+        }
+    }
+
+    /**
+     * Get results.
+     */
+    public function getResults(): array
+    {
+        return $this->results;
+    }
+}
@@ -113,17 +113,22 @@ public function isItemMapped(string $itemType, int $itemId): bool
      * Handles upsert logic - updates existing codes, creates new ones.
      *
      * @param  UploadedFile  $file  The uploaded file containing tariff data
-     * @return array{success: bool, imported: int, updated: int, errors: array}
+     * @param  array<string>|null  $onlyCodes  Only import rows with these codes (e.g. the added and
+     *                                         changed codes from the extractor's *.changes.json manifest)
+     * @return array{success: bool, imported: int, updated: int, skipped: int, errors: array}
      */
-    public function importTariffs(UploadedFile $file): array
+    public function importTariffs(UploadedFile $file, ?array $onlyCodes = null): array
     {
         $result = [
             'success' => true,
             'imported' => 0,
             'updated' => 0,
+            'skipped' => 0,
             'errors' => [],
         ];
 
+        $onlyCodes = $onlyCodes !== null ? array_flip($onlyCodes) : null;
+
         // Read the file content
         $content = file_get_contents($file->getRealPath());
         $lines = array_filter(explode("\n", $content));
@@ -174,6 +179,12 @@ public function importTariffs(UploadedFile $file): array
                 $price = trim($row[$columnIndices['price']] ?? '');
                 $unit = isset($columnIndices['unit']) ? trim($row[$columnIndices['unit']] ?? '') : null;
 
+                if ($onlyCodes !== null && ! isset($onlyCodes[$nhisCode])) {
+                    $result['skipped']++;
+
+                    continue;
+                }
+
                 // Validate row data
                 $validator = Validator::make([
                     'nhis_code' => $nhisCode,
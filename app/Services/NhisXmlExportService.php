@@ -8,6 +8,7 @@
 use App\Models\InsuranceClaimItem;
 use DOMDocument;
 use DOMElement;
+use Illuminate\Database\Eloquent\Relations\HasMany;
 use XMLWriter;
 
 /**
@@ -39,15 +40,7 @@ public function generateXml(ClaimBatch $batch): string
         $this->dom->appendChild($root);
 
         // Load batch items with related claims
-        $batchItems = $batch->batchItems()
-            ->with([
-                'insuranceClaim.patient',
-                'insuranceClaim.gdrgTariff',
-                'insuranceClaim.claimDiagnoses.diagnosis',
-                'insuranceClaim.items.nhisTariff',
-                'insuranceClaim.items.charge.prescription.drug',
-            ])
-            ->get();
+        $batchItems = $this->batchItemsQuery($batch)->get();
 
         foreach ($batchItems as $batchItem) {
             if ($batchItem->insuranceClaim) {
@@ -78,14 +71,7 @@ public function writeXmlToStream(ClaimBatch $batch, $output): void
 
         $writer->startElement('claims');
 
-        $batch->batchItems()
-            ->with([
-                'insuranceClaim.patient',
-                'insuranceClaim.gdrgTariff',
-                'insuranceClaim.claimDiagnoses.diagnosis',
-                'insuranceClaim.items.nhisTariff',
-                'insuranceClaim.items.charge.prescription.drug',
-            ])
+        $this->batchItemsQuery($batch)
             ->chunk(50, function ($batchItems) use ($writer) {
                 foreach ($batchItems as $batchItem) {
                     if ($batchItem->insuranceClaim) {
@@ -99,6 +85,22 @@ public function writeXmlToStream(ClaimBatch $batch, $output): void
         $writer->flush();
     }
 
+    /**
+     * Batch items of a batch with everything the claim XML reads eager-loaded.
+     * Also used by nhis:dump-claim-batch, so the dump holds the same rows.
+     */
+    public function batchItemsQuery(ClaimBatch $batch): HasMany
+    {
+        return $batch->batchItems()
+            ->with([
+                'insuranceClaim.patient',
+                'insuranceClaim.gdrgTariff',
+                'insuranceClaim.claimDiagnoses.diagnosis',
+                'insuranceClaim.items.nhisTariff',
+                'insuranceClaim.items.charge.prescription.drug',
+            ]);
+    }
+
     /**
      * Sanitize an ICD-10 code for NHIS submission.
      * Replaces placeholder values like '-' with empty string so NHIS doesn't reject it.
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled keyword rule engine against the original if/elif
+keyword ladders, using the names in the bundled CSVs.
+
+Run from the nhis-data directory:  python bench_rules.py [--repeat N]
+
+Every name is classified by both implementations first; any difference in
+a label is reported and the script exits non-zero before timing anything.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import timeit
+
+from nhis_data.rules import classify_drug, classify_test, get_procedure_type
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+# Original implementations, kept verbatim as the reference for parity and timing
+
+def legacy_categorize_test(name):
+    name_lower = name.lower()
+    
+    # Imaging
+    if any(x in name_lower for x in ['x-ray', 'xray', 'ct scan', 'mri', 'ultrasound', 'scan', 'mammogram', 'doppler', 'barium', 'urography', 'venogram', 'myelogram', 'sialogram', 'cystogram', 'fistulogram', 'ductologram', 'hysterosalpingogram', 'urethrogram', 'cholangiography']):
+        return 'Imaging'
+    
+    # Hematology
+    if any(x in name_lower for x in ['blood count', 'fbc', 'haemoglobin', 'hemoglobin', 'hematocrit', 'platelet', 'reticulocyte', 'esr', 'bleeding', 'clotting', 'prothrombin', 'factor viii', 'factor ix', 'sickling', 'electrophoresis', 'bone marrow', 'coombs', 'blood grouping', 'grouping', 'rh typing', 'leucocyte', 'wbc', 'aec']):
+        return 'Hematology'
+    
+    # Biochemistry
+    if any(x in name_lower for x in ['glucose', 'sugar', 'urea', 'creatinine', 'electrolyte', 'sodium', 'potassium', 'chloride', 'calcium', 'phosphorus', 'magnesium', 'bilirubin', 'protein', 'albumin', 'cholesterol', 'triglyceride', 'lipid', 'hdl', 'ldl', 'vldl', 'lft', 'alt', 'ast', 'ggt', 'alkaline phosphatase', 'ldh', 'amylase', 'uric acid', 'iron', 'ferritin', 'tibc', 'renal function', 'ogtt', 'hba1c', 'glycosylated']):
+        return 'Biochemistry'
+    
+    # Microbiology
+    if any(x in name_lower for x in ['c/s', 'culture', 'sensitivity', 'swab', 'stool', 'urine c/', 'csf', 'fungal']):
+        return 'Microbiology'
+    
+    # Serology/Immunology
+    if any(x in name_lower for x in ['hiv', 'hepatitis', 'hbsag', 'hbv', 'vdrl', 'widal', 'aso', 'rheumatoid', 'le cell', 'cd4', 'viral serology', 'anti-streptolysin', 'c reactive', 'typhi dot', 'helicobacter']):
+        return 'Serology'
+    
+    # Hormones
+    if any(x in name_lower for x in ['hormone', 'fsh', 'lh', 'tsh', 'thyroid', 't3', 't4', 'ft3', 'ft4', 'prolactin', 'testosterone', 'estrogen', 'progesterone', 'cortisol', 'acth', 'dhea', 'hcg', 'beta-human']):
+        return 'Hormones'
+    
+    # Tumor Markers
+    if any(x in name_lower for x in ['psa', 'cea', 'afp', 'alpha-fetoprotein', 'cancer antigen', 'ca 19']):
+        return 'Tumor Markers'
+    
+    # Parasitology
+    if any(x in name_lower for x in ['malaria', 'parasite', 'trophozoite', 'skin snip', 'skin scrapping']):
+        return 'Parasitology'
+    
+    # Histopathology
+    if any(x in name_lower for x in ['histopathology', 'biopsy', 'cytology', 'pap smear', 'fine needle', 'immunostaining']):
+        return 'Histopathology'
+    
+    # Cardiac
+    if any(x in name_lower for x in ['ecg', 'troponin', 'ck-mb', 'creatine kinase', 'holter', 'myocardial']):
+        return 'Cardiac'
+    
+    # Special Tests
+    if any(x in name_lower for x in ['g6pd', 'heinz', 'guthrie', 'semen', 'pregnancy', 'arterial blood gas', 'abg', 'pulmonary function', 'eeg', 'gonioscopy', 'keratometry', 'a-scan', 'biomicroscopy', 'vitality', 'vct']):
+        return 'Special Tests'
+    
+    # Urine Tests
+    if any(x in name_lower for x in ['urine', '24hr', 'bence jones']):
+        return 'Urinalysis'
+    
+    return 'General'
+
+def legacy_get_sample_type(name):
+    name_lower = name.lower()
+    
+    if any(x in name_lower for x in ['urine', '24hr urine']):
+        return 'Urine'
+    if any(x in name_lower for x in ['stool']):
+        return 'Stool'
+    if any(x in name_lower for x in ['csf', 'cerebrospinal']):
+        return 'CSF'
+    if any(x in name_lower for x in ['swab', 'hvs', 'high vaginal']):
+        return 'Swab'
+    if any(x in name_lower for x in ['sputum']):
+        return 'Sputum'
+    if any(x in name_lower for x in ['biopsy', 'tissue', 'aspirate', 'bone marrow']):
+        return 'Tissue'
+    if any(x in name_lower for x in ['skin scrapping', 'skin snip']):
+        return 'Skin'
+    if any(x in name_lower for x in ['semen']):
+        return 'Semen'
+    if any(x in name_lower for x in ['x-ray', 'xray', 'ct scan', 'mri', 'ultrasound', 'scan', 'mammogram', 'doppler', 'ecg', 'eeg', 'holter']):
+        return None  # Imaging - no sample
+    if any(x in name_lower for x in ['blood', 'serum', 'plasma', 'haemoglobin', 'fbc', 'glucose', 'sugar', 'urea', 'creatinine', 'electrolyte', 'cholesterol', 'lipid', 'lft', 'hormone', 'hiv', 'hepatitis', 'grouping']):
+        return 'Blood'
+    
+    return 'Blood'  # Default to blood for most lab tests
+
+def legacy_get_turnaround_time(category, name):
+    name_lower = name.lower()
+    
+    if category == 'Imaging':
+        if 'mri' in name_lower or 'ct scan' in name_lower:
+            return '24 hours'
+        return '2 hours'
+    if category == 'Hematology':
+        return '2 hours'
+    if category == 'Biochemistry':
+        if 'ogtt' in name_lower:
+            return '4 hours'
+        return '4 hours'
+    if category == 'Microbiology':
+        return '48-72 hours'
+    if category == 'Serology':
+        return '24 hours'
+    if category == 'Hormones':
+        return '24 hours'
+    if category == 'Tumor Markers':
+        return '24-48 hours'
+    if category == 'Histopathology':
+        return '5-7 days'
+    if category == 'Cardiac':
+        if 'ecg' in name_lower:
+            return '30 minutes'
+        return '4 hours'
+    
+    return '24 hours'
+
+
+def legacy_get_procedure_type(name, price):
+    name_lower = name.lower()
+    price_val = float(price) if price else 0
+    
+    # Minor procedures (typically < 500 GHS or specific keywords)
+    minor_keywords = [
+        'extraction', 'filling', 'scaling', 'polishing', 'dressing', 
+        'catheter', 'circumcision', 'bandaging', 'cast', 'pop',
+        'incision and drainage', 'i & d', 'nail avulsion', 'removal of foreign body',
+        'examination', 'biopsy', 'excision biopsy', 'detention', 'observation',
+        'opd procedure', 'manual reduction', 'pessary insertion'
+    ]
+    
+    if any(kw in name_lower for kw in minor_keywords):
+        return 'minor'
+    
+    if price_val < 400:
+        return 'minor'
+    
+    return 'major'
+
+
+def legacy_classify_drug(name):
+    form = 'other'
+    name_lower = name.lower()
+    if 'tablet' in name_lower or 'tab' in name_lower:
+        form = 'tablet'
+    elif 'capsule' in name_lower or 'cap' in name_lower:
+        form = 'capsule'
+    elif 'syrup' in name_lower or 'syr' in name_lower:
+        form = 'syrup'
+    elif 'suspension' in name_lower or 'susp' in name_lower:
+        form = 'suspension'
+    elif 'injection' in name_lower or 'inj' in name_lower:
+        form = 'injection'
+    elif 'cream' in name_lower:
+        form = 'cream'
+    elif 'ointment' in name_lower:
+        form = 'ointment'
+    elif 'drops' in name_lower or 'drop' in name_lower:
+        form = 'drops'
+    elif 'inhaler' in name_lower:
+        form = 'inhaler'
+    elif 'patch' in name_lower:
+        form = 'patch'
+    elif 'powder' in name_lower or 'granul' in name_lower:
+        form = 'other'
+    elif 'lotion' in name_lower or 'solution' in name_lower:
+        form = 'other'
+    elif 'suppository' in name_lower or 'supp' in name_lower:
+        form = 'other'
+
+    category = 'other'
+    if any(x in name_lower for x in ['amoxicillin', 'ampicillin', 'penicillin', 'cephalosporin', 'cefuroxime', 'ceftriaxone', 'azithromycin', 'erythromycin', 'metronidazole', 'ciprofloxacin', 'gentamicin', 'cloxacillin', 'flucloxacillin', 'doxycycline', 'tetracycline', 'cotrimoxazole', 'chloramphenicol']):
+        category = 'antibiotics'
+    elif any(x in name_lower for x in ['paracetamol', 'ibuprofen', 'diclofenac', 'aspirin', 'tramadol', 'morphine', 'codeine', 'pethidine', 'acetylsalicylic']):
+        category = 'analgesics'
+    elif any(x in name_lower for x in ['acyclovir', 'zidovudine', 'lamivudine', 'efavirenz', 'nevirapine', 'tenofovir', 'abacavir']):
+        category = 'antivirals'
+    elif any(x in name_lower for x in ['fluconazole', 'ketoconazole', 'nystatin', 'clotrimazole', 'miconazole', 'griseofulvin']):
+        category = 'antifungals'
+    elif any(x in name_lower for x in ['amlodipine', 'atenolol', 'propranolol', 'nifedipine', 'lisinopril', 'enalapril', 'losartan', 'digoxin', 'furosemide', 'hydrochlorothiazide', 'aspirin', 'warfarin', 'heparin', 'clopidogrel']):
+        category = 'cardiovascular'
+    elif any(x in name_lower for x in ['metformin', 'glibenclamide', 'gliclazide', 'insulin', 'glimepiride']):
+        category = 'diabetes'
+    elif any(x in name_lower for x in ['salbutamol', 'aminophylline', 'theophylline', 'beclomethasone', 'budesonide', 'prednisolone', 'hydrocortisone']):
+        category = 'respiratory'
+    elif any(x in name_lower for x in ['omeprazole', 'ranitidine', 'antacid', 'magnesium trisilicate', 'metoclopramide', 'domperidone', 'loperamide', 'oral rehydration']):
+        category = 'gastrointestinal'
+    elif any(x in name_lower for x in ['diazepam', 'phenytoin', 'carbamazepine', 'phenobarbital', 'valproate', 'levodopa']):
+        category = 'neurological'
+    elif any(x in name_lower for x in ['amitriptyline', 'fluoxetine', 'haloperidol', 'chlorpromazine', 'risperidone', 'olanzapine']):
+        category = 'psychiatric'
+    elif any(x in name_lower for x in ['hydrocortisone cream', 'betamethasone', 'calamine', 'benzoyl peroxide', 'permethrin', 'benzyl benzoate']):
+        category = 'dermatological'
+    elif any(x in name_lower for x in ['vaccine', 'immunoglobulin', 'tetanus', 'hepatitis']):
+        category = 'vaccines'
+    elif any(x in name_lower for x in ['vitamin', 'folic acid', 'ferrous', 'iron', 'calcium', 'zinc', 'multivitamin']):
+        category = 'vitamins'
+    return form, category
+
+
+def legacy_classify_test(name):
+    category = legacy_categorize_test(name)
+    return category, legacy_get_sample_type(name), legacy_get_turnaround_time(category, name)
+
+
+def read_column(filename, column, where=None):
+    with open(os.path.join(script_dir, filename), 'r', encoding='utf-8') as f:
+        return [row[column] for row in csv.DictReader(f) if where is None or where(row)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='passes over each name list')
+    args = parser.parse_args()
+
+    gdrg = os.path.join(script_dir, 'gdrg_tariffs_import.csv')
+    with open(gdrg, 'r', encoding='utf-8') as f:
+        gdrg_rows = list(csv.DictReader(f))
+    lab_names = [r['name'] for r in gdrg_rows if r['mdc_category'] == 'INVESTIGATION']
+    procedures = [(r['name'], r['tariff_price']) for r in gdrg_rows if r['mdc_category'] != 'INVESTIGATION']
+    drug_names = read_column('nhis_drugs_for_import.csv', 'name')
+
+    cases = [
+        ('lab tests', lab_names, legacy_classify_test, classify_test),
+        ('procedures', procedures, lambda p: legacy_get_procedure_type(*p), lambda p: get_procedure_type(*p)),
+        ('drugs', drug_names, legacy_classify_drug, classify_drug),
+    ]
+
+    mismatches = 0
+    for label, items, legacy, engine in cases:
+        for item in items:
+            if legacy(item) != engine(item):
+                mismatches += 1
+                print(f'MISMATCH {label}: {item!r} legacy={legacy(item)!r} engine={engine(item)!r}')
+    if mismatches:
+        print(f'{mismatches} mismatches')
+        sys.exit(1)
+
+    print(f'All labels match ({sum(len(c[1]) for c in cases)} names)')
+    print('')
+    print(f'{"set":<12}{"names":>7}{"legacy ms":>12}{"engine ms":>12}{"speed-up":>10}')
+    for label, items, legacy, engine in cases:
+        legacy_time = timeit.timeit(lambda: [legacy(i) for i in items], number=args.repeat) / args.repeat
+        engine_time = timeit.timeit(lambda: [engine(i) for i in items], number=args.repeat) / args.repeat
+        print(f'{label:<12}{len(items):>7}{legacy_time * 1000:>12.2f}{engine_time * 1000:>12.2f}{legacy_time / engine_time:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
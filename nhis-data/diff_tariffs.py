@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Compare two generations of a tariff file.
+The tool lives in nhis_data/commands/diff_tariffs.py.
+"""
+
+from nhis_data.commands.diff_tariffs import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
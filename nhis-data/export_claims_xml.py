@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Write the NHIA claim XML of a claim batch dump.
+The tool lives in nhis_data/commands/export_claims_xml.py.
+"""
+
+from nhis_data.commands.export_claims_xml import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the NHIS data extraction and conversion scripts.
+"""
@@ -0,0 +1,13 @@
+import sys
+
+from nhis_data.commands import COMMANDS, run
+
+if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+    name = sys.argv[1]
+    # argparse takes the program name in usage lines from argv[0]
+    sys.argv[:2] = [f'python -m nhis_data {name}']
+    sys.exit(run(name, sys.argv[1:]))
+
+from nhis_data.pipeline import main
+
+sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Validated import bundles for the app's bulk loader (php artisan nhis:import-bundle).
+
+The row-by-row imports (App\\Imports\\DrugImport and friends) re-validate
+and re-normalize every CSV row and save it with its own query. A bundle
+carries rows that are already in the shape those imports would save:
+
+  * typed: prices are numbers, bottle sizes integers, blanks are null
+  * resolved against the app's enums with the same normalization the PHP
+    imports apply (e.g. form 'tab' -> 'tablet', unknown -> 'other')
+  * deduplicated by the table's unique key, last row wins, as repeated
+    updateOrCreate calls would leave it
+  * rows the PHP import would reject (missing code or name, non-numeric
+    price) are listed in the header instead
+
+Layout (JSON Lines): the first line is the header (format, schema_version,
+kind, table, key, columns, counts, rejected rows, checksum); every other
+line is one row as a JSON object with the table columns plus nhis_code.
+The checksum is the SHA-256 of everything after the header line, so the
+loader can verify the rows while streaming them.
+
+BundleWriter takes rows one at a time, as the converters produce them.
+Each built row goes to a temporary spool file, and only its key and line
+number stay in memory. The final file is written from the spool when
+the writer closes, because the header (counts, checksum) comes first
+and a later duplicate drops an earlier row.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+
+FORMAT = 'hms-import-bundle'
+SCHEMA_VERSION = 1
+
+# Enums of the drugs table (create_drugs_table migration)
+DRUG_FORMS = ('tablet', 'capsule', 'syrup', 'suspension', 'injection', 'drops', 'cream', 'ointment',
+              'inhaler', 'patch', 'other')
+DRUG_CATEGORIES = ('analgesics', 'antibiotics', 'antivirals', 'antifungals', 'cardiovascular', 'diabetes',
+                   'respiratory', 'gastrointestinal', 'neurological', 'psychiatric', 'dermatological',
+                   'vaccines', 'vitamins', 'supplements', 'other')
+DRUG_UNIT_TYPES = ('piece', 'bottle', 'vial', 'tube', 'box')
+PROCEDURE_TYPES = ('minor', 'major')
+
+# Variations accepted by DrugImport's normalizeForm/normalizeCategory/normalizeUnitType
+FORM_ALIASES = {
+    'tab': 'tablet', 'tabs': 'tablet', 'cap': 'capsule', 'caps': 'capsule', 'inj': 'injection',
+    'susp': 'suspension', 'syr': 'syrup', 'mix': 'syrup', 'mixture': 'syrup', 'crm': 'cream',
+    'oint': 'ointment',
+}
+CATEGORY_ALIASES = {
+    'antibiotic': 'antibiotics', 'analgesic': 'analgesics', 'antiviral': 'antivirals',
+    'antifungal': 'antifungals', 'vitamin': 'vitamins', 'supplement': 'supplements', 'general': 'other',
+}
+UNIT_TYPE_ALIASES = {
+    'tablet': 'piece', 'capsule': 'piece', 'tab': 'piece', 'cap': 'piece', 'ampoule': 'vial', 'amp': 'vial',
+}
+
+
+class Rejected(ValueError):
+    pass
+
+
+def clean(value):
+    """A CSV cell (or a value the converter already typed) as stripped text."""
+    return '' if value is None else str(value).strip()
+
+
+def resolve(value, valid, aliases, default):
+    value = clean(value).lower()
+    if value in aliases:
+        return aliases[value]
+    return value if value in valid else default
+
+
+def text(value):
+    """Stripped text, or None for a blank."""
+    return clean(value) or None
+
+
+def required(row, field):
+    value = text(row.get(field))
+    if value is None:
+        raise Rejected(f'Missing {field}')
+    return value
+
+
+def price(value, field):
+    value = clean(value)
+    if not value:
+        return 0.0
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise Rejected(f'Invalid {field} (must be numeric)')
+    return number
+
+
+def integer(value):
+    """Whole part of a numeric value, or None for a blank, zero or non-numeric value."""
+    try:
+        return int(float(clean(value))) or None
+    except (ValueError, OverflowError):
+        return None
+
+
+def drug_row(row):
+    return {
+        'drug_code': required(row, 'drug_code'),
+        'name': required(row, 'name'),
+        'generic_name': text(row.get('generic_name')),
+        'form': resolve(row.get('form'), DRUG_FORMS, FORM_ALIASES, 'other'),
+        'strength': text(row.get('strength')),
+        'category': resolve(row.get('category'), DRUG_CATEGORIES, CATEGORY_ALIASES, 'other'),
+        'unit_price': price(row.get('unit_price'), 'unit_price'),
+        'unit_type': resolve(row.get('unit_type'), DRUG_UNIT_TYPES, UNIT_TYPE_ALIASES, 'piece'),
+        'bottle_size': integer(row.get('bottle_size')),
+        'description': text(row.get('description')),
+        'minimum_stock_level': integer(row.get('min_stock')) or 10,
+        'maximum_stock_level': integer(row.get('max_stock')) or 1000,
+        'is_active': True,
+    }
+
+
+def lab_service_row(row):
+    return {
+        'code': required(row, 'code'),
+        'name': required(row, 'name'),
+        'price': price(row.get('price'), 'price'),
+        'category': text(row.get('category')) or 'General',
+        'sample_type': text(row.get('sample_type')),
+        'turnaround_time': text(row.get('turnaround_time')),
+        'description': text(row.get('description')),
+        'is_active': True,
+    }
+
+
+def procedure_row(row):
+    return {
+        'code': required(row, 'code'),
+        'name': required(row, 'name'),
+        'category': text(row.get('category')) or 'General',
+        'type': resolve(row.get('type'), PROCEDURE_TYPES, {}, 'minor'),
+        'description': text(row.get('description')),
+        'price': price(row.get('price'), 'price'),
+        'is_active': True,
+    }
+
+
+# kind -> (table, unique key, item_type of the NHIS mapping, row builder)
+KINDS = {
+    'drugs': ('drugs', 'drug_code', 'drug', drug_row),
+    'lab_services': ('lab_services', 'code', 'lab_service', lab_service_row),
+    'procedures': ('minor_procedure_types', 'code', 'procedure', procedure_row),
+}
+
+
+def bundle_path(output):
+    """<stem>.bundle.jsonl next to the import CSV."""
+    return os.path.splitext(output)[0] + '.bundle.jsonl'
+
+
+def build(kind, rows):
+    """Return (rows, rejected, duplicates) for the import CSV rows of a kind."""
+    _, key, _, builder = KINDS[kind]
+    by_key = {}
+    rejected = []
+    duplicates = 0
+    for number, row in enumerate(rows, 2):  # row numbers as the PHP import reports them
+        try:
+            record = builder(row)
+        except Rejected as e:
+            rejected.append({'row': number, 'error': str(e)})
+            continue
+        record['nhis_code'] = text(row.get('nhis_code'))
+        if record[key] in by_key:
+            duplicates += 1
+            del by_key[record[key]]  # keep the last occurrence, at its own position
+        by_key[record[key]] = record
+    return list(by_key.values()), rejected, duplicates
+
+
+class BundleWriter:
+    """Writer with writerow/writerows for the bundle of a kind; close() writes the file and returns its header."""
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        _, self.key, _, self.builder = KINDS[kind]
+        self.spool = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+        self.last = {}  # key -> (spool line of its last occurrence, mapped)
+        self.lines = 0
+        self.number = 2  # row numbers as the PHP import reports them
+        self.columns = []
+        self.rejected = []
+        self.duplicates = 0
+
+    def writerow(self, row):
+        number = self.number
+        self.number += 1
+        try:
+            record = self.builder(row)
+        except Rejected as e:
+            self.rejected.append({'row': number, 'error': str(e)})
+            return
+        record['nhis_code'] = text(row.get('nhis_code'))
+        if not self.columns:
+            self.columns = [c for c in record if c != 'nhis_code']
+        if record[self.key] in self.last:
+            self.duplicates += 1
+        self.last[record[self.key]] = (self.lines, record['nhis_code'] is not None)
+        self.spool.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+        self.lines += 1
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def _kept_lines(self, keep):
+        self.spool.seek(0)
+        for i, line in enumerate(self.spool):
+            if i in keep:
+                yield line
+
+    def close(self):
+        table, key, item_type, _ = KINDS[self.kind]
+        keep = {line for line, _ in self.last.values()}
+        digest = hashlib.sha256()
+        for line in self._kept_lines(keep):
+            digest.update(line)
+        header = {
+            'format': FORMAT,
+            'schema_version': SCHEMA_VERSION,
+            'kind': self.kind,
+            'table': table,
+            'key': key,
+            'item_type': item_type,
+            'columns': self.columns,
+            'count': len(keep),
+            'mapped': sum(1 for _, mapped in self.last.values() if mapped),
+            'duplicates': self.duplicates,
+            'rejected': self.rejected,
+            'checksum': digest.hexdigest(),
+        }
+
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n')
+            if len(keep) == self.lines:
+                self.spool.seek(0)
+                shutil.copyfileobj(self.spool, f)
+            else:
+                f.writelines(self._kept_lines(keep))
+        self.spool.close()
+        os.replace(tmp, self.path)
+        return header
+
+
+def write_bundle(path, kind, rows):
+    """Write the bundle for the import CSV rows of a kind; return its header."""
+    writer = BundleWriter(path, kind)
+    writer.writerows(rows)
+    return writer.close()
+
+
+def read_bundle(path):
+    """(header, rows) of a bundle, after checking its format, version and checksum."""
+    with open(path, 'rb') as f:
+        header = json.loads(f.readline())
+        body = f.read()
+    if header.get('format') != FORMAT or header.get('schema_version') != SCHEMA_VERSION:
+        raise ValueError(f'{path}: not a schema version {SCHEMA_VERSION} import bundle')
+    if hashlib.sha256(body).hexdigest() != header['checksum']:
+        raise ValueError(f'{path}: checksum mismatch')
+    return header, [json.loads(line) for line in body.splitlines()]
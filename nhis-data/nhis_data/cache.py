@@ -0,0 +1,59 @@
+"""
+Content-hash cache for parsed pages and tables of NHIS source documents.
+
+The cache lives next to the source file as "<source>.cache.json" and maps
+the SHA-256 of a page's (or table's) raw content to its parse result. On a
+rerun against a corrected PDF or tariff book only the pages or tables whose
+content changed are parsed again. Entries that were not used by the latest
+run are dropped when the cache is saved, so it never outgrows the source.
+"""
+
+import hashlib
+import json
+import os
+
+
+class ContentCache:
+    def __init__(self, source_path, version):
+        self.path = source_path + '.cache.json'
+        self.version = version
+        self.entries = {}
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            # A parser change invalidates everything
+            if data.get('version') == version:
+                self.entries = data.get('entries', {})
+
+    @staticmethod
+    def key(content):
+        return hashlib.sha256(content).hexdigest()
+
+    def __contains__(self, key):
+        return key in self.entries or key in self.used
+
+    def get(self, key):
+        if key in self.used:
+            return self.used[key]
+        if key in self.entries:
+            self.hits += 1
+            self.used[key] = self.entries[key]
+            return self.used[key]
+        return None
+
+    def put(self, key, value):
+        self.misses += 1
+        self.used[key] = value
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': self.used}, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,221 @@
+"""
+Pre-submission checks of a claim batch against the generated tariff tables.
+
+The portal rejects a batch claim by claim, weeks after submission. This
+module runs the usual reasons on a batch dump (the same claims.csv,
+diagnoses.csv and items.csv as claims_xml.py; items.csv may also carry
+nhis_price, and claims.csv gdrg_amount) before it is sent:
+
+    unmapped          the item has no NHIS code, so the claim leaves it out (warning)
+    unknown_code      the code is in neither nhis_tariffs_import.csv nor
+                      gdrg_tariffs_import.csv (error)
+    wrong_type        a drug on a G-DRG code, a lab or procedure on a
+                      medicine code (error), or a lab on a G-DRG procedure
+                      and the other way round (warning)
+    not_in_catalogue  the code is not in the lab, procedure or drug import
+                      table of the item's type (warning)
+    missing_price     a mapped item or G-DRG without its NHIS price (warning)
+    price_mismatch    nhis_price (gdrg_amount) is not the tariff price, to the
+                      cent (error)
+    age_mismatch      an adult ('A' suffix) G-DRG for a child or a child ('C')
+                      one for an adult, at the date of attendance (error)
+    missing_dob       an age-specific G-DRG on a claim without date of birth (warning)
+
+The G-DRG books mark their adult tariffs '>=12 Yrs', so a patient is a
+child below CHILD_AGE_LIMIT years. The claim's own G-DRG (gdrg_tariff_code,
+else c_drg_code) is checked like an item of type 'gdrg'.
+
+The tariffs are loaded once into TariffTables and the import tables into
+sets (ClaimTables). Claims are
+checked in chunks of CHUNK_CLAIMS, in a process pool when jobs > 1; each
+worker gets a copy of the tables when it starts. The problems are
+written in batch order, one report row each, so a month of claims is
+checked in about the time it takes to read the dump.
+"""
+
+import csv
+import os
+import time
+from collections import Counter
+from datetime import date
+from decimal import InvalidOperation
+
+from nhis_data.claims_xml import coalesce, day, read_batch
+from nhis_data.formats import iter_table
+from nhis_data.history import cents
+from nhis_data.lookup import TariffIndex
+from nhis_data.paths import DRUGS_CSV, GDRG_TARIFFS_CSV, LAB_SERVICES_CSV, NHIS_TARIFFS_CSV, PROCEDURES_CSV
+from nhis_data.stream import chunked, in_order
+
+CHUNK_CLAIMS = 2000
+CHILD_AGE_LIMIT = 12
+
+REPORT_FIELDNAMES = ['claim_id', 'claim_check_code', 'member_no', 'item_type', 'code', 'severity', 'check', 'message']
+SEVERITY = REPORT_FIELDNAMES.index('severity')
+CHECK = REPORT_FIELDNAMES.index('check')
+ERROR = 'error'
+WARNING = 'warning'
+
+# Claim item type -> the tariff category it must have; other types (consultation, ward...) are not typed
+TARIFF_CATEGORIES = {'drug': 'medicine', 'lab': 'lab', 'procedure': 'procedure'}
+AGE_GROUPS = {'adult': 'adults', 'child': 'children'}
+
+
+class ClaimTables:
+    """The generated tables a batch is checked against, as code lookups."""
+
+    def __init__(self, nhis=NHIS_TARIFFS_CSV, gdrg=GDRG_TARIFFS_CSV,
+                 lab=LAB_SERVICES_CSV, procedures=PROCEDURES_CSV, drugs=DRUGS_CSV):
+        # code -> {code, name, price, category, source}, medicines first as in getTariffForItem()
+        self.tariffs = TariffIndex([('nhis', nhis), ('gdrg', gdrg)])
+        self.catalogues = {
+            item_type: {row['nhis_code'].strip() for row in iter_table(path) if row.get('nhis_code')}
+            for item_type, path in [('lab', lab), ('procedure', procedures), ('drug', drugs)]
+            if os.path.exists(path)
+        }
+
+    def age_category(self, code):
+        """age_category of a G-DRG code as the tariff file has it; 'all' for a code it does not have."""
+        found = self.tariffs.find(code)
+        if found is None or found[0].layout != 'gdrg':
+            return 'all'
+        table, row = found
+        return table.age_categories[row] or 'all'
+
+
+def age_on(dob, on):
+    """Whole years between two 'YYYY-MM-DD' dates, or None if either is blank or not a date."""
+    try:
+        born = date.fromisoformat(day(dob))
+        today = date.fromisoformat(day(on))
+    except ValueError:
+        return None
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def check_code(tables, item_type, code, price, age, child_age_limit=CHILD_AGE_LIMIT):
+    """
+    [(severity, check, message), ...] for one coded item of a claim. price is
+    the claimed price cell, None when the dump has no price column; age is
+    None when unknown.
+    """
+    tariff = tables.tariffs.entry(code)
+    if tariff is None:
+        return [(ERROR, 'unknown_code', f'{code} is not in the NHIS or G-DRG tariffs')]
+
+    problems = []
+    expected = TARIFF_CATEGORIES.get(item_type)
+    if expected is not None and tariff['category'] != expected:
+        if 'medicine' in (expected, tariff['category']):
+            problems.append((ERROR, 'wrong_type', f"{item_type} item on {tariff['category']} tariff {code}"))
+        else:
+            problems.append((WARNING, 'wrong_type', f"{item_type} item on G-DRG {tariff['category']} tariff {code}"))
+    catalogue = tables.catalogues.get(item_type)
+    if catalogue is not None and code not in catalogue:
+        problems.append((WARNING, 'not_in_catalogue', f'{code} is not in the {item_type} import table'))
+
+    if price is not None and tariff['price'] is not None:
+        try:
+            claimed = cents(price)
+        except InvalidOperation:
+            claimed = False
+        if claimed is None:
+            problems.append((WARNING, 'missing_price', f"no NHIS price; the tariff is {tariff['price']:.2f}"))
+        elif claimed != round(tariff['price'] * 100):
+            problems.append((ERROR, 'price_mismatch', f"claimed {price.strip()}, tariff {tariff['price']:.2f}"))
+
+    age_category = tables.age_category(code) if tariff['source'] == 'gdrg' else 'all'
+    if age_category in AGE_GROUPS:
+        if age is None:
+            problems.append((WARNING, 'missing_dob', f'{code} is for {AGE_GROUPS[age_category]}; no date of birth'))
+        elif (age < child_age_limit) != (age_category == 'child'):
+            problems.append((ERROR, 'age_mismatch', f'{code} is for {AGE_GROUPS[age_category]}; the patient was {age}'))
+    return problems
+
+
+def check_claim(tables, claim, items, child_age_limit=CHILD_AGE_LIMIT):
+    """Report rows (tuples in REPORT_FIELDNAMES order) for one claim, its G-DRG first and then its items in order."""
+    age = age_on(claim.get('patient_dob'), claim.get('date_of_attendance'))
+    base = (claim['id'], claim.get('claim_check_code', ''),
+            coalesce(claim.get('membership_id'), claim.get('patient_insurance_membership_id')))
+    rows = []
+
+    def add(item_type, code, problems):
+        rows.extend(base + (item_type, code) + problem for problem in problems)
+
+    gdrg_code = coalesce(claim.get('gdrg_tariff_code'), claim.get('c_drg_code'))
+    if gdrg_code:
+        add('gdrg', gdrg_code, check_code(tables, None, gdrg_code, claim.get('gdrg_amount'), age,
+                                          child_age_limit))
+
+    for item in items:
+        item_type = item.get('item_type', '')
+        code = coalesce(item.get('nhis_code'), item.get('nhis_tariff_code'))
+        if not code:
+            add(item_type, item.get('code', ''), [(WARNING, 'unmapped', 'no NHIS code; left out of the claim')])
+            continue
+        add(item_type, code, check_code(tables, item_type, code, item.get('nhis_price'), age,
+                                        child_age_limit))
+    return rows
+
+
+_tables = None
+
+
+def _set_tables(tables):
+    global _tables
+    _tables = tables
+
+
+def _check_task(task):
+    """(claims, report rows, seconds) for a chunk of (claim, diagnoses, items); runs in a worker process."""
+    claims, child_age_limit = task
+    started = time.perf_counter()
+    rows = []
+    for claim, _, items in claims:
+        rows.extend(check_claim(_tables, claim, items, child_age_limit))
+    return len(claims), rows, time.perf_counter() - started
+
+
+def validate_batch(dump_dir, output, tables=None, jobs=1, chunk_claims=CHUNK_CLAIMS,
+                   child_age_limit=CHILD_AGE_LIMIT, metrics=None):
+    """
+    Check a batch dump and write the report CSV to output; return
+    {'claims', 'with_errors', 'with_warnings', 'checks': Counter}. The
+    report is written to output + '.tmp' and only replaces output once it
+    is complete.
+    """
+    tables = tables or ClaimTables()
+    tasks = ((chunk, child_age_limit) for chunk in chunked(read_batch(dump_dir, with_diagnoses=False), chunk_claims))
+    summary = {'claims': 0, 'with_errors': 0, 'with_warnings': 0, 'checks': Counter()}
+    tmp = output + '.tmp'
+    try:
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(REPORT_FIELDNAMES)
+            if jobs > 1:
+                from concurrent.futures import ProcessPoolExecutor
+
+                with ProcessPoolExecutor(jobs, initializer=_set_tables, initargs=(tables,)) as pool:
+                    _write_report(writer, in_order(pool, _check_task, tasks, 2 * jobs), summary, metrics)
+            else:
+                _set_tables(tables)
+                _write_report(writer, map(_check_task, tasks), summary, metrics)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, output)
+    return summary
+
+
+def _write_report(writer, results, summary, metrics):
+    for n, rows, seconds in results:
+        if metrics is not None:
+            metrics.add_time('check', seconds)
+            metrics.count('emitted', len(rows))
+        writer.writerows(rows)
+        summary['claims'] += n
+        summary['checks'].update(row[CHECK] for row in rows)
+        for severity, key in [(ERROR, 'with_errors'), (WARNING, 'with_warnings')]:
+            summary[key] += len({row[0] for row in rows if row[SEVERITY] == severity})
@@ -0,0 +1,41 @@
+"""
+The nhis-data command-line tools, one module per command.
+
+    python -m nhis_data <command> [options]     e.g.  python -m nhis_data convert-drugs --help
+
+Each module has a main(argv=None), and the scripts in the nhis-data
+directory are thin wrappers around it. A command module imports only
+what its argument parser needs. Its modules import their own heavy
+dependencies lazily: python-docx, lxml, PyPDF2, pyarrow and the process
+pool are loaded by the functions that use them. So `--help`, a bad option
+or a dispatch through this table does not pay for them.
+"""
+
+from importlib import import_module
+
+# Command name -> module in this package
+COMMANDS = {
+    'extract-gdrg': 'extract_gdrg',
+    'extract-nhis-ml': 'extract_nhis_ml',
+    'convert-lab': 'convert_gdrg_to_lab_import',
+    'convert-procedures': 'convert_gdrg_to_procedure_import',
+    'convert-drugs': 'convert_nhis_to_drug_import',
+    'diff-tariffs': 'diff_tariffs',
+    'suggest-mappings': 'suggest_nhis_mappings',
+    'serve-tariffs': 'serve_tariffs',
+    'tariff-history': 'tariff_history',
+    'export-claims-xml': 'export_claims_xml',
+    'validate-claims': 'validate_claims',
+    'search-tariffs': 'search_tariffs',
+    'refresh-jobs': 'refresh_jobs',
+    'tariff-cube': 'tariff_cube',
+}
+
+
+def load(name):
+    """The main() of a command, importing its module only now."""
+    return import_module(f'{__name__}.{COMMANDS[name]}').main
+
+
+def run(name, argv=None):
+    return load(name)(argv)
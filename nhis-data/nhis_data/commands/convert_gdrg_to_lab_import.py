@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Convert NHIS G-DRG Investigation tariffs to Lab Service import format.
+Extracts INVESTIGATION category items and formats them for HMS lab service import.
+"""
+
+import argparse
+
+from nhis_data import memo
+from nhis_data.bundle import BundleWriter, bundle_path
+from nhis_data.diff import DeltaFilter, diff_path, summarize, write_diff
+from nhis_data.formats import add_format_argument, format_of, open_table, output_path
+from nhis_data.manifest import read_rows
+from nhis_data.metrics import Metrics, add_arguments
+from nhis_data.paths import GDRG_TARIFFS_CSV, LAB_SERVICES_CSV
+from nhis_data.rules import LAB_RULES_VERSION, classify_test
+from nhis_data.stream import Tally, read_chunks
+
+# Typed columns for --format parquet/arrow
+COLUMN_TYPES = {
+    'price': 'decimal', 'category': 'category', 'sample_type': 'category', 'turnaround_time': 'category',
+}
+
+
+def lab_services(chunk, metrics, memoised, delta=None):
+    """Lab service rows for the INVESTIGATION rows of a chunk of G-DRG tariffs."""
+    investigations = [row for row in chunk if row['mdc_category'] == 'INVESTIGATION']
+    metrics.skip('not INVESTIGATION', len(chunk) - len(investigations))
+    metrics.count('investigations', len(investigations))
+    if delta is not None:
+        changed = delta.select(investigations)
+        metrics.skip('unchanged since --previous', len(investigations) - len(changed))
+        investigations = changed
+
+    with metrics.phase('classify'):
+        labels = memoised.map([row['name'] for row in investigations],
+                              lambda names: [classify_test(name) for name in names])
+
+    return [
+        {
+            'code': row['code'],
+            'name': row['name'],
+            'price': '',  # Leave empty - hospital sets their own prices
+            'category': category,
+            'sample_type': sample_type if sample_type else '',
+            'turnaround_time': turnaround_time,
+            'nhis_code': row['code'],  # Same as code for auto-mapping
+        }
+        for row, (category, sample_type, turnaround_time) in zip(investigations, labels)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert G-DRG investigation tariffs to the lab service import format.')
+    parser.add_argument('--input', default=GDRG_TARIFFS_CSV)
+    parser.add_argument('--output', default=LAB_SERVICES_CSV)
+    parser.add_argument('--previous', help='previous gdrg_tariffs_import.csv; only added and changed codes are written')
+    parser.add_argument('--bundle', action='store_true',
+                        help='also write <output stem>.bundle.jsonl for php artisan nhis:import-bundle')
+    add_format_argument(parser)
+    memo.add_arguments(parser)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics.from_args(__file__, args)
+
+    output_file = output_path(args.output, args.format)
+    delta = None
+    if args.previous:
+        # Diff mode: only the codes that were added or changed since the previous tariffs
+        delta = DeltaFilter(read_rows(args.previous), 'code', 'tariff_price',
+                            lambda row: row.get('mdc_category') == 'INVESTIGATION')
+        output_file = diff_path(output_file, 'delta')
+
+    # Stream the G-DRG tariffs through to the lab services import file (and
+    # bundle), one chunk at a time, counting categories on the way
+    fieldnames = ['code', 'name', 'price', 'category', 'sample_type', 'turnaround_time', 'nhis_code']
+    tally = Tally('category')
+    memoised = memo.ClassificationMemo.from_args('lab_services', LAB_RULES_VERSION, args)
+    bundle = BundleWriter(bundle_path(output_file), 'lab_services') if args.bundle else None
+    with open_table(output_file, fieldnames, COLUMN_TYPES) as writer:
+        for chunk in read_chunks(args.input, metrics):
+            services = lab_services(chunk, metrics, memoised, delta)
+            with metrics.phase(f'{format_of(output_file)} write'):
+                writer.writerows(services)
+            if bundle is not None:
+                with metrics.phase('bundle'):
+                    bundle.writerows(services)
+            tally.update(services)
+            metrics.count('emitted', len(services))
+
+    print(f"Found {metrics.counts['investigations']} investigation items")
+    if delta is not None:
+        entries = delta.entries()
+        write_diff(diff_path(output_path(args.output, 'csv'), 'diff'), entries)
+        counts = summarize(entries)
+        print(f"Diff against {args.previous}: {counts['added']} added, {counts['changed']} changed, {counts['retired']} retired")
+
+    print(f"Created {output_file} with {metrics.counts['emitted']} lab services")
+
+    if bundle is not None:
+        with metrics.phase('bundle'):
+            header = bundle.close()
+        print(f"Created {bundle_path(output_file)} with {header['count']} lab services ({len(header['rejected'])} rejected)")
+
+    # Print category breakdown
+    print("\nCategory breakdown:")
+    for cat, count in sorted(tally['category'].items(), key=lambda x: -x[1]):
+        print(f"  {cat}: {count}")
+
+    memoised.save()
+    if memoised.path:
+        print(f'Names classified: {memoised.misses}, reused from memo: {memoised.hits}')
+
+    metrics.finish(output_file)
+
+
+if __name__ == '__main__':
+    main()
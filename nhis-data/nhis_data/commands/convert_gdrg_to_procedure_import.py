@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Convert NHIS G-DRG tariffs to Procedure Type import format.
+Extracts surgical/procedural items (excluding INVESTIGATION and medical management).
+"""
+
+import argparse
+
+from nhis_data import memo
+from nhis_data.bundle import BundleWriter, bundle_path
+from nhis_data.diff import DeltaFilter, diff_path, summarize, write_diff
+from nhis_data.formats import add_format_argument, format_of, open_table, output_path
+from nhis_data.manifest import read_rows
+from nhis_data.metrics import Metrics, add_arguments
+from nhis_data.paths import GDRG_TARIFFS_CSV, PROCEDURES_CSV
+from nhis_data.rules import PROCEDURE_RULES_VERSION, get_procedure_type
+from nhis_data.stream import Tally, read_chunks
+
+# Categories that are procedures (not investigations or medical management)
+PROCEDURE_CATEGORIES = [
+    'ADULT SURGERY',
+    'DENTAL',
+    'EAR NOSE AND THROAT',
+    'OBSTETRICS AND GYNAECOLOGY',
+    'OPTHALMOLOGY',
+    'ORTHOPAEDIC',
+    'PAEDIATRIC SURGERY',
+    'RECONSTRUCTIVE SURGERY',
+    'ZOOM',  # Minor procedures like circumcision, dressing changes
+]
+
+# Categories to exclude (medical management, not procedures)
+EXCLUDE_CATEGORIES = [
+    'INVESTIGATION',
+    'ADULT MEDICINE',
+    'PAEDIATRICS',
+    'OUT PATIENT',
+]
+
+# Typed columns for --format parquet/arrow
+COLUMN_TYPES = {'category': 'category', 'type': 'category', 'price': 'decimal'}
+
+# Map G-DRG category to simplified category
+def simplify_category(mdc_category):
+    mapping = {
+        'ADULT SURGERY': 'General Surgery',
+        'DENTAL': 'Dental',
+        'EAR NOSE AND THROAT': 'ENT',
+        'OBSTETRICS AND GYNAECOLOGY': 'Obstetrics & Gynaecology',
+        'OPTHALMOLOGY': 'Ophthalmology',
+        'ORTHOPAEDIC': 'Orthopaedic',
+        'PAEDIATRIC SURGERY': 'Paediatric Surgery',
+        'RECONSTRUCTIVE SURGERY': 'Reconstructive Surgery',
+        'ZOOM': 'Minor Procedures',
+    }
+    return mapping.get(mdc_category, mdc_category)
+
+
+def procedures(chunk, seen_codes, metrics, memoised, delta=None):
+    """
+    Procedure rows for the first occurrence of each procedure code in a chunk
+    of G-DRG tariffs. seen_codes holds the codes of earlier chunks, in any
+    category; a later row with the same code is a duplicate.
+    """
+    selected = []
+    for row in chunk:
+        code = row['code']
+        if row['mdc_category'] not in PROCEDURE_CATEGORIES:
+            metrics.skip('not a procedure category')
+        elif code in seen_codes:
+            metrics.skip('duplicate code')
+        else:
+            selected.append(row)
+        seen_codes.add(code)
+    metrics.count('procedures', len(selected))
+    if delta is not None:
+        changed = delta.select(selected)
+        metrics.skip('unchanged since --previous', len(selected) - len(changed))
+        selected = changed
+
+    with metrics.phase('classify'):
+        # The type depends on the price as well as the name
+        proc_types = memoised.map(
+            [f"{row['name']}\0{row['tariff_price']}" for row in selected],
+            lambda keys: [get_procedure_type(*key.split('\0', 1)) for key in keys])
+
+    records = []
+    for row, proc_type in zip(selected, proc_types):
+        age_category = row['age_category']
+        records.append({
+            'code': row['code'],
+            'name': row['name'],
+            'category': simplify_category(row['mdc_category']),
+            'type': proc_type,
+            'price': '',  # Leave empty - hospital sets their own prices
+            # Add age info to description if present
+            'description': f"Age category: {age_category}" if age_category else '',
+            'nhis_code': row['code'],  # Same as code for auto-mapping
+        })
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert G-DRG surgical/procedural tariffs to the procedure type import format.')
+    parser.add_argument('--input', default=GDRG_TARIFFS_CSV)
+    parser.add_argument('--output', default=PROCEDURES_CSV)
+    parser.add_argument('--previous', help='previous gdrg_tariffs_import.csv; only added and changed codes are written')
+    parser.add_argument('--bundle', action='store_true',
+                        help='also write <output stem>.bundle.jsonl for php artisan nhis:import-bundle')
+    add_format_argument(parser)
+    memo.add_arguments(parser)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics.from_args(__file__, args)
+
+    output_file = output_path(args.output, args.format)
+    delta = None
+    if args.previous:
+        # Diff mode: only the codes that were added or changed since the previous tariffs
+        delta = DeltaFilter(read_rows(args.previous), 'code', 'tariff_price',
+                            lambda row: row.get('mdc_category', '') in PROCEDURE_CATEGORIES)
+        output_file = diff_path(output_file, 'delta')
+
+    # Stream the G-DRG tariffs through to the procedures import file (and
+    # bundle), one chunk at a time, counting categories and types on the way
+    fieldnames = ['code', 'name', 'category', 'type', 'price', 'description', 'nhis_code']
+    tally = Tally('category', 'type')
+    seen_codes = set()
+    memoised = memo.ClassificationMemo.from_args('procedures', PROCEDURE_RULES_VERSION, args)
+    bundle = BundleWriter(bundle_path(output_file), 'procedures') if args.bundle else None
+    with open_table(output_file, fieldnames, COLUMN_TYPES) as writer:
+        for chunk in read_chunks(args.input, metrics):
+            records = procedures(chunk, seen_codes, metrics, memoised, delta)
+            with metrics.phase(f'{format_of(output_file)} write'):
+                writer.writerows(records)
+            if bundle is not None:
+                with metrics.phase('bundle'):
+                    bundle.writerows(records)
+            tally.update(records)
+            metrics.count('emitted', len(records))
+
+    print(f"Found {metrics.counts['procedures']} procedure items")
+    if delta is not None:
+        entries = delta.entries()
+        write_diff(diff_path(output_path(args.output, 'csv'), 'diff'), entries)
+        counts = summarize(entries)
+        print(f"Diff against {args.previous}: {counts['added']} added, {counts['changed']} changed, {counts['retired']} retired")
+
+    print(f"Created {output_file} with {metrics.counts['emitted']} procedures")
+
+    if bundle is not None:
+        with metrics.phase('bundle'):
+            header = bundle.close()
+        print(f"Created {bundle_path(output_file)} with {header['count']} procedures ({len(header['rejected'])} rejected)")
+
+    # Print category breakdown
+    print("\nCategory breakdown:")
+    for cat, count in sorted(tally['category'].items(), key=lambda x: -x[1]):
+        print(f"  {cat}: {count}")
+
+    print(f"\nType breakdown:")
+    print(f"  Minor: {tally['type']['minor']}")
+    print(f"  Major: {tally['type']['major']}")
+
+    memoised.save()
+    if memoised.path:
+        print(f'Names classified: {memoised.misses}, reused from memo: {memoised.hits}')
+
+    metrics.finish(output_file)
+
+
+if __name__ == '__main__':
+    main()
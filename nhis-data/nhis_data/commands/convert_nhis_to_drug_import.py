@@ -0,0 +1,138 @@
+import argparse
+
+from nhis_data import memo
+from nhis_data.bundle import BundleWriter, bundle_path
+from nhis_data.diff import DeltaFilter, diff_path, summarize, write_diff
+from nhis_data.formats import add_format_argument, format_of, open_table, output_path
+from nhis_data.drugs import DRUG_RULES_VERSION, memoized_features, repair_name
+from nhis_data.manifest import read_rows, tariff_engine
+from nhis_data.metrics import Metrics, add_arguments
+from nhis_data.paths import DRUGS_CSV, NHIS_TARIFFS_CSV
+from nhis_data.stream import Tally, read_chunks
+
+# Typed columns for --format parquet/arrow
+COLUMN_TYPES = {
+    'form': 'category', 'unit_price': 'decimal', 'unit_type': 'category', 'bottle_size': 'int',
+    'category': 'category', 'min_stock': 'int',
+}
+
+
+def drugs(nhis_items, layout, metrics, memoised, delta=None):
+    """
+    Drug import rows for a chunk of NHIS items, extracting every feature at
+    once for the names of the chunk that memoised does not hold yet. The
+    layout engine (extract_nhis_ml.py --engine layout) fills the unit column
+    on every row and its names are whole; names from the text engine were
+    cut at the column edge and are repaired first.
+    """
+    if delta is not None:
+        changed = delta.select(nhis_items)
+        metrics.skip('unchanged since --previous', len(nhis_items) - len(changed))
+        nhis_items = changed
+
+    if layout:
+        names = [item['name'] for item in nhis_items]
+        with metrics.phase('classify'):
+            features = memoized_features(memoised, names, [item['unit'] for item in nhis_items])
+    else:
+        with metrics.phase('repair names'):
+            names = [repair_name(item['name'], item.get('unit', '')) for item in nhis_items]
+        with metrics.phase('classify'):
+            features = memoized_features(memoised, names)
+
+    rows = []
+    for i, item in enumerate(nhis_items):
+        nhis_code = item['nhis_code']
+        bottle_size = features['bottle_size'][i]
+        rows.append({
+            'drug_code': nhis_code,
+            'name': names[i],
+            'generic_name': features['generic_name'][i],
+            'form': features['form'][i],
+            'strength': features['strength'][i],
+            'unit_price': '',  # User fills this in
+            'unit_type': features['unit_type'][i],
+            'bottle_size': bottle_size if bottle_size else '',  # Volume in ml for bottles/vials
+            'category': features['category'][i],
+            'min_stock': '',  # Use default
+            'nhis_code': nhis_code,  # Same as drug_code for auto-mapping
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert NHIS medicine tariffs to the drug import format.')
+    parser.add_argument('--input', default=NHIS_TARIFFS_CSV)
+    parser.add_argument('--output', default=DRUGS_CSV)
+    parser.add_argument('--previous', help='previous nhis_tariffs_import.csv; only added and changed codes are written')
+    parser.add_argument('--engine', choices=['layout', 'text'],
+                        help='extract_nhis_ml.py engine that wrote --input (default: from its manifest)')
+    parser.add_argument('--bundle', action='store_true',
+                        help='also write <output stem>.bundle.jsonl for php artisan nhis:import-bundle')
+    add_format_argument(parser)
+    memo.add_arguments(parser)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics.from_args(__file__, args)
+
+    output_file = output_path(args.output, args.format)
+    delta = None
+    if args.previous:
+        # Diff mode: only the codes that were added or changed since the previous tariffs
+        delta = DeltaFilter(read_rows(args.previous), 'nhis_code', 'price')
+        output_file = diff_path(output_file, 'delta')
+
+    # Stream the NHIS tariffs (CSV, Parquet or Arrow) through to the drug import
+    # file (and bundle), one chunk at a time, counting the breakdowns on the way.
+    # Which engine wrote the tariffs is read from their manifest before the first chunk.
+    fieldnames = ['drug_code', 'name', 'generic_name', 'form', 'strength', 'unit_price', 'unit_type', 'bottle_size', 'category', 'min_stock', 'nhis_code']
+    tally = Tally('category', 'form', 'unit_type')
+    bundle = BundleWriter(bundle_path(output_file), 'drugs') if args.bundle else None
+    layout = (args.engine or tariff_engine(args.input)) == 'layout'
+    memoised = memo.ClassificationMemo.from_args('drugs', DRUG_RULES_VERSION, args)
+    with open_table(output_file, fieldnames, COLUMN_TYPES) as writer:
+        for chunk in read_chunks(args.input, metrics):
+            rows = drugs(chunk, layout, metrics, memoised, delta)
+            with metrics.phase(f'{format_of(output_file)} write'):
+                writer.writerows(rows)
+            if bundle is not None:
+                with metrics.phase('bundle'):
+                    bundle.writerows(rows)
+            tally.update(rows)
+            metrics.count('emitted', len(rows))
+
+    print(f"Read {metrics.counts['read']} NHIS items")
+    if delta is not None:
+        entries = delta.entries()
+        write_diff(diff_path(output_path(args.output, 'csv'), 'diff'), entries)
+        counts = summarize(entries)
+        print(f"Diff against {args.previous}: {counts['added']} added, {counts['changed']} changed, {counts['retired']} retired")
+
+    print(f"Created {output_file} with {metrics.counts['emitted']} drugs")
+
+    if bundle is not None:
+        with metrics.phase('bundle'):
+            header = bundle.close()
+        print(f"Created {bundle_path(output_file)} with {header['count']} drugs ({len(header['rejected'])} rejected)")
+    print('')
+    print('Categories breakdown:')
+    for cat, count in tally['category'].most_common():
+        print(f'  {cat}: {count}')
+    print('')
+    print('Forms breakdown:')
+    for form, count in tally['form'].most_common():
+        print(f'  {form}: {count}')
+    print('')
+    print('Unit types breakdown:')
+    for ut, count in tally['unit_type'].most_common():
+        print(f'  {ut}: {count}')
+
+    memoised.save()
+    if memoised.path:
+        print(f'Names classified: {memoised.misses}, reused from memo: {memoised.hits}')
+
+    metrics.finish(output_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Compare two generations of nhis_tariffs_import.csv or gdrg_tariffs_import.csv
+(either may also be a Parquet or Arrow file written with --format).
+Writes only the added, changed and retired codes, with the old and new price.
+"""
+
+import argparse
+
+from nhis_data.diff import detect_layout, diff_path, diff_tariffs, summarize, write_diff
+from nhis_data.formats import output_path, read_table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('previous', help='tariff CSV from the previous extraction')
+    parser.add_argument('current', help='tariff CSV from the new extraction')
+    parser.add_argument('--output', help='diff CSV to write (default: <current>.diff.csv)')
+    args = parser.parse_args(argv)
+
+    old_fields, old_rows = read_table(args.previous)
+    new_fields, new_rows = read_table(args.current)
+    key, price_field = detect_layout(new_fields)
+    if detect_layout(old_fields) != (key, price_field):
+        parser.error('previous and current files are different tariff layouts')
+
+    entries = diff_tariffs(old_rows, new_rows, key, price_field)
+    output = args.output or diff_path(output_path(args.current, 'csv'), 'diff')
+    write_diff(output, entries)
+
+    counts = summarize(entries)
+    print(f'Created {output} with {len(entries)} changes')
+    print(f"  Added: {counts['added']}")
+    print(f"  Changed: {counts['changed']}")
+    print(f"  Retired: {counts['retired']}")
+
+
+if __name__ == '__main__':
+    main()
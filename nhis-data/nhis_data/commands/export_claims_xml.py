@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Write the NHIA claim XML of a claim batch from a batch dump (claims.csv,
+diagnoses.csv and items.csv, written by `php artisan nhis:dump-claim-batch`;
+see nhis_data/claims_xml.py).
+The output is what NhisXmlExportService::writeXmlToStream() downloads for
+the same batch, so the two can be diffed.
+"""
+
+import argparse
+import os
+
+from nhis_data.claims_xml import CHUNK_CLAIMS, write_batch_xml
+from nhis_data.metrics import Metrics, add_arguments
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write the NHIA claim XML of a claim batch dump.')
+    parser.add_argument('dump', help='directory with the claims.csv, diagnoses.csv and items.csv of one batch')
+    parser.add_argument('--output', help='XML file to write (default: <dump>/claims.xml)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='render claims in this many processes; 0 = one per CPU (default: 1, no pool)')
+    parser.add_argument('--chunk-claims', type=int, default=CHUNK_CLAIMS, help='claims per pool task')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics.from_args(__file__, args)
+
+    if not os.path.exists(os.path.join(args.dump, 'claims.csv')):
+        parser.error(f'{args.dump} has no claims.csv')
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    output = args.output or os.path.join(args.dump, 'claims.xml')
+
+    with metrics.phase('export'):
+        count = write_batch_xml(args.dump, output, jobs, args.chunk_claims, metrics)
+    metrics.count('read', count)
+
+    print(f'Created {output} with {count} claims')
+    metrics.finish(output)
+
+
+if __name__ == '__main__':
+    main()
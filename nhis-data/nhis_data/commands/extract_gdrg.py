@@ -0,0 +1,139 @@
+import argparse
+import os
+
+from nhis_data.cache import ContentCache
+from nhis_data.formats import FORMATS, add_format_argument, format_of, open_table, output_path
+from nhis_data.gdrg import COLUMN_TYPES, FIELDNAMES, PARSER_VERSION, iter_cell_rows, iter_tariffs, iter_xml_cell_rows
+from nhis_data.manifest import changed_codes, read_rows, write_manifest
+from nhis_data.metrics import Metrics, add_arguments
+from nhis_data.paths import DATA_DIR, GDRG_DOCX, GDRG_TARIFFS_CSV
+from nhis_data.tariff_books import BATCH_COLUMN_TYPES, BATCH_FIELDNAMES, book_info, consolidate, extract_books, find_books
+from nhis_data.tariff_table import TariffTable
+
+BATCH_CSV = os.path.join(DATA_DIR, 'gdrg_tariffs_by_tier.csv')
+
+
+def book_output(book, output_dir, fmt):
+    """<output dir>/<book stem>.tariffs.<ext>; next to the book without --output-dir."""
+    stem = os.path.splitext(os.path.basename(book))[0]
+    return os.path.join(output_dir or os.path.dirname(book), f'{stem}.tariffs{FORMATS[fmt or "csv"]}')
+
+
+def print_categories(records):
+    print('MDC Categories found:')
+    stats = TariffTable.from_records(records).category_stats()
+    for mdc in sorted(stats):
+        print(f"  - {mdc}: {stats[mdc]['count']} tariffs")
+
+
+def run_batch(args, metrics):
+    """Extract every book matched by --books in a process pool, tagged with tier and effective date."""
+    books = find_books(args.books)
+    if not books:
+        raise SystemExit(f'No tariff books match {args.books}')
+    print(f'Extracting {len(books)} tariff books')
+
+    with metrics.phase('extract'):
+        results = extract_books(books, args.jobs)
+    for book, records, seconds in results:
+        metrics.add_time('book extraction', seconds)
+        metrics.count('read', len(records))
+        tier, effective_date = book_info(book)
+        print(f'  {os.path.basename(book)}: {len(records)} tariffs, tier {tier!r}, '
+              f'effective {effective_date or "unknown"} ({seconds:.2f}s)')
+
+    if args.consolidate:
+        output = output_path(args.output or BATCH_CSV, args.format)
+        rows = consolidate(results)
+        metrics.count('emitted', len(rows))
+        with metrics.phase(f'{format_of(output)} write'), \
+                open_table(output, BATCH_FIELDNAMES, BATCH_COLUMN_TYPES) as writer:
+            writer.writerows(rows)
+        print(f'Created {output} with {len(rows)} tariffs keyed by (code, tier, effective_date)')
+    else:
+        rows = []
+        for book, records, _ in results:
+            output = book_output(book, args.output_dir, args.format)
+            previous = read_rows(output)
+            with metrics.phase(f'{format_of(output)} write'), \
+                    open_table(output, BATCH_FIELDNAMES, BATCH_COLUMN_TYPES) as writer:
+                writer.writerows(records)
+            changes = changed_codes(previous, records, 'code')
+            manifest = write_manifest(output, book, changes)
+            metrics.count('emitted', len(records))
+            rows.extend(records)
+            print(f'Created {output} with {len(records)} G-DRG tariffs')
+            print(f"  Changes: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+                  f"{len(changes['removed'])} removed (see {manifest})")
+        output = os.path.join(args.output_dir or DATA_DIR, 'gdrg_tariffs_by_book')
+
+    print('')
+    print_categories(rows)
+    metrics.finish(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract G-DRG tariffs from the NHIA tariff book.')
+    parser.add_argument('--docx', default=GDRG_DOCX)
+    parser.add_argument('--output',
+                        help='tariff file to write (default: gdrg_tariffs_import.csv; '
+                             'with --books --consolidate: gdrg_tariffs_by_tier.csv)')
+    parser.add_argument('--reader', choices=['xml', 'docx'], default='xml',
+                        help='xml: stream word/document.xml directly (default); '
+                             'docx: walk the tables with python-docx, caching rows per table')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='with --reader docx, read every table instead of reusing cached rows for unchanged tables')
+    batch = parser.add_argument_group('batch mode', 'extract several tariff books (facility tiers) at once')
+    batch.add_argument('--books', metavar='DIR_OR_GLOB',
+                       help='directory or glob of tariff books; rows are tagged with the tier and '
+                            'effective date from each file name')
+    batch.add_argument('--consolidate', action='store_true',
+                       help='write one table keyed by (code, tier, effective_date) to --output '
+                            'instead of one <book>.tariffs file per book')
+    batch.add_argument('--output-dir', help='directory for the per-book files (default: next to each book)')
+    batch.add_argument('-j', '--jobs', type=int, help='books to parse at once (default: one per CPU)')
+    add_format_argument(parser)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics.from_args(__file__, args)
+    if args.books:
+        return run_batch(args, metrics)
+    args.output = output_path(args.output or GDRG_TARIFFS_CSV, args.format)
+
+    # The XML reader is faster than a python-docx pass over cached tables, so it does not use the cache
+    cache = None if args.no_cache or args.reader == 'xml' else ContentCache(args.docx, PARSER_VERSION)
+    previous = read_rows(args.output)
+
+    # Collect all G-DRG data
+    if args.reader == 'xml':
+        cell_rows = iter_xml_cell_rows(args.docx)
+    else:
+        cell_rows = iter_cell_rows(args.docx, cache, metrics)
+    with metrics.phase('extract'):
+        gdrg_data = list(iter_tariffs(cell_rows, metrics))
+    metrics.count('emitted', len(gdrg_data))
+
+    # Write to CSV (or Parquet/Arrow)
+    with metrics.phase(f'{format_of(args.output)} write'), \
+            open_table(args.output, FIELDNAMES, COLUMN_TYPES) as writer:
+        writer.writerows(gdrg_data)
+
+    if cache is not None:
+        cache.save()
+        print(f'Tables parsed: {cache.misses}, reused from cache: {cache.hits}')
+
+    with metrics.phase('manifest'):
+        changes = changed_codes(previous, gdrg_data, 'code')
+        manifest = write_manifest(args.output, args.docx, changes, cache)
+
+    print(f'Created {args.output} with {len(gdrg_data)} G-DRG tariffs')
+    print(f"Changes: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+          f"{len(changes['removed'])} removed (see {manifest})")
+    print('')
+    print_categories(gdrg_data)
+
+    metrics.finish(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+
+from nhis_data.cache import ContentCache
+from nhis_data.formats import add_format_argument, format_of, open_table, output_path
+from nhis_data.manifest import changed_codes, read_rows, write_manifest
+from nhis_data.medicines import COLUMN_TYPES, ENGINES, FIELDNAMES, PARSER_VERSION, count_pages, iter_records
+from nhis_data.metrics import Metrics, add_arguments
+from nhis_data.paths import MEDICINES_PDF, NHIS_TARIFFS_CSV
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract NHIS medicines and prices from the Medicines List PDF.')
+    parser.add_argument('--pdf', default=MEDICINES_PDF)
+    parser.add_argument('--output', default=NHIS_TARIFFS_CSV)
+    parser.add_argument('--engine', choices=ENGINES, default='layout',
+                        help='layout: assign text to columns by position (default); '
+                             'text: the line heuristics over extract_text(), as older outputs were made')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='parse page ranges in this many processes; 0 = one per CPU (default: 1, no pool)')
+    parser.add_argument('--chunk-size', type=int, default=2, help='pages per pool task')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='parse every page instead of reusing cached results for unchanged pages')
+    add_format_argument(parser)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    args.output = output_path(args.output, args.format)
+    metrics = Metrics.from_args(__file__, args)
+
+    if args.workers < 1:
+        args.workers = os.cpu_count() or 1
+
+    print(f'PDF has {count_pages(args.pdf)} pages')
+
+    cache = None if args.no_cache else ContentCache(args.pdf, f'{PARSER_VERSION}/{args.engine}')
+    previous = read_rows(args.output)
+
+    # CSV rows are written as soon as their page has been parsed
+    medicines = []
+    write_phase = f'{format_of(args.output)} write'
+    with metrics.phase('extract'), open_table(args.output, FIELDNAMES, COLUMN_TYPES) as writer:
+        records = iter_records(args.pdf, workers=args.workers, chunk_size=args.chunk_size,
+                               cache=cache, metrics=metrics, engine=args.engine)
+        for med in records:
+            with metrics.phase(write_phase):
+                writer.writerow(med)
+            medicines.append(med)
+
+    metrics.count('emitted', len(medicines))
+    metrics.count('read', len(medicines) + sum(metrics.skipped.values()))
+
+    if cache is not None:
+        cache.save()
+        print(f'Pages parsed: {cache.misses}, reused from cache: {cache.hits}')
+
+    with metrics.phase('manifest'):
+        changes = changed_codes(previous, medicines, 'nhis_code')
+        manifest = write_manifest(args.output, args.pdf, changes, cache, engine=args.engine)
+
+    print(f'Extracted {len(medicines)} medicines')
+    print(f'Created {args.output}')
+    print(f"Changes: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+          f"{len(changes['removed'])} removed (see {manifest})")
+    print('')
+    print('Sample medicines:')
+    for med in medicines[:10]:
+        print(f"  {med['nhis_code']} | {med['name'][:50]} | GHS {med['price']}")
+
+    metrics.finish(args.output)
+
+
+if __name__ == '__main__':
+    main()
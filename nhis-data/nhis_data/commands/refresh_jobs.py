@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Background refresh jobs (see nhis_data/jobs.py).
+
+    serve                       run jobs as they are dropped into .jobs/inbox/
+                                (or sent to --socket) until stopped
+    submit [STAGE ...]          queue a refresh and return at once; prints the job id
+    status JOB                  the status of a job, as JSON
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import socket
+
+from nhis_data.jobs import INPUTS, JobRunner, drop_request, read_status
+from nhis_data.paths import JOBS_DIR
+
+
+def serve(args):
+    # Flushed, so a service log shows each job as it starts and ends
+    log = functools.partial(print, flush=True)
+    runner = JobRunner(args.jobs_dir, limit=args.limit, poll=args.poll, log=log)
+    where = f'{args.jobs_dir}/inbox' + (f' and {args.socket}' if args.socket else '')
+    log(f'Waiting for jobs in {where}, running up to {args.limit} stages at once')
+    try:
+        asyncio.run(runner.serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+def submit(args):
+    request = {'stages': args.stages, 'force': args.force}
+    if args.id:
+        request['id'] = args.id
+    for key, path in args.input or []:
+        request.setdefault('inputs', {})[key] = path
+
+    if args.socket:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(args.socket)
+            client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            reply = json.loads(client.makefile('r', encoding='utf-8').readline())
+        if reply.get('error'):
+            print(f"Rejected: {reply['error']}")
+            return 1
+        print(reply['id'])
+    else:
+        print(drop_request(request, args.jobs_dir))
+
+
+def status(args):
+    job = read_status(args.job, args.jobs_dir)
+    if job is None:
+        print(f'{args.job}: not picked up yet (or unknown)')
+        return 1
+    print(json.dumps(job, indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run nhis-data refreshes as background jobs.')
+    parser.add_argument('--jobs-dir', default=JOBS_DIR, help='job inbox, status and event files (default: .jobs)')
+    parser.add_argument('--socket', help='Unix socket the runner listens on, or submit sends to')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('serve', help='run jobs until stopped')
+    p.add_argument('--limit', type=int, default=2, help='stages to run at once (default: 2)')
+    p.add_argument('--poll', type=float, default=1.0, help='seconds between inbox scans')
+    p.set_defaults(run=serve)
+
+    p = commands.add_parser('submit', help='queue a refresh')
+    p.add_argument('stages', nargs='*', help='stages to bring up to date, with their dependencies (default: all)')
+    p.add_argument('--id', help='job id (default: a timestamp)')
+    p.add_argument('--force', action='store_true', help='run the stages even if their inputs are unchanged')
+    p.add_argument('--input', nargs=2, action='append', metavar=('NAME', 'PATH'),
+                   help=f'replace a source document first; NAME is one of {", ".join(INPUTS)}')
+    p.set_defaults(run=submit)
+
+    p = commands.add_parser('status', help='print the status of a job')
+    p.add_argument('job')
+    p.set_defaults(run=status)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
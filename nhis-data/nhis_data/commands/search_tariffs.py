@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Search index over the NHIS and G-DRG tariffs (tariff_search_index.json).
+
+    build                       index the tariff files
+                                (run by `python -m nhis_data` after each extraction)
+    query TEXT                  the best matches for a search, as the mapping
+                                screen would list them
+"""
+
+import argparse
+import json
+import time
+
+from nhis_data.formats import iter_table
+from nhis_data.manifest import tariff_engine
+from nhis_data.paths import GDRG_TARIFFS_CSV, NHIS_TARIFFS_CSV, SEARCH_INDEX_JSON
+from nhis_data.search_index import SearchIndex, build_index, write_index
+
+
+def build(args):
+    started = time.perf_counter()
+    index = build_index(iter_table(args.nhis), iter_table(args.gdrg), tariff_engine(args.nhis))
+    write_index(index, args.index)
+    print(f"Created {args.index} with {len(index['entries'])} tariffs, {len(index['terms'])} words and "
+          f"{len(index['grams'])} trigrams in {time.perf_counter() - started:.2f}s")
+
+
+def query(args):
+    index = SearchIndex.load(args.index)
+    started = time.perf_counter()
+    results = index.search(args.text, args.category, args.limit)
+    elapsed = time.perf_counter() - started
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for entry in results:
+        price = '' if entry['price'] is None else f"{entry['price']:.2f}"
+        print(f"{entry['score']:>7.2f}  {entry['code']:<11}{entry['category']:<11}{price:>9}  {entry['name']}")
+    print(f'{len(results)} matches in {elapsed * 1000:.2f} ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and query the tariff search index.')
+    parser.add_argument('--index', default=SEARCH_INDEX_JSON, help='index file (default: tariff_search_index.json)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('build', help='index the medicines and G-DRG tariff files')
+    p.add_argument('--nhis', default=NHIS_TARIFFS_CSV, help='medicines tariff file (CSV, Parquet or Arrow)')
+    p.add_argument('--gdrg', default=GDRG_TARIFFS_CSV, help='G-DRG tariff file (CSV, Parquet or Arrow)')
+    p.set_defaults(run=build)
+
+    p = commands.add_parser('query', help='search the index')
+    p.add_argument('text')
+    p.add_argument('--category', help='only this category (medicine, lab, procedure...)')
+    p.add_argument('--limit', type=int, default=20)
+    p.add_argument('--json', action='store_true', help='print the matches as JSON')
+    p.set_defaults(run=query)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Claim-price lookup service over the generated tariff files.
+
+Runs next to the app as a sidecar. It answers code -> price/category
+lookups from memory, so vetting a batch of claims is one request instead
+of one mapping query per item. The service speaks plain HTTP, either on a
+TCP port or on a Unix socket (--socket):
+
+    POST /lookup   {"codes": ["ACETAZTA1", "ASUR01A", ...]}
+    GET  /lookup?code=ACETAZTA1&code=ASUR01A
+        -> {"generation": 3, "tariffs": {"ACETAZTA1": {"code": ..., "name": ...,
+            "price": 0.88, "category": "medicine", "source": "nhis"},
+            "ASUR01A": {...}, "UNKNOWN": null}}
+    GET  /health   -> codes loaded, index generation, files, last reload error
+    POST /reload   -> rebuild now instead of waiting for the next check
+
+The index reloads on its own when the pipeline rewrites a tariff file.
+SIGHUP also forces a reload.
+
+    curl --unix-socket /run/hms/tariffs.sock -d '{"codes": ["ASUR01A"]}' http://localhost/lookup
+"""
+
+import argparse
+import json
+import os
+import signal
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from nhis_data.lookup import ReloadingIndex
+from nhis_data.paths import GDRG_TARIFFS_CSV, NHIS_TARIFFS_CSV
+
+MAX_BATCH = 5000
+MAX_BODY = 1 << 20
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    server_version = 'nhis-tariffs/1'
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def lookup(self, codes):
+        if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+            return self.send_json(400, {'error': 'codes must be a list of strings'})
+        if len(codes) > MAX_BATCH:
+            return self.send_json(413, {'error': f'at most {MAX_BATCH} codes per request'})
+        index = self.server.index.current()
+        self.send_json(200, {'generation': index.generation, 'tariffs': index.lookup(codes)})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/lookup':
+            return self.lookup(parse_qs(url.query).get('code', []))
+        if url.path == '/health':
+            index = self.server.index
+            index.current()
+            return self.send_json(200, index.status())
+        self.send_json(404, {'error': f'no route {url.path}'})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            # The body is not read, so it must not be parsed as the next keep-alive request
+            self.close_connection = True
+            return self.send_json(413, {'error': 'request body too large'})
+        body = self.rfile.read(length)
+
+        if path == '/reload':
+            reloaded = self.server.index.reload(force=True)
+            return self.send_json(200, dict(self.server.index.status(), reloaded=reloaded))
+        if path != '/lookup':
+            return self.send_json(404, {'error': f'no route {path}'})
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return self.send_json(400, {'error': 'body is not JSON'})
+        self.lookup(payload.get('codes') if isinstance(payload, dict) else payload)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(index, host='127.0.0.1', port=8765, socket_path=None, quiet=False):
+    """An HTTP server answering from a ReloadingIndex, on a TCP port or a Unix socket."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, LookupHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), LookupHandler)
+    server.index = index
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve claim-price lookups from the generated tariff files.')
+    parser.add_argument('--nhis', default=NHIS_TARIFFS_CSV,
+                        help='medicines tariff file (CSV, Parquet or Arrow; default: nhis_tariffs_import.csv)')
+    parser.add_argument('--gdrg', default=GDRG_TARIFFS_CSV,
+                        help='G-DRG tariff file (CSV, Parquet or Arrow; default: gdrg_tariffs_import.csv)')
+    parser.add_argument('--socket', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port (default: 8765)')
+    parser.add_argument('--reload-interval', type=float, default=2.0,
+                        help='seconds between checks for new tariff files (default: 2)')
+    parser.add_argument('--quiet', action='store_true', help='do not log each request')
+    args = parser.parse_args(argv)
+
+    index = ReloadingIndex([('nhis', args.nhis), ('gdrg', args.gdrg)], interval=args.reload_interval)
+    for path, count in index.index.files.items():
+        print(f'Loaded {count} codes from {path}')
+    if not index.index.files:
+        parser.error('none of the tariff files exist')
+
+    server = make_server(index, args.host, args.port, args.socket, args.quiet)
+    signal.signal(signal.SIGHUP, lambda *_: index.reload(force=True))
+    where = args.socket or f'http://{args.host}:{server.server_address[1]}'
+    print(f'Serving {len(index.index)} tariff codes on {where}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
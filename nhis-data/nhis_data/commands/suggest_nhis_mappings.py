@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Suggest NHIS codes for catalogue items that have no NHIS mapping yet.
+
+Input is the "unmapped items" export from the NHIS mappings page (saved as
+CSV, or the .xlsx itself if openpyxl is installed): item_type, item_code,
+item_name. Each item is matched by name against the converter outputs for
+its type (drugs and consumables against the NHIS medicines, lab services
+and procedures against the G-DRG tariffs) and the top-k candidates are
+written with their scores.
+
+With --mapping, the best candidate of every drug and consumable scoring
+at least --min-score is also written as item_type,item_code,nhis_code for
+the NHIS mappings import. That import resolves the code against the NHIS
+medicines tariffs only, so lab services and procedures, whose candidates
+are G-DRG codes, are left out of it; map them from the candidates CSV.
+"""
+
+import argparse
+import csv
+import os
+import time
+
+from nhis_data.mapping import NameIndex
+from nhis_data.paths import DRUGS_CSV, LAB_SERVICES_CSV, PROCEDURES_CSV
+
+# item_type -> (import CSV with the normalized names, its code column)
+SOURCES = {
+    'drug': (DRUGS_CSV, 'nhis_code'),
+    'consumable': (DRUGS_CSV, 'nhis_code'),
+    'lab_service': (LAB_SERVICES_CSV, 'nhis_code'),
+    'procedure': (PROCEDURES_CSV, 'nhis_code'),
+}
+
+# Item types whose candidates are medicines codes, which the mapping import can resolve
+MAPPING_TYPES = {'drug', 'consumable'}
+
+CANDIDATE_FIELDNAMES = ['item_type', 'item_code', 'item_name', 'rank', 'nhis_code', 'nhis_name', 'score']
+
+
+def read_catalogue(path):
+    """Rows of the unmapped items export, from CSV or .xlsx."""
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(path, read_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(h).strip() for h in next(rows)]
+        return [
+            {h: '' if v is None else str(v) for h, v in zip(header, row)}
+            for row in rows if any(v is not None for v in row)
+        ]
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def load_index(path, code_field):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return NameIndex((row[code_field], row['name']) for row in csv.DictReader(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Suggest NHIS codes for unmapped catalogue items.')
+    parser.add_argument('catalogue', help='unmapped items export (item_type, item_code, item_name)')
+    parser.add_argument('--output', help='candidates CSV (default: <catalogue>.candidates.csv)')
+    parser.add_argument('--top-k', type=int, default=3, help='candidates per item (default: 3)')
+    parser.add_argument('--item-type', choices=sorted(SOURCES),
+                        help='item type for rows without an item_type column')
+    parser.add_argument('--mapping',
+                        help='also write the best candidate per drug and consumable as a mapping import CSV')
+    parser.add_argument('--min-score', type=float, default=0.6,
+                        help='lowest score written to --mapping (default: 0.6)')
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.catalogue)[0] + '.candidates.csv'
+    items = read_catalogue(args.catalogue)
+    print(f'Read {len(items)} catalogue items')
+
+    started = time.perf_counter()
+    indexes = {}
+    candidates = []
+    skipped = 0
+    for item in items:
+        item_type = item.get('item_type') or args.item_type
+        name = (item.get('item_name') or item.get('name') or '').strip()
+        if item_type not in SOURCES or not name:
+            skipped += 1
+            continue
+        if item_type not in indexes:
+            indexes[item_type] = load_index(*SOURCES[item_type])
+        matches = indexes[item_type].search(name, args.top_k)
+        candidates.append((item_type, item.get('item_code', ''), name, matches))
+    elapsed = time.perf_counter() - started
+
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CANDIDATE_FIELDNAMES)
+        writer.writeheader()
+        for item_type, item_code, name, matches in candidates:
+            for rank, (nhis_code, nhis_name, score) in enumerate(matches, 1):
+                writer.writerow({
+                    'item_type': item_type,
+                    'item_code': item_code,
+                    'item_name': name,
+                    'rank': rank,
+                    'nhis_code': nhis_code,
+                    'nhis_name': nhis_name,
+                    'score': f'{score:.4f}',
+                })
+
+    print(f'Matched {len(candidates)} items in {elapsed:.2f}s ({skipped} skipped: unknown item type or no name)')
+    print(f'Created {output}')
+
+    if args.mapping:
+        mapped = 0
+        gdrg = 0
+        with open(args.mapping, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['item_type', 'item_code', 'nhis_code'])
+            for item_type, item_code, name, matches in candidates:
+                if not matches or matches[0][2] < args.min_score:
+                    continue
+                if item_type not in MAPPING_TYPES:
+                    gdrg += 1
+                    continue
+                writer.writerow([item_type, item_code, matches[0][0]])
+                mapped += 1
+        print(f'Created {args.mapping} with {mapped} mappings scoring >= {args.min_score}')
+        if gdrg:
+            print(f'  {gdrg} lab services and procedures left out: their G-DRG codes are mapped on the mappings page')
+
+    print('')
+    print('Score breakdown (best candidate):')
+    bands = [(0.8, 'high (>= 0.8)'), (0.6, 'medium (0.6 - 0.8)'), (0.0, 'low (< 0.6)')]
+    counts = {label: 0 for _, label in bands}
+    for *_, matches in candidates:
+        best = matches[0][2] if matches else 0.0
+        counts[next(label for floor, label in bands if best >= floor)] += 1
+    for label, count in counts.items():
+        print(f'  {label}: {count}')
+
+
+if __name__ == '__main__':
+    main()
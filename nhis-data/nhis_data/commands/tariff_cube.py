@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Precompute the price cube of the tariffs for the pricing dashboard (see
+nhis_data/price_cube.py): counts, unmapped counts and price percentiles by
+category, form, MDC category, age category and procedure type.
+"""
+
+import argparse
+import os
+
+from nhis_data.formats import add_format_argument, iter_table, open_table, output_path
+from nhis_data.metrics import Metrics, add_arguments
+from nhis_data.paths import DRUGS_CSV, GDRG_TARIFFS_CSV, HOSPITAL_PRICES_CSV, NHIS_TARIFFS_CSV, PRICE_CUBE_CSV
+from nhis_data.price_cube import COLUMN_TYPES, FIELDNAMES, build_cube, read_prices, tariff_groups
+from nhis_data.tariff_table import TariffTable
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute the tariff price cube for the pricing dashboard.')
+    parser.add_argument('--nhis', default=NHIS_TARIFFS_CSV, help='medicines tariff file (CSV, Parquet or Arrow)')
+    parser.add_argument('--gdrg', default=GDRG_TARIFFS_CSV, help='G-DRG tariff file (CSV, Parquet or Arrow)')
+    parser.add_argument('--drugs', default=DRUGS_CSV, help='drugs import table, for the dosage forms')
+    parser.add_argument('--prices', default=HOSPITAL_PRICES_CSV,
+                        help='pricing dashboard export with the NHIS plan selected (default: hospital_prices.csv)')
+    parser.add_argument('--output', default=PRICE_CUBE_CSV)
+    add_format_argument(parser)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics.from_args(__file__, args)
+
+    output_file = output_path(args.output, args.format)
+    with metrics.phase('load'):
+        forms = {}
+        if os.path.exists(args.drugs):
+            forms = {row['nhis_code'].strip(): row.get('form', '') for row in iter_table(args.drugs)}
+        tariffs = tariff_groups(TariffTable.from_path(args.nhis, 'nhis'), TariffTable.from_path(args.gdrg), forms)
+        items = read_prices(args.prices)
+    metrics.count('read', len(tariffs) + len(items))
+
+    with metrics.phase('aggregate'):
+        rows = build_cube(tariffs, items)
+    with open_table(output_file, FIELDNAMES, COLUMN_TYPES) as writer:
+        writer.writerows(rows)
+    metrics.count('emitted', len(rows))
+
+    print(f'Created {output_file} with {len(rows)} groups of {len(tariffs)} tariffs and {len(items)} hospital items')
+    if not items:
+        print(f'No hospital prices in {args.prices}; only the tariff columns are filled')
+    metrics.finish(output_file)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
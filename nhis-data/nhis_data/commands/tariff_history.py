@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Effective-dated tariff history (tariff_history.sqlite).
+
+    record FILE ...             append extracted tariff files to the history
+                                (run by `python -m nhis_data` after each extraction)
+    price CODE DATE             the tariff of a code on a date
+    reprice CLAIMS              add the price in force on each row's date to a
+                                claims CSV (code and date columns), in one batch
+    log                         the snapshots recorded so far
+"""
+
+import argparse
+import csv
+import os
+import time
+
+from nhis_data.history import TariffHistory, parse_day
+from nhis_data.paths import TARIFF_HISTORY_DB
+
+
+def record(history, args):
+    for path in args.files:
+        results = history.record_file(path, args.valid_from)
+        if not results:
+            print(f'{path}: already recorded')
+        for tier, valid_from, counts in results:
+            label = f' tier {tier!r}' if tier else ''
+            print(f"{path}{label} from {valid_from}: {counts['rows']} tariffs, {counts['added']} added, "
+                  f"{counts['changed']} changed, {counts['retired']} retired")
+
+
+def price(history, args):
+    tariff = history.tariff_at(args.code, args.date, args.tier)
+    if tariff is None:
+        print(f'{args.code}: no tariff in force on {args.date}')
+        return 1
+    valid_to = tariff['valid_to'] or 'now'
+    print(f"{tariff['code']} {tariff['name']} ({tariff['category']}): {tariff['price']} "
+          f"[{tariff['valid_from']} to {valid_to}, {tariff['source']}]")
+
+
+def reprice(history, args):
+    with open(args.claims, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        rows = list(reader)
+    missing = {args.code_column, args.date_column} - set(fieldnames)
+    if missing:
+        raise SystemExit(f'{args.claims} has no {", ".join(sorted(missing))} column')
+
+    started = time.perf_counter()
+    prices = history.prices_at([(row[args.code_column], row[args.date_column]) for row in rows], args.tier)
+    elapsed = time.perf_counter() - started
+
+    output = args.output or os.path.splitext(args.claims)[0] + '.repriced.csv'
+    if args.price_column not in fieldnames:
+        fieldnames.append(args.price_column)
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for row, value in zip(rows, prices):
+            row[args.price_column] = '' if value is None else f'{value:.2f}'
+            writer.writerow(row)
+
+    unpriced = sum(1 for value in prices if value is None)
+    undated = sum(1 for row in rows if parse_day(row[args.date_column]) is None)
+    print(f'Repriced {len(rows)} rows in {elapsed:.2f}s ({unpriced} without a tariff on their date, '
+          f'{undated} of them without a readable date)')
+    print(f'Created {output}')
+
+
+def log(history, args):
+    print(f'{"source":<8}{"tier":<30}{"valid from":<12}{"rows":>7}{"added":>7}{"changed":>9}{"retired":>9}  file')
+    for source, tier, valid_from, file, rows, added, changed, retired in history.snapshots():
+        print(f'{source:<8}{tier or "-":<30}{valid_from:<12}{rows:>7}{added:>7}{changed:>9}{retired:>9}  {file or ""}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record and query the effective-dated tariff history.')
+    parser.add_argument('--db', default=TARIFF_HISTORY_DB, help='history database (default: tariff_history.sqlite)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('record', help='append extracted tariff files')
+    p.add_argument('files', nargs='+', help='gdrg/nhis tariff files (CSV, Parquet or Arrow)')
+    p.add_argument('--valid-from', help='date the tariffs took effect (default: from the tariff book name, '
+                                        'else the date in the changes manifest, else today)')
+    p.set_defaults(run=record)
+
+    p = commands.add_parser('price', help='the tariff of a code on a date')
+    p.add_argument('code')
+    p.add_argument('date', help='YYYY-MM-DD')
+    p.add_argument('--tier', default='', help='facility tier of batch-extracted books; untiered tariffs (medicines) are found too')
+    p.set_defaults(run=price)
+
+    p = commands.add_parser('reprice', help='price every row of a claims CSV as of its own date')
+    p.add_argument('claims')
+    p.add_argument('--output', help='CSV to write (default: <claims>.repriced.csv)')
+    p.add_argument('--code-column', default='nhis_code')
+    p.add_argument('--date-column', default='item_date')
+    p.add_argument('--price-column', default='tariff_price')
+    p.add_argument('--tier', default='', help='facility tier of batch-extracted books; untiered tariffs (medicines) are found too')
+    p.set_defaults(run=reprice)
+
+    p = commands.add_parser('log', help='list the recorded snapshots')
+    p.set_defaults(run=log)
+
+    args = parser.parse_args(argv)
+    with TariffHistory(args.db) as history:
+        return args.run(history, args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Check a claim batch dump against the generated tariff tables before it is
+submitted (see nhis_data/claim_validation.py). Each problem is a row of
+the report CSV; the command exits with status 1 if any claim has an
+error, so it can gate the export.
+"""
+
+import argparse
+import os
+
+from nhis_data.claim_validation import CHILD_AGE_LIMIT, CHUNK_CLAIMS, ClaimTables, validate_batch
+from nhis_data.metrics import Metrics, add_arguments
+from nhis_data.paths import DRUGS_CSV, GDRG_TARIFFS_CSV, LAB_SERVICES_CSV, NHIS_TARIFFS_CSV, PROCEDURES_CSV
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check a claim batch dump against the NHIS and G-DRG tariffs.')
+    parser.add_argument('dump', help='directory with the claims.csv, diagnoses.csv and items.csv of one batch')
+    parser.add_argument('--output', help='report CSV to write (default: <dump>/validation_report.csv)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='check claims in this many processes; 0 = one per CPU (default: 1, no pool)')
+    parser.add_argument('--chunk-claims', type=int, default=CHUNK_CLAIMS, help='claims per pool task')
+    parser.add_argument('--child-age', type=int, default=CHILD_AGE_LIMIT,
+                        help=f'patients younger than this are children for the A/C G-DRGs (default: {CHILD_AGE_LIMIT})')
+    parser.add_argument('--nhis', default=NHIS_TARIFFS_CSV, help='medicines tariff file')
+    parser.add_argument('--gdrg', default=GDRG_TARIFFS_CSV, help='G-DRG tariff file')
+    parser.add_argument('--lab', default=LAB_SERVICES_CSV, help='lab services import table')
+    parser.add_argument('--procedures', default=PROCEDURES_CSV, help='procedures import table')
+    parser.add_argument('--drugs', default=DRUGS_CSV, help='drugs import table')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics.from_args(__file__, args)
+
+    if not os.path.exists(os.path.join(args.dump, 'claims.csv')):
+        parser.error(f'{args.dump} has no claims.csv')
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    output = args.output or os.path.join(args.dump, 'validation_report.csv')
+
+    with metrics.phase('load'):
+        tables = ClaimTables(args.nhis, args.gdrg, args.lab, args.procedures, args.drugs)
+    with metrics.phase('validate'):
+        summary = validate_batch(args.dump, output, tables, jobs, args.chunk_claims, args.child_age, metrics)
+    metrics.count('read', summary['claims'])
+
+    print(f"Checked {summary['claims']} claims: {summary['with_errors']} with errors, "
+          f"{summary['with_warnings']} with warnings")
+    for check, count in summary['checks'].most_common():
+        print(f'  {check}: {count}')
+    print(f'Report: {output}')
+    metrics.finish(output)
+    return 1 if summary['with_errors'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
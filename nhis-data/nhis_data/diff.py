@@ -0,0 +1,145 @@
+"""
+Differences between two generations of an extracted tariff CSV.
+
+Works on both nhis_tariffs_import.csv (keyed by nhis_code, priced in
+'price') and gdrg_tariffs_import.csv (keyed by code, priced in
+'tariff_price'). A code counts as changed when any of its fields differ.
+Where a file lists a code more than once, the first row wins, as it does
+in the procedure converter.
+"""
+
+import csv
+import os
+
+DIFF_FIELDNAMES = ['code', 'change', 'name', 'old_price', 'new_price']
+
+# (key column, price column) per tariff file layout
+LAYOUTS = [
+    ('nhis_code', 'price'),
+    ('code', 'tariff_price'),
+]
+
+
+def detect_layout(fieldnames):
+    for key, price in LAYOUTS:
+        if key in fieldnames and price in fieldnames:
+            return key, price
+    raise ValueError(f'Not a tariff CSV (columns: {", ".join(fieldnames)})')
+
+
+def index_rows(rows, key):
+    index = {}
+    for row in rows:
+        index.setdefault(row[key], row)
+    return index
+
+
+def diff_tariffs(old_rows, new_rows, key, price_field):
+    """Return diff entries for added, changed and retired codes, in code order."""
+    old = index_rows(old_rows, key)
+    new = index_rows(new_rows, key)
+
+    entries = []
+    for code in sorted(old.keys() | new.keys()):
+        before = old.get(code)
+        after = new.get(code)
+        if before is None:
+            change = 'added'
+        elif after is None:
+            change = 'retired'
+        elif before != after:
+            change = 'changed'
+        else:
+            continue
+        entries.append({
+            'code': code,
+            'change': change,
+            'name': (after or before)['name'],
+            'old_price': before[price_field] if before else '',
+            'new_price': after[price_field] if after else '',
+        })
+    return entries
+
+
+def changed_codes(entries):
+    """Codes that need (re-)importing: everything added or changed."""
+    return {e['code'] for e in entries if e['change'] != 'retired'}
+
+
+class DeltaFilter:
+    """
+    delta_rows() for a converter that streams its input. The previous
+    tariff file is indexed up front, then select() passes on the rows of
+    added and changed codes chunk by chunk, and entries() adds the codes
+    the stream never showed as retired. Only the previous file's index and
+    the set of codes seen so far are kept in memory.
+    """
+
+    def __init__(self, previous_rows, key, price_field, include=None):
+        self.key = key
+        self.price_field = price_field
+        self.include = include
+        self.old = index_rows((r for r in previous_rows if include is None or include(r)), key)
+        self.seen = {}  # code -> diff entry, or None when unchanged
+        self.changes = []
+
+    def select(self, rows):
+        """The rows to convert: those whose code was added or changed (first row of a code decides)."""
+        selected = []
+        for row in rows:
+            if self.include is not None and not self.include(row):
+                continue
+            code = row[self.key]
+            if code not in self.seen:
+                before = self.old.get(code)
+                entry = None
+                if before is None or before != row:
+                    entry = {
+                        'code': code,
+                        'change': 'added' if before is None else 'changed',
+                        'name': row['name'],
+                        'old_price': before[self.price_field] if before else '',
+                        'new_price': row[self.price_field],
+                    }
+                    self.changes.append(entry)
+                self.seen[code] = entry
+            if self.seen[code] is not None:
+                selected.append(row)
+        return selected
+
+    def entries(self):
+        """Diff entries in code order, as diff_tariffs() returns them."""
+        retired = [
+            {'code': code, 'change': 'retired', 'name': row['name'], 'old_price': row[self.price_field], 'new_price': ''}
+            for code, row in self.old.items() if code not in self.seen
+        ]
+        return sorted(self.changes + retired, key=lambda entry: entry['code'])
+
+
+def delta_rows(previous_rows, rows, key, price_field, include=None):
+    """
+    Restrict a converter's input rows to the codes that changed since the
+    previous tariff file. Returns (rows to convert, diff entries); `include`
+    limits both files to the rows the converter handles.
+    """
+    delta = DeltaFilter(previous_rows, key, price_field, include)
+    return delta.select(rows), delta.entries()
+
+
+def diff_path(output_path, suffix):
+    stem, ext = os.path.splitext(output_path)
+    return f'{stem}.{suffix}{ext}'
+
+
+def write_diff(path, entries):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=DIFF_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(entries)
+
+
+def summarize(entries):
+    counts = {'added': 0, 'changed': 0, 'retired': 0}
+    for entry in entries:
+        counts[entry['change']] += 1
+    return counts
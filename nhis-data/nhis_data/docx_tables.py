@@ -0,0 +1,124 @@
+"""
+Stream the rows of the top-level tables of a .docx without python-docx.
+
+python-docx builds a proxy object per row and per cell and recomputes the
+merged-cell grid on every row.cells access. This reader opens the zip,
+streams word/document.xml with lxml.iterparse, turns each top-level table
+row into a list of cell texts as soon as the row is complete, and then
+drops the row (and whatever preceded it in the body), so memory stays flat
+however large the tariff book is.
+
+Cell texts follow python-docx exactly, so callers see the same values as
+[cell.text for cell in row.cells]:
+
+  * a cell spanning several grid columns (w:gridSpan) is repeated once per
+    column, and a vertically merged continuation cell (w:vMerge) repeats
+    the cell above it
+  * a cell's text is its paragraphs joined with newlines; a paragraph's
+    text is its runs (including those inside hyperlinks), where w:tab and
+    w:ptab become tabs, w:br (text wrapping) and w:cr newlines, and
+    w:noBreakHyphen a dash
+  * tables nested inside cells are not part of the cell text and are not
+    returned as rows
+"""
+
+import zipfile
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOCUMENT_XML = 'word/document.xml'
+
+_RUN_TEXT = {
+    W + 'tab': '\t',
+    W + 'ptab': '\t',
+    W + 'cr': '\n',
+    W + 'noBreakHyphen': '-',
+}
+
+
+def run_text(r):
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W + 't':
+            parts.append(child.text or '')
+        elif tag == W + 'br':
+            if child.get(W + 'type', 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        elif tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[tag])
+    return ''.join(parts)
+
+
+def paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == W + 'r':
+            parts.append(run_text(child))
+        elif child.tag == W + 'hyperlink':
+            parts.extend(run_text(r) for r in child.iterchildren(W + 'r'))
+    return ''.join(parts)
+
+
+def cell_text(tc):
+    return '\n'.join(paragraph_text(p) for p in tc.iterchildren(W + 'p'))
+
+
+def _int_val(parent, path, default):
+    el = parent.find(path)
+    if el is None:
+        return default
+    return int(el.get(W + 'val', default))
+
+
+def row_cells(tr, above):
+    """
+    Cell texts of a w:tr, and its {grid offset: (text, span)} for the row below.
+
+    `above` is the previous row's map, used to resolve vMerge continuations.
+    """
+    cells = []
+    grid = {}
+    offset = _int_val(tr, f'{W}trPr/{W}gridBefore', 0)
+    for tc in tr.iterchildren(W + 'tc'):
+        span = _int_val(tc, f'{W}tcPr/{W}gridSpan', 1)
+        vmerge = tc.find(f'{W}tcPr/{W}vMerge')
+        if vmerge is not None and vmerge.get(W + 'val', 'continue') == 'continue':
+            # A continuation repeats the cell above it, as many times as that cell spans
+            text, above_span = above.get(offset, ('', span))
+            cells.extend([text] * above_span)
+            grid[offset] = (text, above_span)
+        else:
+            text = cell_text(tc)
+            cells.extend([text] * span)
+            grid[offset] = (text, span)
+        offset += span
+    return cells, grid
+
+
+def iter_table_rows(docx_path):
+    """Yield [cell text, ...] for every row of every top-level table, in document order."""
+    from lxml import etree
+
+    with zipfile.ZipFile(docx_path) as z, z.open(DOCUMENT_XML) as xml:
+        above = {}
+        for _, el in etree.iterparse(xml, events=('end',), tag=(W + 'tr', W + 'tbl')):
+            parent = el.getparent()
+            if el.tag == W + 'tbl':
+                if parent.tag == W + 'body':
+                    above = {}
+                    el.clear()
+                    # Drop the body paragraphs and tables already read
+                    while el.getprevious() is not None:
+                        del parent[0]
+                continue
+
+            if parent.getparent().tag != W + 'body':
+                continue  # a row of a table nested in a cell
+
+            cells, above = row_cells(el, above)
+            yield cells
+            # Keep the row element itself so the next row's position is unchanged,
+            # but free its content and everything before it in the table
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
@@ -0,0 +1,141 @@
+"""
+Batch feature extraction for drug names.
+
+drug_features() takes a whole column of names and returns form, unit_type,
+strength, bottle_size, generic_name and category as columns. The patterns
+are compiled once, each distinct name is processed once (formularies repeat
+names across pack sizes and facilities), and each pattern is applied to
+the whole column in one comprehension rather than interleaved per row.
+memoized_features() gives the same columns through a ClassificationMemo,
+so names classified by an earlier run (or chunk) are not processed again.
+"""
+
+import re
+
+from nhis_data.memo import rules_version
+from nhis_data.rules import DRUG_CATEGORY_RULES, DRUG_ENGINE, DRUG_FORM_RULES
+
+# Pack size like "(24's)", "(6's)", "(12 tabs)"; handles ' ` and the Unicode right single quote
+PACK_RE = re.compile(r"(\(\d+['`\u2019]?s?\)|\(\d+\s*tabs?\))", re.IGNORECASE)
+STRENGTH_CONTINUATION_RE = re.compile(r'^(mg[^(]*)')
+
+# Concentration like "100 mg/5 mL" or "200 mg/mL"
+STRENGTH_RE = re.compile(r'(\d+\.?\d*\s*(mg|g|mcg|iu|%|microgram)[/\d\s]*(ml|g)?)', re.IGNORECASE)
+# Container volume: a standalone number + mL at the end of the name, after the concentration
+BOTTLE_RE = re.compile(r'(?:^|[,\s])(\d+\.?\d*)\s*ml\s*$', re.IGNORECASE)
+GENERIC_SUFFIX_RE = re.compile(r'\s*(Tablet|Capsule|Injection|Syrup|Suspension|Cream|Ointment|Drops|Inhaler).*', re.IGNORECASE)
+
+# unit_type by form (affects prescription quantity calculations); anything else is 'piece'
+UNIT_TYPES = {
+    'syrup': 'bottle',
+    'suspension': 'bottle',
+    'injection': 'vial',
+    'cream': 'tube',
+    'ointment': 'tube',
+    'drops': 'bottle',
+    'inhaler': 'piece',  # inhalers are dispensed as units
+    'patch': 'box',
+}
+
+FEATURES = ['form', 'unit_type', 'strength', 'bottle_size', 'generic_name', 'category']
+
+DRUG_RULES_VERSION = rules_version(
+    DRUG_FORM_RULES, DRUG_CATEGORY_RULES, UNIT_TYPES, FEATURES, STRENGTH_RE, BOTTLE_RE, GENERIC_SUFFIX_RE)
+
+
+def repair_name(name, unit):
+    """
+    Join a name that the PDF extraction split across the 'name' and 'unit' columns.
+
+    e.g. name="Artemether + Lumefantrine Tablet, 20 mg + 120" unit="mg (24's) 1 Course"
+    becomes "Artemether + Lumefantrine Tablet, 20 mg + 120 mg (24's)".
+    """
+    name = name.strip()
+    unit = unit.strip()
+    if not unit:
+        return name
+
+    pack_match = PACK_RE.search(unit)
+    if pack_match:
+        # Normalize apostrophe to standard single quote
+        pack_size = pack_match.group(1).replace('\u2019', "'").replace('`', "'")
+        # Name was cut off mid-strength if the unit starts with its continuation
+        if unit.startswith('mg'):
+            strength_continuation = STRENGTH_CONTINUATION_RE.match(unit)
+            if strength_continuation:
+                name = name + ' ' + strength_continuation.group(1).strip()
+        if pack_size not in name:
+            name = name + ' ' + pack_size
+    return name
+
+
+def _strength(match):
+    return match.group(1).strip() if match else ''
+
+
+def _bottle_size(match):
+    return int(float(match.group(1))) if match else None
+
+
+def drug_features(names, units=None):
+    """
+    Return {feature: list} for a column of (already repaired) drug names.
+
+    With units (the unit column of the layout engine's output), the pack
+    volume is read from the unit ("100 mL") before the name, and a name
+    with no recognisable form is classified again together with its unit
+    ("Fluticasone MDI" + "Inhaler").
+    """
+    if units is not None:
+        return _unit_features(names, units)
+    unique = list(dict.fromkeys(names))
+
+    labels = [DRUG_ENGINE.classify(name) for name in unique]
+    forms = [l['form'] for l in labels]
+    columns = {
+        'form': forms,
+        'unit_type': [UNIT_TYPES.get(form, 'piece') for form in forms],
+        'strength': [_strength(m) for m in map(STRENGTH_RE.search, unique)],
+        'bottle_size': [_bottle_size(m) for m in map(BOTTLE_RE.search, unique)],
+        'generic_name': [GENERIC_SUFFIX_RE.sub('', n.split()[0]) if n else '' for n in unique],
+        'category': [l['category'] for l in labels],
+    }
+    return _expand(columns, unique, names)
+
+
+def _unit_features(names, units):
+    pairs = list(dict.fromkeys(zip(names, units)))
+    columns = drug_features([name for name, _ in pairs])
+    for i, (name, unit) in enumerate(pairs):
+        if columns['form'][i] == 'other' and unit:
+            labels = DRUG_ENGINE.classify(f'{name}  {unit}')
+            columns['form'][i] = labels['form']
+            columns['unit_type'][i] = UNIT_TYPES.get(labels['form'], 'piece')
+        bottle = BOTTLE_RE.search(unit)
+        if bottle:
+            columns['bottle_size'][i] = _bottle_size(bottle)
+    return _expand(columns, pairs, list(zip(names, units)))
+
+
+def _expand(columns, unique, keys):
+    """Columns of the distinct keys repeated to the rows of keys."""
+    if len(unique) == len(keys):
+        return columns
+    position = {key: i for i, key in enumerate(unique)}
+    rows = [position[key] for key in keys]
+    return {feature: [values[i] for i in rows] for feature, values in columns.items()}
+
+
+def memoized_features(memo, names, units=None):
+    """drug_features() for a column of names, classifying only the names (and units) memo does not hold."""
+    keys = names if units is None else [f'{name}\0{unit}' for name, unit in zip(names, units)]
+
+    def compute(missing):
+        if units is None:
+            columns = drug_features(missing)
+        else:
+            columns = drug_features(*zip(*(key.split('\0', 1) for key in missing)))
+        return [[columns[feature][i] for feature in FEATURES] for i in range(len(missing))]
+
+    rows = memo.map(keys, compute)
+    return {feature: [row[j] for row in rows] for j, feature in enumerate(FEATURES)}
@@ -0,0 +1,291 @@
+"""
+CSV, Parquet and Arrow IPC files for the tariff artifacts.
+
+CSV stays the default because the PHP importers read it. With --format
+parquet or arrow a script writes the same rows with real column types,
+so chained stages and analytics jobs can memory-map the file instead of
+re-parsing text:
+
+  * decimal   decimal128(12, 2); blank -> null
+  * int       int32; blank or 0 -> null (e.g. bottle_size)
+  * count     int32; blank -> null, 0 stays 0 (e.g. the price cube's counts)
+  * category  dictionary<int32, string> (mdc_category, form, ...)
+  * string    everything else, kept as written ('' stays '')
+
+A script's COLUMN_TYPES maps its columns to these kinds; unlisted columns
+are strings. Typed files are written and read in record batches of
+BATCH_ROWS rows, so a converter streaming millions of rows through
+open_table() and iter_table() holds one batch at a time. Arrow IPC files
+allow only one dictionary per column. The writer therefore keeps every
+category column's dictionary stable and only appends new values to it,
+as dictionary deltas. Reading a typed file back with read_table() gives the rows
+as the CSV would have them. Decimals are rendered as their source wrote
+them: G-DRG prices with two places ('961.80'), but 'decimal_trimmed'
+columns without trailing zeros, because the Medicines List prints
+'17.1' and '106'. Without that, comparing a typed file with an earlier
+CSV would report every price as changed.
+
+pyarrow is only imported when a typed format is used.
+"""
+
+import csv
+import os
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+
+FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+EXTENSIONS = {'.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+DECIMAL_PRECISION = 12
+DECIMAL_SCALE = 2
+CENT = Decimal(1).scaleb(-DECIMAL_SCALE)
+
+BATCH_ROWS = 4096
+
+
+def add_format_argument(parser):
+    parser.add_argument('--format', choices=sorted(FORMATS),
+                        help='output format; csv is what the PHP importers read '
+                             '(default: from the --output extension, else csv)')
+
+
+def format_of(path):
+    """Format of a file from its extension; anything unknown is CSV."""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+def output_path(path, fmt=None):
+    """The path with the extension of a format, e.g. x.csv -> x.parquet."""
+    if fmt is None or format_of(path) == fmt:
+        return path
+    return os.path.splitext(path)[0] + FORMATS[fmt]
+
+
+def arrow_schema(fieldnames, column_types):
+    import pyarrow as pa
+
+    types = {
+        'string': pa.string(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'decimal': pa.decimal128(DECIMAL_PRECISION, DECIMAL_SCALE),
+        'decimal_trimmed': pa.decimal128(DECIMAL_PRECISION, DECIMAL_SCALE),
+        'int': pa.int32(),
+        'count': pa.int32(),
+    }
+    fields = []
+    for name in fieldnames:
+        kind = column_types.get(name, 'string')
+        fields.append(pa.field(name, types[kind], metadata={'kind': kind}))
+    return pa.schema(fields)
+
+
+def typed_value(value, kind):
+    """A CSV cell as the Python value of its column kind."""
+    if kind in ('string', 'category'):
+        return '' if value is None else str(value)
+    text = '' if value is None else str(value).strip()
+    if not text:
+        return None
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f'{text!r} is not a number') from None
+    if kind == 'int':
+        return int(number) or None
+    if kind == 'count':
+        return int(number)
+    return number.quantize(CENT)
+
+
+def text_value(value, kind):
+    """A typed value back as the CSV cell it came from."""
+    if value is None:
+        return ''
+    if kind == 'decimal':
+        return f'{value:.{DECIMAL_SCALE}f}'
+    if kind == 'decimal_trimmed':
+        text = f'{value:f}'
+        return text.rstrip('0').rstrip('.') if '.' in text else text
+    return str(value)
+
+
+class BatchWriter:
+    """
+    Writes rows to a Parquet or Arrow file in record batches of batch_rows.
+    Category columns are encoded against a dictionary that only grows.
+    """
+
+    def __init__(self, path, fmt, fieldnames, column_types, batch_rows=BATCH_ROWS):
+        import pyarrow as pa
+
+        self.schema = arrow_schema(fieldnames, column_types)
+        self.kinds = [(field, column_types.get(field.name, 'string')) for field in self.schema]
+        self.dictionaries = {field.name: {} for field, kind in self.kinds if kind == 'category'}
+        self.batch_rows = batch_rows
+        self.rows = []
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+
+            self.sink = None
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self.sink = pa.OSFile(path, 'wb')
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self.writer = pa.ipc.new_file(self.sink, self.schema, options=options)
+
+    def writerow(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def _category(self, name, values):
+        import pyarrow as pa
+
+        dictionary = self.dictionaries[name]
+        indices = [None if v is None else dictionary.setdefault(v, len(dictionary)) for v in values]
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(list(dictionary), pa.string()))
+
+    def flush(self):
+        import pyarrow as pa
+
+        if not self.rows:
+            return
+        columns = []
+        for field, kind in self.kinds:
+            values = [typed_value(row.get(field.name), kind) for row in self.rows]
+            if kind == 'category':
+                columns.append(self._category(field.name, values))
+            else:
+                columns.append(pa.array(values, field.type))
+        self.writer.write_batch(pa.record_batch(columns, schema=self.schema))
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+
+
+@contextmanager
+def open_table(path, fieldnames, column_types=None):
+    """
+    Writer with writerow/writerows for a CSV, Parquet or Arrow file,
+    picked by the path's extension. CSV rows are written as they come;
+    typed files are written a batch at a time. Either way the rows go to a
+    temporary file, which replaces the path when the block exits without an
+    error, so a reader of the path never sees a half-written table.
+    """
+    fmt = format_of(path)
+    tmp = path + '.tmp'
+    if fmt == 'csv':
+        try:
+            with open(tmp, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                yield writer
+        except BaseException:
+            os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+        return
+
+    writer = BatchWriter(tmp, fmt, fieldnames, column_types or {})
+    try:
+        yield writer
+        writer.close()
+    except BaseException:
+        writer.writer.close()
+        os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+
+
+def read_arrow(path):
+    """A Parquet or Arrow file as an Arrow table, memory-mapped where the format allows it."""
+    import pyarrow as pa
+
+    if format_of(path) == 'parquet':
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True)
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def iter_batches(path, batch_rows=BATCH_ROWS):
+    """Record batches of a Parquet or Arrow file, one at a time."""
+    import pyarrow as pa
+
+    if format_of(path) == 'parquet':
+        import pyarrow.parquet as pq
+
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_rows)
+        return
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def column_kind(field):
+    metadata = field.metadata or {}
+    return metadata.get(b'kind', b'string').decode()
+
+
+def text_column(table, name):
+    """A column of a typed table (or record batch) as the CSV cells it came from."""
+    field = table.schema.field(name)
+    kind = column_kind(field)
+    values = table.column(name).to_pylist()
+    if kind in ('string', 'category'):
+        return ['' if v is None else v for v in values]
+    return [text_value(v, kind) for v in values]
+
+
+def iter_table(path):
+    """Rows of a CSV, Parquet or Arrow file as dicts of CSV text, read a batch at a time."""
+    if format_of(path) == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+        return
+
+    for batch in iter_batches(path):
+        fieldnames = batch.schema.names
+        columns = [text_column(batch, name) for name in fieldnames]
+        for values in zip(*columns):
+            yield dict(zip(fieldnames, values))
+
+
+def float_column(table, name):
+    """
+    A decimal column as floats equal to float() of its CSV text; nulls are 0.0.
+
+    Arrow's decimal -> double cast can be one ulp off (1475.61 becomes
+    1475.6100000000001), which would move prices across the rule
+    thresholds, so the exact number of cents is divided instead.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    column = pc.fill_null(table.column(name), 0)
+    cents = pc.cast(pc.multiply(column, 10 ** DECIMAL_SCALE), pa.int64())
+    return pc.divide(pc.cast(cents, pa.float64()), float(10 ** DECIMAL_SCALE)).to_pylist()
+
+
+def read_table(path):
+    """(fieldnames, rows) of a CSV, Parquet or Arrow file, rows as dicts of CSV text."""
+    if format_of(path) == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            return reader.fieldnames or [], rows
+
+    table = read_arrow(path)
+    fieldnames = table.column_names
+    columns = [text_column(table, name) for name in fieldnames]
+    return fieldnames, [dict(zip(fieldnames, values)) for values in zip(*columns)]
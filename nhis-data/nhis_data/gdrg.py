@@ -0,0 +1,123 @@
+"""
+Parse G-DRG tariff rows out of the NHIA tariff book (.docx) tables.
+
+Two readers produce the same (code, name, tariff) cell rows:
+iter_xml_cell_rows() streams word/document.xml directly (the default), and
+iter_cell_rows() walks the tables with python-docx, caching each table's
+rows by content hash.
+"""
+
+import re
+
+from nhis_data.docx_tables import iter_table_rows
+from nhis_data.metrics import timed
+
+FIELDNAMES = ['code', 'name', 'mdc_category', 'tariff_price', 'age_category']
+COLUMN_TYPES = {'mdc_category': 'category', 'tariff_price': 'decimal', 'age_category': 'category'}
+
+# Bump when table_cells() changes so cached table rows are discarded
+PARSER_VERSION = 1
+
+
+def table_key(table):
+    """Raw XML of a table, used as its content-hash cache key."""
+    from lxml import etree
+
+    return etree.tostring(table._tbl)
+
+
+def table_cells(table):
+    """The first three cell texts (code, name, tariff) of every row with at least three cells."""
+    rows = []
+    for row in table.rows:
+        cells = [cell.text.strip() for cell in row.cells]
+        if len(cells) >= 3:
+            rows.append(cells[:3])
+    return rows
+
+
+def iter_tariffs(cell_rows, metrics=None):
+    """
+    Turn (code, name, tariff) cell rows, in document order, into tariff records.
+
+    Header rows ('G-DRG' | <MDC category> | 'TARIFF') set the MDC category for
+    the rows that follow them, across table boundaries. With a Metrics, rows
+    read and the reason each skipped row was dropped are counted.
+    """
+    current_mdc = ''
+    for code, name, tariff in cell_rows:
+        if metrics is not None:
+            metrics.count('read')
+
+        # Check if this is a header row (contains MDC category)
+        if code == 'G-DRG' and 'TARIFF' in tariff:
+            current_mdc = name
+            if metrics is not None:
+                metrics.skip('MDC header row')
+            continue
+
+        # Skip empty or invalid rows
+        if not code or not name or not tariff:
+            if metrics is not None:
+                metrics.skip('empty cells')
+            continue
+
+        # Clean up tariff value (remove commas, currency symbols)
+        tariff_clean = re.sub(r'[^0-9.]', '', tariff.replace(',', ''))
+        if not tariff_clean or tariff_clean == '-':
+            if metrics is not None:
+                metrics.skip('non-numeric tariff')
+            continue
+
+        # Determine age category from code suffix
+        age_category = 'all'
+        if code.endswith('A'):
+            age_category = 'adult'
+        elif code.endswith('C'):
+            age_category = 'child'
+
+        yield {
+            'code': code,
+            'name': name,
+            'mdc_category': current_mdc,
+            'tariff_price': tariff_clean,
+            'age_category': age_category
+        }
+
+
+def iter_xml_cell_rows(docx_path):
+    """The same rows as table_cells() over every table, streamed from document.xml."""
+    for cells in iter_table_rows(docx_path):
+        if len(cells) >= 3:
+            yield [cell.strip() for cell in cells[:3]]
+
+
+def iter_cell_rows(docx_path, cache=None, metrics=None):
+    """
+    Yield the cell rows of every table via python-docx, reusing cached rows for unchanged tables.
+
+    With a Metrics, opening the document, hashing tables and python-docx cell
+    traversal are timed separately.
+    """
+    from docx import Document
+
+    with timed(metrics, 'docx open'):
+        doc = Document(docx_path)
+        tables = doc.tables
+    if metrics is not None:
+        metrics.count('tables', len(tables))
+
+    for table in tables:
+        if cache is None:
+            with timed(metrics, 'docx table traversal'):
+                rows = table_cells(table)
+            yield from rows
+            continue
+        with timed(metrics, 'table hashing'):
+            key = cache.key(table_key(table))
+        rows = cache.get(key)
+        if rows is None:
+            with timed(metrics, 'docx table traversal'):
+                rows = table_cells(table)
+            cache.put(key, rows)
+        yield from rows
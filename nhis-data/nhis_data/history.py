@@ -0,0 +1,291 @@
+"""
+Effective-dated history of every tariff extraction, in SQLite.
+
+Each extraction overwrites gdrg_tariffs_import.csv and
+nhis_tariffs_import.csv. The history keeps every generation instead, as
+validity intervals:
+
+    tariffs(source, tier, code, name, category, price_cents, valid_from, valid_to)
+
+The intervals are half-open, [valid_from, valid_to), with ISO dates, and
+valid_to is NULL while the tariff is current. An interval only opens when
+a code's name, category or price changes, so re-recording an unchanged
+tariff book adds nothing. A code missing from a newer snapshot has its
+interval closed (retired).
+
+A snapshot is the rows of one source ('nhis' medicines or 'gdrg') for one
+tier at one date. The single-book files have tier ''. A consolidated
+batch file (extract_gdrg.py --books --consolidate) holds one snapshot per
+(tier, effective_date), which is recorded in date order. Snapshots of a
+source and tier must be recorded in date order; backfilling an older one
+is refused instead of rewriting later intervals.
+
+price_at() is one indexed lookup on (code, tier, valid_from). prices_at()
+re-prices a whole batch of (code, date) pairs with a single join through
+a temporary table. As in NhisTariffService::getTariffForItem, a
+medicines code wins over a G-DRG code with the same name. A lookup for a
+tier also finds the untiered tariffs (the medicines, which are always
+recorded with tier '', and any single-book G-DRG file), and prefers the
+tier's own tariff where a code has both.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+from nhis_data.diff import detect_layout
+from nhis_data.formats import iter_table
+from nhis_data.manifest import manifest_path
+from nhis_data.tariff_books import book_info
+from nhis_data.tariff_table import LAYOUTS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    valid_from TEXT NOT NULL,
+    file TEXT,
+    sha256 TEXT,
+    recorded_at TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    retired INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tariffs (
+    source TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price_cents INTEGER,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT
+);
+CREATE INDEX IF NOT EXISTS tariffs_by_code ON tariffs (code, tier, valid_from);
+CREATE INDEX IF NOT EXISTS tariffs_current ON tariffs (source, tier, code) WHERE valid_to IS NULL;
+"""
+
+# Medicines before G-DRG when a code is in both
+PRECEDENCE = "CASE t.source WHEN 'nhis' THEN 0 ELSE 1 END"
+# The tier asked for wins over the untiered ('') tariffs; bound to the tier
+TIER_PRECEDENCE = 'CASE t.tier WHEN ? THEN 0 ELSE 1 END'
+
+
+def cents(price):
+    """Exact cents of a price cell, or None for a blank."""
+    price = (price or '').strip()
+    return int(Decimal(price).scaleb(2).to_integral_value()) if price else None
+
+
+def iso_date(value):
+    """A date, datetime or ISO string as 'YYYY-MM-DD'."""
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+
+def parse_day(value):
+    """iso_date() of a claim cell, or None for a blank or a date that is not ISO ('02/01/2024')."""
+    try:
+        return iso_date(value)
+    except ValueError:
+        return None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_valid_from(path):
+    """
+    When an extracted file took effect: the month in its source book's
+    name (from the changes manifest), else the day it was generated, else
+    today.
+    """
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return date.today().isoformat()
+    effective_date = book_info(manifest.get('source', ''))[1]
+    return effective_date or iso_date(manifest.get('generated_at') or date.today())
+
+
+class TariffHistory:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, source, rows, valid_from, tier='', file=None, sha256=None):
+        """
+        Record one snapshot of a source ('nhis' or 'gdrg', rows in that file's
+        layout) and tier, as of valid_from; return {'added', 'changed',
+        'retired', 'rows'}. The first row of a code wins.
+        """
+        valid_from = iso_date(valid_from)
+        key, price_field, category_field = LAYOUTS[source]
+        latest = self.latest(source, tier)
+        if latest is not None and valid_from < latest:
+            raise ValueError(f'{source} tier {tier!r}: a snapshot from {latest} is already recorded; '
+                             f'refusing to backfill {valid_from}')
+
+        current = {
+            code: (rowid, name, category, price)
+            for rowid, code, name, category, price in self.db.execute(
+                'SELECT rowid, code, name, category, price_cents FROM tariffs '
+                'WHERE source = ? AND tier = ? AND valid_to IS NULL', (source, tier))
+        }
+        seen = set()
+        inserts = []
+        closes = []
+        counts = {'added': 0, 'changed': 0, 'retired': 0, 'rows': 0}
+        for row in rows:
+            code = row[key].strip()
+            if not code or code in seen:
+                continue
+            seen.add(code)
+            counts['rows'] += 1
+            entry = (row.get('name', ''), row.get(category_field, ''), cents(row.get(price_field)))
+            before = current.get(code)
+            if before is not None and before[1:] == entry:
+                continue
+            if before is None:
+                counts['added'] += 1
+            else:
+                counts['changed'] += 1
+                closes.append(before[0])
+            inserts.append((source, tier, code) + entry + (valid_from,))
+        retired = [before[0] for code, before in current.items() if code not in seen]
+        counts['retired'] = len(retired)
+
+        with self.db:
+            closed = [(valid_from, rowid) for rowid in closes + retired]
+            self.db.executemany('UPDATE tariffs SET valid_to = ? WHERE rowid = ?', closed)
+            # A change on the day an interval opened replaces it rather than leaving it empty
+            self.db.executemany('DELETE FROM tariffs WHERE rowid = ? AND valid_from >= ?',
+                                [(rowid, day) for day, rowid in closed])
+            self.db.executemany(
+                'INSERT INTO tariffs (source, tier, code, name, category, price_cents, valid_from) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', inserts)
+            self.db.execute(
+                'INSERT INTO snapshots (source, tier, valid_from, file, sha256, recorded_at, rows, added, changed, retired) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (source, tier, valid_from, file, sha256, datetime.now().isoformat(timespec='seconds'),
+                 counts['rows'], counts['added'], counts['changed'], counts['retired']))
+        return counts
+
+    def latest(self, source, tier=''):
+        """valid_from of the newest snapshot of a source and tier, or None."""
+        return self.db.execute(
+            'SELECT MAX(valid_from) FROM snapshots WHERE source = ? AND tier = ?', (source, tier),
+        ).fetchone()[0]
+
+    def record_file(self, path, valid_from=None):
+        """
+        Record an extracted tariff file (CSV, Parquet or Arrow); return
+        [(tier, valid_from, counts), ...]. Rows with tier and effective_date
+        columns are recorded as one snapshot per (tier, effective_date);
+        snapshots of such a file that are already recorded and since
+        superseded are skipped. A file already recorded with the same content
+        is skipped altogether.
+        """
+        rows = list(iter_table(path))
+        fieldnames = list(rows[0]) if rows else []
+        layout = detect_layout(fieldnames)
+        source = next(name for name, (key, price_field, _) in LAYOUTS.items() if (key, price_field) == layout)
+        sha256 = file_sha256(path)
+        if self.db.execute('SELECT 1 FROM snapshots WHERE sha256 = ?', (sha256,)).fetchone():
+            return []
+
+        snapshots = {}
+        if 'tier' in fieldnames and 'effective_date' in fieldnames:
+            fallback = valid_from or default_valid_from(path)
+            for row in rows:
+                snapshots.setdefault((row['effective_date'] or fallback, row['tier']), []).append(row)
+        else:
+            snapshots[(valid_from or default_valid_from(path), '')] = rows
+
+        results = []
+        for (effective_date, tier), snapshot in sorted(snapshots.items()):
+            effective_date = iso_date(effective_date)
+            latest = self.latest(source, tier)
+            if latest is not None and effective_date < latest and self.db.execute(
+                'SELECT 1 FROM snapshots WHERE source = ? AND tier = ? AND valid_from = ?',
+                (source, tier, effective_date),
+            ).fetchone():
+                continue
+            counts = self.record(source, snapshot, effective_date, tier, os.path.basename(path), sha256)
+            results.append((tier, effective_date, counts))
+        return results
+
+    def tariff_at(self, code, on, tier=''):
+        """{source, code, name, category, price, valid_from, valid_to} in force on a date, or None."""
+        row = self.db.execute(
+            'SELECT t.source, t.code, t.name, t.category, t.price_cents, t.valid_from, t.valid_to '
+            "FROM tariffs t WHERE t.code = ? AND t.tier IN (?, '') AND t.valid_from <= ? "
+            'AND (t.valid_to IS NULL OR t.valid_to > ?) '
+            f'ORDER BY {PRECEDENCE}, {TIER_PRECEDENCE} LIMIT 1',
+            (code, tier, iso_date(on), iso_date(on), tier),
+        ).fetchone()
+        if row is None:
+            return None
+        source, code, name, category, price, valid_from, valid_to = row
+        return {
+            'source': source, 'code': code, 'name': name, 'category': category,
+            'price': None if price is None else price / 100,
+            'valid_from': valid_from, 'valid_to': valid_to,
+        }
+
+    def price_at(self, code, on, tier=''):
+        """The price of a code on a date, or None if it had no tariff then."""
+        tariff = self.tariff_at(code, on, tier)
+        return None if tariff is None else tariff['price']
+
+    def prices_at(self, items, tier=''):
+        """
+        Prices for a batch of (code, date) pairs, in order; None where there
+        was no tariff, or the date is blank or unreadable.
+        """
+        prices = [None] * len(items)
+        items = [(i, (code or '').strip(), parse_day(on)) for i, (code, on) in enumerate(items)]
+        items = [item for item in items if item[2] is not None]
+        with self.db:
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS lookup (i INTEGER PRIMARY KEY, code TEXT, day TEXT)')
+            self.db.execute('DELETE FROM lookup')
+            self.db.executemany('INSERT INTO lookup VALUES (?, ?, ?)', items)
+            found = set()
+            for i, price in self.db.execute(
+                'SELECT q.i, t.price_cents FROM lookup q JOIN tariffs t '
+                "ON t.code = q.code AND t.tier IN (?, '') AND t.valid_from <= q.day "
+                'AND (t.valid_to IS NULL OR t.valid_to > q.day) '
+                f'ORDER BY q.i, {PRECEDENCE}, {TIER_PRECEDENCE}', (tier, tier),
+            ):
+                if i not in found:
+                    found.add(i)
+                    prices[i] = None if price is None else price / 100
+            self.db.execute('DELETE FROM lookup')
+        return prices
+
+    def snapshots(self):
+        return self.db.execute(
+            'SELECT source, tier, valid_from, file, rows, added, changed, retired FROM snapshots '
+            'ORDER BY source, tier, valid_from, id').fetchall()
@@ -0,0 +1,354 @@
+"""
+Background refresh jobs: the pipeline stages run by a long-lived asyncio
+process, so the Laravel app can start a refresh and return at once.
+
+A job is requested by dropping a JSON file into .jobs/inbox/, or by
+sending the same JSON as one line to the runner's Unix socket:
+
+    {"id": "tariffs-2025-01", "stages": ["lab", "procedure"], "force": false,
+     "inputs": {"gdrg_docx": "/var/www/storage/app/uploads/new book.docx"}}
+
+Every key is optional. stages are pipeline stage names (default: all), run
+with the stages they depend on; a stage whose script and inputs are
+unchanged is skipped, as `python -m nhis_data` skips it, and shares its
+.pipeline-state.json. inputs replace the source documents (INPUTS) before
+the job's stages run, so an uploaded tariff book becomes a refresh.
+
+For each job the runner keeps
+
+    .jobs/<id>.json            its status (queued, running, ok or failed), with
+                               each stage's status, seconds and latest counts;
+                               rewritten atomically on every change
+    .jobs/<id>.events.jsonl    its events, one JSON object per line: queued, job
+                               and stage started and finished, and progress
+
+Stages run as subprocesses, at most `limit` at once, each as soon as the
+stages it depends on are done. Jobs run one after another, since two
+refreshes would write the same files. Each script runs with
+NHIS_DATA_PROGRESS=1, so its Metrics report the running counts (pages
+parsed, rows read and emitted) on stderr; each report becomes a progress
+event. Every stage writes its outputs to a temporary file that replaces
+the output once it is complete, so an import controller that reads an
+output while a job runs gets the previous generation, never half a file.
+
+A job whose run raises (a status file that cannot be written, an error in
+a stage task) is finished as failed with that error, and the next job
+runs. If the worker itself stops, serve() stops with it rather than keep
+queueing jobs that would never run.
+"""
+
+import asyncio
+import json
+import os
+import re
+import secrets
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from nhis_data import paths, pipeline
+from nhis_data.metrics import PROGRESS_ENV, PROGRESS_PREFIX
+
+# Request key -> the source document it replaces
+INPUTS = {'gdrg_docx': paths.GDRG_DOCX, 'medicines_pdf': paths.MEDICINES_PDF}
+JOB_ID_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+OUTPUT_LINES = 20  # lines of a failed stage's output kept in the status
+
+
+def now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def new_job_id():
+    return f'{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}'
+
+
+def write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def drop_request(request, jobs_dir=paths.JOBS_DIR):
+    """Queue a job for a runner by dropping its request into the inbox; return the job id."""
+    request = dict(request)
+    request.setdefault('id', new_job_id())
+    inbox = os.path.join(jobs_dir, 'inbox')
+    os.makedirs(inbox, exist_ok=True)
+    write_json(os.path.join(inbox, f"{request['id']}.json"), request)
+    return request['id']
+
+
+def read_status(job_id, jobs_dir=paths.JOBS_DIR):
+    """The status of a job, or None if the runner has not picked it up yet."""
+    try:
+        with open(os.path.join(jobs_dir, f'{job_id}.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def install_input(source, target):
+    """Copy an uploaded document over a source document, replacing it in one step."""
+    tmp = target + '.tmp'
+    with open(source, 'rb') as src, open(tmp, 'wb') as dst:
+        while True:
+            block = src.read(1 << 20)
+            if not block:
+                break
+            dst.write(block)
+    os.replace(tmp, target)
+
+
+class Job:
+    def __init__(self, request, stages):
+        if not isinstance(request, dict):
+            raise ValueError('a job request is a JSON object')
+        self.id = str(request.get('id') or new_job_id())
+        if not JOB_ID_RE.match(self.id):
+            raise ValueError(f'invalid job id {self.id!r}')
+        names = list(request.get('stages') or [])
+        unknown = set(names) - {stage.name for stage in stages}
+        if unknown:
+            raise ValueError(f'unknown stage: {", ".join(sorted(unknown))}')
+        self.inputs = dict(request.get('inputs') or {})
+        unknown = set(self.inputs) - set(INPUTS)
+        if unknown:
+            raise ValueError(f'unknown input: {", ".join(sorted(unknown))} (expected {", ".join(INPUTS)})')
+        self.force = bool(request.get('force'))
+        self.stages = pipeline.select(names, stages)
+        self.status = {
+            'id': self.id,
+            'status': 'queued',
+            'stages': {stage.name: {'status': 'pending'} for stage in self.stages},
+            'force': self.force,
+            'inputs': self.inputs,
+            'queued_at': now(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None,
+        }
+
+
+class JobRunner:
+    def __init__(self, jobs_dir=paths.JOBS_DIR, limit=2, stages=None, state_file=pipeline.STATE_FILE, poll=1.0,
+                 log=print):
+        self.jobs_dir = jobs_dir
+        self.inbox = os.path.join(jobs_dir, 'inbox')
+        self.stages = pipeline.STAGES if stages is None else stages
+        self.state_file = state_file
+        self.poll = poll
+        self.log = log
+        self.slots = asyncio.Semaphore(limit)
+        self.queue = asyncio.Queue()
+        os.makedirs(self.inbox, exist_ok=True)
+
+    def _save(self, job):
+        write_json(os.path.join(self.jobs_dir, f'{job.id}.json'), job.status)
+
+    def _event(self, job, event, **fields):
+        with open(os.path.join(self.jobs_dir, f'{job.id}.events.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'time': now(), 'job': job.id, 'event': event, **fields}) + '\n')
+
+    def submit(self, request):
+        """Queue a job and return its status; ValueError for an invalid request."""
+        job = Job(request, self.stages)
+        previous = read_status(job.id, self.jobs_dir)
+        if previous is not None and previous['status'] in ('queued', 'running'):
+            raise ValueError(f'job {job.id} is already {previous["status"]}')
+        self._save(job)
+        self._event(job, 'queued', stages=[stage.name for stage in job.stages])
+        self.queue.put_nowait(job)
+        return job.status
+
+    def scan_inbox(self):
+        """Submit the requests dropped into the inbox, oldest first; return how many were read."""
+        names = [name for name in os.listdir(self.inbox) if name.endswith('.json')]
+        paths_by_age = sorted((os.path.join(self.inbox, name) for name in names), key=os.path.getmtime)
+        for path in paths_by_age:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    request = json.load(f)
+                self.submit(request)
+            except (OSError, ValueError) as e:
+                self._reject(path, e)
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+        return len(paths_by_age)
+
+    def _reject(self, path, error):
+        """Record a request that cannot run as a failed job named after its file."""
+        job_id = os.path.splitext(os.path.basename(path))[0]
+        self.log(f'[{job_id}] rejected: {error}')
+        previous = read_status(job_id, self.jobs_dir) if JOB_ID_RE.match(job_id) else {'status': 'invalid'}
+        if previous is None or previous['status'] in ('ok', 'failed'):
+            write_json(os.path.join(self.jobs_dir, f'{job_id}.json'), {
+                'id': job_id, 'status': 'failed', 'stages': {}, 'queued_at': now(),
+                'started_at': None, 'finished_at': now(), 'error': str(error),
+            })
+
+    async def run_job(self, job):
+        """Run a job's stages; return its final status."""
+        job.status.update(status='running', started_at=now())
+        self._save(job)
+        self._event(job, 'job started')
+        self.log(f'[{job.id}] started: {", ".join(stage.name for stage in job.stages)}')
+        try:
+            for key, source in job.inputs.items():
+                install_input(source, INPUTS[key])
+        except OSError as e:
+            return self._finish(job, f'cannot install input: {e}')
+
+        state = pipeline.load_state(self.state_file)
+        package = pipeline.package_fingerprint()
+        results = {}
+        tasks = {}
+
+        async def run(stage):
+            await asyncio.gather(*(tasks[dep.name] for dep in stage.deps if dep.name in tasks))
+            status, key = pipeline.decide(stage, results, state, package, job.force)
+            if status is None:
+                async with self.slots:
+                    status, seconds, output = await self._run_stage(job, stage)
+                if status == 'ok':
+                    state[stage.name] = key
+                    pipeline.save_state(state, self.state_file)
+            else:
+                seconds, output = 0.0, []
+            results[stage.name] = (status, seconds)
+            job.status['stages'][stage.name].update(status=status, seconds=round(seconds, 2))
+            if status == 'failed':
+                job.status['stages'][stage.name]['output'] = output
+            self._save(job)
+            self._event(job, 'stage finished', stage=stage.name, status=status, seconds=round(seconds, 2))
+
+        for stage in job.stages:
+            tasks[stage.name] = asyncio.create_task(run(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # A stage task raised (or the job was cancelled): stop the others with it
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        failed = [name for name, (status, _) in results.items() if status in ('failed', 'blocked')]
+        return self._finish(job, f'failed stages: {", ".join(failed)}' if failed else None)
+
+    async def run_safely(self, job):
+        """
+        Run a job, finishing it as failed if the runner itself raises (a
+        status or event file that cannot be written, an input that cannot be
+        read...), so the next job still runs; return its final status.
+        """
+        try:
+            return await self.run_job(job)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            try:
+                return self._finish(job, error)
+            except OSError as save_error:
+                self.log(f'[{job.id}] failed: {error}; status not saved: {save_error}')
+                job.status.update(status='failed', finished_at=now(), error=error)
+                return job.status
+
+    def _finish(self, job, error):
+        job.status.update(status='failed' if error else 'ok', finished_at=now(), error=error)
+        self._save(job)
+        self._event(job, 'job finished', status=job.status['status'], error=error)
+        self.log(f"[{job.id}] {job.status['status']}" + (f': {error}' if error else ''))
+        return job.status
+
+    async def _run_stage(self, job, stage):
+        """(status, seconds, last output lines) of one stage's script, reporting its progress."""
+        entry = job.status['stages'][stage.name]
+        entry.update(status='running', started_at=now())
+        self._save(job)
+        self._event(job, 'stage started', stage=stage.name)
+        started = time.perf_counter()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, stage.script, *stage.args, cwd=paths.DATA_DIR,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                env=dict(os.environ, **{PROGRESS_ENV: '1'}),
+            )
+        except OSError as e:
+            return 'failed', time.perf_counter() - started, [str(e)]
+        output = deque(maxlen=OUTPUT_LINES)
+
+        async def read(stream):
+            async for line in stream:
+                line = line.decode('utf-8', 'replace').rstrip('\n')
+                if not line.startswith(PROGRESS_PREFIX):
+                    output.append(line)
+                    continue
+                try:
+                    progress = json.loads(line[len(PROGRESS_PREFIX):])
+                except ValueError:
+                    continue
+                entry['counts'] = progress.get('counts', {})
+                self._save(job)
+                self._event(job, 'progress', stage=stage.name, **progress)
+
+        await asyncio.gather(read(proc.stdout), read(proc.stderr))
+        returncode = await proc.wait()
+        return 'ok' if returncode == 0 else 'failed', time.perf_counter() - started, list(output)
+
+    async def run_pending(self):
+        """Submit the inbox and run every queued job; return their final statuses."""
+        self.scan_inbox()
+        finished = []
+        while not self.queue.empty():
+            finished.append(await self.run_safely(self.queue.get_nowait()))
+        return finished
+
+    async def serve(self, socket_path=None):
+        """Run jobs from the inbox (and the socket) until cancelled."""
+        server = None
+        if socket_path:
+            server = await asyncio.start_unix_server(self._client, path=socket_path)
+        worker = asyncio.create_task(self._work())
+        try:
+            while True:
+                if worker.done():
+                    # Jobs queued now would never run: stop with the worker's error instead
+                    worker.result()
+                    raise RuntimeError('the job worker stopped')
+                self.scan_inbox()
+                await asyncio.sleep(self.poll)
+        finally:
+            worker.cancel()
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+                if os.path.exists(socket_path):
+                    os.remove(socket_path)
+
+    async def _work(self):
+        while True:
+            await self.run_safely(await self.queue.get())
+
+    async def _client(self, reader, writer):
+        """
+        One JSON request per line: a job request is queued and answered with
+        its status at once; {"status": "<id>"} is answered with that job's
+        status (null if unknown).
+        """
+        try:
+            async for line in reader:
+                try:
+                    request = json.loads(line)
+                    if isinstance(request, dict) and set(request) == {'status'}:
+                        reply = read_status(request['status'], self.jobs_dir) \
+                            if JOB_ID_RE.match(str(request['status'])) else None
+                    else:
+                        reply = self.submit(request)
+                except ValueError as e:
+                    reply = {'error': str(e)}
+                writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,158 @@
+"""
+In-memory code -> price index over the generated tariff files, for the
+claim-price lookup service (serve_tariffs.py).
+
+NhisTariffService resolves a claim item's price with a database query
+through its mapping. Vetting a month of claims repeats that for every item.
+The index answers the code -> price half of the lookup from the TariffTables
+of nhis_tariffs_import.csv and gdrg_tariffs_import.csv (or their
+Parquet/Arrow versions), loaded once, so a batch of hundreds of codes costs
+one request.
+
+The precedence matches getTariffForItem(). A medicines code wins over a
+G-DRG code, and the first occurrence of a code in a file wins. G-DRG
+categories are mapped the way mapGdrgCategoryToNhis() maps them:
+INVESTIGATION is 'lab' and everything else is 'procedure'.
+
+ReloadingIndex watches the files' size and mtime. It rebuilds the index
+when the pipeline writes new files and swaps it in whole, so a batch is
+always answered from one generation. If a rebuild fails, for example on
+a CSV that is still being written, the previous index keeps serving and
+the rebuild is retried on the next check.
+"""
+
+import os
+import threading
+import time
+
+from nhis_data.tariff_table import TariffTable
+
+
+def gdrg_category(mdc_category):
+    return 'lab' if mdc_category.upper() == 'INVESTIGATION' else 'procedure'
+
+
+class TariffIndex:
+    """code -> {code, name, price, category, source} over the TariffTables of a fixed set of tariff files."""
+
+    def __init__(self, sources, generation=1):
+        """
+        sources: [(layout, path), ...] in precedence order; missing paths are
+        skipped. generation numbers the snapshot, so an answer can say which
+        one it came from.
+        """
+        self.generation = generation
+        self.tables = []
+        self.files = {}
+        self.loaded_at = time.time()
+        codes = 0
+        for layout, path in sources:
+            if os.path.exists(path):
+                table = TariffTable.from_path(path, layout)
+                # Codes an earlier file already has are answered from that file
+                added = sum(1 for code in table.code_index if self.find(code) is None)
+                self.tables.append(table)
+                self.files[path] = added
+                codes += added
+        self.codes = codes
+
+    def find(self, code):
+        """(table, row) of a code in the first file that has it, or None."""
+        for table in self.tables:
+            row = table.row_for(code)
+            if row is not None:
+                return table, row
+        return None
+
+    def entry(self, code):
+        """The entry of a code, or None."""
+        found = self.find(code)
+        if found is None:
+            return None
+        table, row = found
+        category = table.categories[row]
+        return {
+            'code': code,
+            'name': table.names[row],
+            'price': table.price(row),
+            'category': gdrg_category(category) if table.layout == 'gdrg' else category,
+            'source': table.layout,
+        }
+
+    def __len__(self):
+        return self.codes
+
+    def lookup(self, codes):
+        """{code: entry or None} for a batch of codes."""
+        return {code: self.entry(code) for code in codes}
+
+
+def file_signature(paths):
+    """(size, mtime) of each path, None for missing files; any write changes it."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+class ReloadingIndex:
+    """A TariffIndex that is rebuilt when its files change, checked at most every `interval` seconds."""
+
+    def __init__(self, sources, interval=2.0):
+        self.sources = list(sources)
+        self.interval = interval
+        self.paths = [path for _, path in self.sources]
+        self.signature = file_signature(self.paths)
+        self.index = TariffIndex(self.sources)
+        self.error = None
+        self.checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reload(self, force=False):
+        """Rebuild the index if the files changed (or always, with force); return True if it was swapped."""
+        with self._lock:
+            self.checked = time.monotonic()
+            signature = file_signature(self.paths)
+            if signature == self.signature and not force:
+                return False
+            try:
+                index = TariffIndex(self.sources, self.index.generation + 1)
+            except (OSError, ValueError, KeyError) as e:
+                # Keep serving the previous generation; retried on the next check
+                self.error = f'{type(e).__name__}: {e}'
+                return False
+            # A file that changed while it was read gets another rebuild next time
+            if file_signature(self.paths) == signature:
+                self.signature = signature
+            self.index = index
+            self.error = None
+            return True
+
+    @property
+    def generation(self):
+        return self.index.generation
+
+    def current(self):
+        """
+        The index to answer a request from, reloading first if a check is due.
+        Answer from (and report the generation of) the returned snapshot, not
+        from self.index, which a concurrent reload may swap.
+        """
+        if time.monotonic() - self.checked >= self.interval:
+            self.reload()
+        return self.index
+
+    def status(self):
+        index = self.index
+        return {
+            'codes': len(index),
+            'generation': index.generation,
+            'loaded_at': index.loaded_at,
+            'files': index.files,
+            'error': self.error,
+        }
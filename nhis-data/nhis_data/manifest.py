@@ -0,0 +1,88 @@
+"""
+Changed-codes manifest written next to each extracted tariff CSV.
+
+The manifest lists the codes that were added, changed or removed compared
+with the previous contents of the output file, so the app can re-import
+just those tariffs (NhisTariffService::importTariffs accepts a code list).
+It also records which extract_nhis_ml.py engine wrote the medicines
+tariffs, as the drug converter and the search index read the names of the
+two engines differently; tariff_engine() reads it back.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from nhis_data.formats import iter_table, read_table
+
+
+def read_rows(path):
+    """Rows of an existing CSV (or Parquet/Arrow file), or an empty list if there is none yet."""
+    if not os.path.exists(path):
+        return []
+    return read_table(path)[1]
+
+
+def group_by_code(rows, key):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[key], []).append(tuple(row.values()))
+    return grouped
+
+
+def changed_codes(old_rows, new_rows, key):
+    """Compare two row lists by code; codes with any differing row count as changed."""
+    old = group_by_code(old_rows, key)
+    new = group_by_code(new_rows, key)
+    return {
+        'added': sorted(code for code in new if code not in old),
+        'changed': sorted(code for code in new if code in old and old[code] != new[code]),
+        'removed': sorted(code for code in old if code not in new),
+    }
+
+
+def manifest_path(output_path):
+    return os.path.splitext(output_path)[0] + '.changes.json'
+
+
+def write_manifest(output_path, source, changes, cache=None, engine=None):
+    path = manifest_path(output_path)
+    manifest = {
+        'source': os.path.basename(source),
+        'output': os.path.basename(output_path),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'added': changes['added'],
+        'changed': changes['changed'],
+        'removed': changes['removed'],
+    }
+    if engine is not None:
+        manifest['engine'] = engine
+    if cache is not None:
+        manifest['parsed'] = cache.misses
+        manifest['reused'] = cache.hits
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def guess_engine(rows):
+    """'layout' if every row has a unit, as only the layout engine fills it; otherwise 'text'."""
+    return 'layout' if all(row.get('unit') for row in rows) else 'text'
+
+
+def tariff_engine(path):
+    """
+    The engine that wrote a medicines tariff file, from its manifest; files
+    without one (written before the engine was recorded, or by hand) are
+    guessed from all their rows.
+    """
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as f:
+            engine = json.load(f).get('engine')
+    except (OSError, ValueError):
+        engine = None
+    if engine in ('layout', 'text'):
+        return engine
+    return guess_engine(iter_table(path))
@@ -0,0 +1,101 @@
+"""
+Fuzzy name index for suggesting NHIS codes for hand-entered catalogue items.
+
+Names are normalized (lowercased, pack sizes and punctuation dropped, common
+dosage-form and unit spellings unified) and broken into word tokens plus
+character trigrams of each word, so "Amoxycillin Caps 500mg" still shares
+most of its features with "Amoxicillin Capsule, 500 mg". Each name becomes a
+TF-IDF vector, L2-normalized, stored in an inverted index: feature ->
+[(entry, weight), ...].
+
+A search only walks the postings of the query's own features, accumulating
+the cosine similarity for the entries that share at least one feature, so
+matching a catalogue against the tariff list never compares every pair.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+PACK_RE = re.compile(r"\(\s*\d+\s*(?:['`’]?s|tabs?)\s*\)", re.IGNORECASE)
+NUMBER_UNIT_RE = re.compile(r'(\d)\s*(mg|mcg|ml|g|iu|%)\b')
+TOKEN_RE = re.compile(r'[a-z]+|\d+(?:\.\d+)?')
+
+# Spellings seen in hand-entered catalogues -> the word used in the tariff lists
+SYNONYMS = {
+    'tab': 'tablet', 'tabs': 'tablet', 'tablets': 'tablet',
+    'cap': 'capsule', 'caps': 'capsule', 'capsules': 'capsule',
+    'inj': 'injection', 'injections': 'injection',
+    'susp': 'suspension', 'syr': 'syrup',
+    'oint': 'ointment', 'supp': 'suppository', 'suppositories': 'suppository',
+    'amp': 'ampoule', 'amps': 'ampoule',
+    'microgram': 'mcg', 'micrograms': 'mcg', 'milligram': 'mg', 'milligrams': 'mg',
+    'fbc': 'full blood count', 'cbc': 'full blood count',
+}
+
+
+def normalize(name):
+    """Lowercase words and numbers of a name, with pack sizes removed and synonyms unified."""
+    text = PACK_RE.sub(' ', name.lower())
+    text = NUMBER_UNIT_RE.sub(r'\1 \2', text)
+    words = []
+    for token in TOKEN_RE.findall(text):
+        words.extend(SYNONYMS.get(token, token).split())
+    return words
+
+
+def features(name):
+    """Word tokens plus boundary-marked character trigrams of each word."""
+    words = normalize(name)
+    grams = list(words)
+    for word in words:
+        if len(word) > 2 and not word[0].isdigit():
+            padded = f'<{word}>'
+            grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    """TF-IDF index over (code, name) entries."""
+
+    def __init__(self, entries):
+        self.codes = []
+        self.names = []
+        docs = []
+        for code, name in entries:
+            self.codes.append(code)
+            self.names.append(name)
+            docs.append(Counter(features(name)))
+
+        df = Counter()
+        for doc in docs:
+            df.update(doc.keys())
+        total = len(docs)
+        self.idf = {gram: math.log((total + 1) / (n + 1)) + 1 for gram, n in df.items()}
+
+        self.postings = defaultdict(list)
+        for entry, doc in enumerate(docs):
+            for gram, weight in self._vector(doc).items():
+                self.postings[gram].append((entry, weight))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _vector(self, counts):
+        vector = {}
+        for gram, tf in counts.items():
+            idf = self.idf.get(gram)
+            if idf is not None:
+                vector[gram] = (1 + math.log(tf)) * idf
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {gram: w / norm for gram, w in vector.items()}
+
+    def search(self, name, k=5):
+        """The k best (code, name, score) matches for a name, best first; score is cosine similarity."""
+        scores = defaultdict(float)
+        for gram, weight in self._vector(Counter(features(name))).items():
+            for entry, entry_weight in self.postings[gram]:
+                scores[entry] += weight * entry_weight
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.codes[entry], self.names[entry], round(score, 4)) for entry, score in best]
@@ -0,0 +1,404 @@
+"""
+Parse NHIS Medicines List PDF pages into tariff records.
+
+The record-boundary rules are the ones extract_nhis_ml.py has always used:
+a line starting with a code opens a new medicine (and closes the previous
+one), a short line containing a unit word sets the unit, and a numeric line
+sets the price. The parser state runs across page breaks, so a medicine
+whose price lands on the next page is kept.
+
+The layout engine reads the same table by position instead: fragments are
+assigned to the CODE / NAME / UNIT / PRICE / LEVEL columns by their
+x-coordinate (edges taken from each page's header row) and to rows by the
+y-coordinate of the nearest code. A name that wraps stays in the name
+column, so nothing spills into the unit, and a price printed over two
+lines ('2,300.0' / '0') is one cell. Its prices are written without
+thousands separators or trailing zeros, as in nhis_tariffs_import.csv.
+
+Pages can be parsed independently (in a process pool) and stitched back
+together in page order with PageStitcher.
+"""
+
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+from functools import partial
+from statistics import median
+from nhis_data.metrics import timed
+from nhis_data.pdf_layout import LINE_TOLERANCE, Columns, cell_text, page_fragments
+
+FIRST_PAGE = 10  # Medicines list starts on page 11
+
+FIELDNAMES = ['nhis_code', 'name', 'category', 'price', 'unit']
+COLUMN_TYPES = {'category': 'category', 'price': 'decimal_trimmed', 'unit': 'category'}
+
+CODE_RE = re.compile(r'^([A-Z]{2,}[A-Z0-9]{2,})\s+(.+)$')
+PRICE_RE = re.compile(r'^(\d+\.?\d*)\s*([A-Z0-9]*)?$')
+# The wrapped column header "UNIT OF / PRICING  PRICE" matches CODE_RE; it
+# still closes the previous medicine but is never emitted itself.
+HEADER_CODES = {'PRICING'}
+UNIT_PATTERNS = ['Tablet', 'Capsule', 'Vial', 'Ampoule', 'mL', 'Inhaler', 'Supp', 'Sachet', 'Course', 'G']
+
+ENGINES = ('layout', 'text')
+
+# Header labels of the medicines table, per column (layout engine)
+COLUMN_LABELS = {
+    'code': ('CODE',),
+    'name': ('GENERIC NAME, DOSAGE FORM, STRENGTH',),
+    'unit': ('UNIT OF', 'PRICING'),
+    'price': ('PRICE', '(GHC)'),
+    'level': ('LEVEL OF', 'PRESCRIBING'),
+}
+FOOTER_TEXT = 'NHIS Medicines List'
+CODE_CELL_RE = re.compile(r'^(?=.*[A-Z])[A-Z0-9]{4,}$')  # e.g. 5FLUORIN1
+PRICE_CELL_RE = re.compile(r'^\d+(?:\.\d+)?$')
+
+
+def page_lines(text):
+    """Yield the stripped, non-header lines of a page."""
+    for line in text.split('\n'):
+        line = line.strip()
+
+        # Skip header lines
+        if 'NHIS Medicines List' in line or 'Page' in line or not line:
+            continue
+        if line.startswith('CODE') or line.startswith('GENERIC NAME'):
+            continue
+
+        yield line
+
+
+class RecordParser:
+    """Line-by-line state machine that builds medicine records."""
+
+    def __init__(self, state=None):
+        self.code, self.name, self.unit, self.price = state or (None, None, None, None)
+        self.skipped = Counter()
+
+    @property
+    def state(self):
+        return self.code, self.name, self.unit, self.price
+
+    def record(self):
+        """The current medicine as a row, or None if it is incomplete."""
+        if self.code and self.name and self.price and self.code not in HEADER_CODES:
+            return {
+                'nhis_code': self.code,
+                'name': self.name.strip(),
+                'category': 'medicine',
+                'price': self.price,
+                'unit': self.unit or '',
+            }
+        return None
+
+    def close(self):
+        """The current medicine as a row; an incomplete one is counted in skipped."""
+        finished = self.record()
+        if finished is None and self.code:
+            self.skipped['column header' if self.code in HEADER_CODES else 'no price'] += 1
+        return finished
+
+    def feed(self, line):
+        """Consume one line; return the previous record if this line closed it."""
+        code_match = CODE_RE.match(line)
+        if code_match:
+            finished = self.close()
+            self.code = code_match.group(1)
+            self.name = code_match.group(2)
+            self.unit = None
+            self.price = None
+            return finished
+
+        for pattern in UNIT_PATTERNS:
+            if pattern in line and len(line) < 30:
+                self.unit = line
+                break
+
+        price_match = PRICE_RE.match(line)
+        if price_match and self.code:
+            # Next part might be level of prescribing, ignore it
+            self.price = price_match.group(1)
+        return None
+
+
+class CellParser(RecordParser):
+    """RecordParser fed (column, text) cells of the layout engine instead of lines."""
+
+    def feed(self, cell):
+        column, text = cell
+        if column == 'code':
+            finished = self.close()
+            self.code = text
+            self.name = self.unit = self.price = None
+            return finished
+        if column in ('name', 'unit'):
+            previous = getattr(self, column)
+            setattr(self, column, f'{previous} {text}' if previous else text)
+        elif column == 'price':
+            self.price = (self.price or '') + text
+        return None
+
+    def record(self):
+        finished = super().record()
+        if finished is not None:
+            price = price_text(finished['price'])
+            if price is None:
+                return None
+            finished['price'] = price
+        return finished
+
+
+def price_text(cell):
+    """A price cell without thousands separators or trailing zeros, or None if it is not a number."""
+    price = cell.replace(',', '').replace(' ', '')
+    if not PRICE_CELL_RE.match(price):
+        return None
+    if '.' in price:
+        price = price.rstrip('0').rstrip('.')
+    return price
+
+
+def parse_layout_page(fragments):
+    """
+    parse_page for the layout engine: the same (lead, records, state,
+    skipped) from the positioned text fragments of a page.
+
+    Each fragment belongs to the row of the code nearest to it vertically
+    (cells are centred on their row, so wrapped names sit above and below
+    the code). Fragments more than half a row above the page's first code
+    are the lead; a page without the table header yields nothing.
+    """
+    columns = Columns.detect(fragments, COLUMN_LABELS)
+    if columns is None:
+        return [], [], None, {}
+
+    footer_ys = [f.y for f in fragments if FOOTER_TEXT in f.text]
+    body = [
+        f for f in fragments
+        if f.y < columns.header_y - LINE_TOLERANCE
+        and not any(abs(f.y - y) <= LINE_TOLERANCE for y in footer_ys)
+    ]
+    codes = sorted(
+        (f for f in body if columns.column(f.x) == 'code' and CODE_CELL_RE.match(f.text.strip())),
+        key=lambda f: f.y,
+    )
+    ys = [f.y for f in codes]
+    gaps = [b - a for a, b in zip(ys, ys[1:])]
+    reach = median(gaps) / 2 if gaps else float('inf')
+    rows = [{} for _ in codes]
+    lead = {}
+    for f in body:
+        column = columns.column(f.x)
+        if column in ('code', 'level'):
+            continue
+        if not codes or f.y > ys[-1] + reach:
+            lead.setdefault(column, []).append(f)
+            continue
+        i = bisect_left(ys, f.y)
+        if i == len(ys) or (i and f.y - ys[i - 1] < ys[i] - f.y):
+            i -= 1
+        rows[i].setdefault(column, []).append(f)
+    if not codes:
+        return page_cells(lead), [], None, {}
+
+    parser = CellParser()
+    records = []
+    for code, row in zip(reversed(codes), reversed(rows)):
+        for cell in [('code', code.text.strip())] + page_cells(row):
+            finished = parser.feed(cell)
+            if finished:
+                records.append(finished)
+    return page_cells(lead), records, parser.state, dict(parser.skipped)
+
+
+def page_cells(row):
+    """(column, text) cells of {column: fragments}, in column order."""
+    cells = []
+    for column in ('name', 'unit', 'price'):
+        text = cell_text(row.get(column, []), '' if column == 'price' else ' ')
+        if text:
+            cells.append((column, text))
+    return cells
+
+
+def parse_page(text):
+    """
+    Parse one page without knowing what came before it.
+
+    Returns (lead, records, state, skipped): the lines before the page's
+    first code line (they still belong to the previous page's medicine), the
+    records closed on this page, the parser state at the end of the page
+    (None if the page had no code line at all) and {reason: count} for the
+    medicines dropped on this page.
+    """
+    lead = []
+    records = []
+    parser = None
+    for line in page_lines(text or ''):
+        if parser is None:
+            if not CODE_RE.match(line):
+                lead.append(line)
+                continue
+            parser = RecordParser()
+        finished = parser.feed(line)
+        if finished:
+            records.append(finished)
+    if parser is None:
+        return lead, records, None, {}
+    return lead, records, parser.state, dict(parser.skipped)
+
+
+class PageStitcher:
+    """Join parse_page results, in page order, into one record stream."""
+
+    def __init__(self, parser_class=RecordParser):
+        self.parser_class = parser_class
+        self.parser = parser_class()
+        self.skipped = Counter()
+
+    def add(self, page):
+        lead, records, state, skipped = page
+        self.skipped.update(skipped)
+        for line in lead:
+            self.parser.feed(line)
+        if state is None:
+            return []
+        # The page's first code line closes whatever was carried over
+        carried = self.parser.close()
+        self.skipped.update(self.parser.skipped)
+        self.parser = self.parser_class(state)
+        return ([carried] if carried else []) + records
+
+    def finish(self):
+        last = self.parser.close()
+        self.skipped.update(self.parser.skipped)
+        return [last] if last else []
+
+
+# Bump when the parsing rules change so cached page results are discarded
+PARSER_VERSION = 2
+
+_reader = None
+
+
+def pdf_reader(pdf_path):
+    # PyPDF2 is only imported once a PDF is actually read
+    from PyPDF2 import PdfReader
+
+    return PdfReader(pdf_path)
+
+
+def _open_reader(pdf_path):
+    global _reader
+    _reader = pdf_reader(pdf_path)
+
+
+def parse_pages(indices, engine='text'):
+    """
+    Pool task: parse the given pages of the reader opened in this process.
+
+    Returns the parse_page (or parse_layout_page) results and the seconds
+    spent in PyPDF2 text extraction and in parsing.
+    """
+    pages = []
+    extract_seconds = parse_seconds = 0.0
+    for i in indices:
+        started = time.perf_counter()
+        if engine == 'layout':
+            fragments = page_fragments(_reader.pages[i])
+            extracted = time.perf_counter()
+            pages.append(parse_layout_page(fragments))
+        else:
+            text = _reader.pages[i].extract_text()
+            extracted = time.perf_counter()
+            pages.append(parse_page(text))
+        extract_seconds += extracted - started
+        parse_seconds += time.perf_counter() - extracted
+    return pages, extract_seconds, parse_seconds
+
+
+def page_key(page):
+    """Raw content stream of a page, used as its content-hash cache key."""
+    contents = page.get_contents()
+    return contents.get_data() if contents is not None else b''
+
+
+def chunks(indices, chunk_size):
+    return [indices[i:i + chunk_size] for i in range(0, len(indices), chunk_size)]
+
+
+def count_pages(pdf_path):
+    return len(pdf_reader(pdf_path).pages)
+
+
+def _parsed_pages(pdf_path, indices, workers, chunk_size, engine, metrics=None):
+    """Yield parse_page results for the given pages, in order."""
+    task = partial(parse_pages, engine=engine)
+    if workers > 1 and len(indices) > chunk_size:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(workers, initializer=_open_reader, initargs=(pdf_path,)) as pool:
+            results = pool.map(task, chunks(indices, chunk_size))
+            yield from _timed_pages(results, metrics)
+    else:
+        _open_reader(pdf_path)
+        results = (task(chunk) for chunk in chunks(indices, chunk_size))
+        yield from _timed_pages(results, metrics)
+
+
+def _timed_pages(results, metrics):
+    for pages, extract_seconds, parse_seconds in results:
+        if metrics is not None:
+            metrics.add_time('pdf text extraction', extract_seconds)
+            metrics.add_time('page parsing', parse_seconds)
+        yield from pages
+
+
+def iter_records(pdf_path, workers=1, chunk_size=2, cache=None, metrics=None, engine='text'):
+    """
+    Yield medicine records from the PDF in page order, parsed by the
+    'layout' or 'text' engine (the cache must be keyed by the same engine).
+
+    With workers > 1 the pages are parsed in a process pool and the results
+    are stitched as they arrive, so rows can be written while later pages
+    are still being parsed. With a ContentCache only pages whose content
+    hash is not in the cache are parsed at all. With a Metrics the page
+    counts, dropped medicines and extraction/parsing times are recorded.
+    """
+    total = count_pages(pdf_path)
+    indices = list(range(FIRST_PAGE, total))
+
+    keys = {}
+    todo = indices
+    if cache is not None:
+        with timed(metrics, 'page hashing'):
+            reader = pdf_reader(pdf_path)
+            keys = {i: cache.key(page_key(reader.pages[i])) for i in indices}
+        todo = []
+        scheduled = set()
+        for i in indices:
+            if keys[i] not in cache and keys[i] not in scheduled:
+                scheduled.add(keys[i])
+                todo.append(i)
+
+    parsed = _parsed_pages(pdf_path, todo, workers, chunk_size, engine, metrics)
+    todo = set(todo)
+    stitcher = PageStitcher(CellParser if engine == 'layout' else RecordParser)
+    for i in indices:
+        if i in todo:
+            page = next(parsed)
+            if cache is not None:
+                cache.put(keys[i], page)
+        else:
+            page = cache.get(keys[i])
+        yield from stitcher.add(page)
+        if metrics is not None:
+            metrics.count('pages')
+
+    yield from stitcher.finish()
+
+    if metrics is not None:
+        metrics.count('pages parsed', len(todo))
+        for reason, n in stitcher.skipped.items():
+            metrics.skip(reason, n)
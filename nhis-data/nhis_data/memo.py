@@ -0,0 +1,118 @@
+"""
+Persistent memo of per-name classification results.
+
+Tariff revisions and facility books repeat the same test, procedure and
+drug names year after year. Each converter keeps the results of its
+classifier in .classification-memo/<kind>.memo.json, keyed by the name
+(plus whatever else the result depends on, e.g. the price of a
+procedure). A rerun classifies only the names it has not seen before.
+
+Each memo file records the version of the rules that produced it:
+rules_version() is a digest of the keyword tables, patterns and thresholds
+a classifier reads, and of the source of the classifier modules
+(CLASSIFIER_MODULES). Editing any of them gives a new version, and the
+memo of that kind starts empty; an edited table only empties the kinds
+that read it. MEMO_VERSION is for changes to the memo file itself.
+
+Entries are kept in least-recently-used order, and the oldest are dropped
+as soon as there are more than max_entries, so a run over years of
+tariffs holds at most max_entries results however many names it sees.
+With directory=None (--no-memo) nothing is kept: each call classifies its
+distinct keys once and forgets them.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from nhis_data.paths import MEMO_DIR
+
+MEMO_VERSION = 1
+MAX_ENTRIES = 50000
+# Modules whose code decides a classification, relative to the package
+CLASSIFIER_MODULES = ['rules.py', 'matcher.py', 'drugs.py', 'memo.py']
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def code_version(package_dir=PACKAGE_DIR):
+    """A digest of the source of CLASSIFIER_MODULES; any edit to the classifier code changes it."""
+    digest = hashlib.sha256()
+    for name in CLASSIFIER_MODULES:
+        digest.update(name.encode())
+        with open(os.path.join(package_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def rules_version(*tables):
+    """A digest of rule tables (keyword lists, compiled patterns, thresholds) and the classifier code."""
+    return hashlib.sha256(repr((MEMO_VERSION, CODE_VERSION) + tables).encode('utf-8')).hexdigest()[:16]
+
+
+CODE_VERSION = code_version()
+
+
+def add_arguments(parser):
+    parser.add_argument('--memo-dir', default=MEMO_DIR,
+                        help='directory of the classification memo (default: .classification-memo)')
+    parser.add_argument('--no-memo', action='store_true',
+                        help='classify every name instead of reusing results memoised by earlier runs')
+
+
+class ClassificationMemo:
+    def __init__(self, kind, version, directory=MEMO_DIR, max_entries=MAX_ENTRIES):
+        self.path = os.path.join(directory, f'{kind}.memo.json') if directory else None
+        self.version = version
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            # Edited rules invalidate everything
+            if data.get('version') == version:
+                self.entries = OrderedDict(data.get('entries', {}))
+
+    @classmethod
+    def from_args(cls, kind, version, args):
+        return cls(kind, version, None if args.no_memo else args.memo_dir)
+
+    def map(self, keys, compute):
+        """
+        Results for keys, in order. compute(missing keys) -> results is called
+        once, for the distinct keys that are not memoised yet.
+        """
+        distinct = list(dict.fromkeys(keys))
+        if self.path is None:
+            results = dict(zip(distinct, compute(distinct)))
+            self.misses += len(distinct)
+            return [results[key] for key in keys]
+
+        entries = self.entries
+        results = {key: entries[key] for key in distinct if key in entries}
+        missing = [key for key in distinct if key not in results]
+        if missing:
+            results.update(zip(missing, compute(missing)))
+        for key in distinct:
+            entries[key] = results[key]
+            entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        self.hits += len(distinct) - len(missing)
+        self.misses += len(missing)
+        return [results[key] for key in keys]
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': self.entries}, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,191 @@
+"""
+Phase timers, row counters and optional profiling for the nhis-data scripts.
+
+Every script creates one Metrics, wraps its phases (reading, docx/PDF
+traversal, classification, CSV writing) in metrics.phase(...), counts rows
+read and emitted, records why rows were skipped, and calls
+metrics.finish(output) after printing its usual breakdown. finish() prints
+a short timing/row summary and writes the same numbers as JSON to
+<output stem>.metrics.json.
+
+    --profile       run the script under cProfile; the stats go to
+                    <output stem>.prof and the top entries are printed
+    --trace-memory  trace allocations with tracemalloc; the peak and the
+                    largest allocation sites go into the JSON summary
+
+Phases may nest (a script's 'extract' phase includes the docx traversal
+inside it), and times reported from process-pool workers are summed over
+the workers, so phase times need not add up to the wall-clock total.
+
+With NHIS_DATA_PROGRESS=1 in the environment (the background job runner
+sets it), the running counts are also reported on stderr while the script
+works, at most every PROGRESS_INTERVAL seconds and once more at the end,
+as a line of PROGRESS_PREFIX followed by JSON:
+
+    @progress {"script": "extract_nhis_ml.py", "seconds": 1.52, "counts": {"pages": 12, ...}}
+"""
+
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+TOP_ENTRIES = 10
+
+PROGRESS_ENV = 'NHIS_DATA_PROGRESS'
+PROGRESS_PREFIX = '@progress '
+PROGRESS_INTERVAL = 0.5
+
+
+def add_arguments(parser):
+    parser.add_argument('--profile', action='store_true',
+                        help='run under cProfile and write the stats to <output stem>.prof')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='trace allocations with tracemalloc and report the peak and top allocation sites')
+
+
+def metrics_path(output):
+    """<stem>.metrics.json next to the output file."""
+    return os.path.splitext(output)[0] + '.metrics.json'
+
+
+def profile_path(output):
+    return os.path.splitext(output)[0] + '.prof'
+
+
+def timed(metrics, name):
+    """metrics.phase(name), or a no-op when there is no Metrics."""
+    return metrics.phase(name) if metrics is not None else nullcontext()
+
+
+class Metrics:
+    def __init__(self, script, profile=False, trace_memory=False):
+        self.script = script
+        self.phases = {}
+        self.counts = Counter()
+        self.skipped = Counter()
+        self.memory = None
+        self.profiler = None
+        self.trace_memory = trace_memory
+        self.started = time.perf_counter()
+        self.stopped = None
+        self.progress = os.environ.get(PROGRESS_ENV) == '1'
+        self.reported = self.started
+
+        # The profiling modules are only imported when asked for
+        if profile:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+        if trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    @classmethod
+    def from_args(cls, script, args):
+        return cls(os.path.basename(script), args.profile, args.trace_memory)
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+        if self.progress and time.perf_counter() - self.reported >= PROGRESS_INTERVAL:
+            self.report_progress()
+
+    def report_progress(self):
+        """Write the running counts to stderr as a progress line."""
+        self.reported = time.perf_counter()
+        progress = {'script': self.script, 'seconds': round(self.total, 2), 'counts': dict(self.counts)}
+        sys.stderr.write(PROGRESS_PREFIX + json.dumps(progress) + '\n')
+        sys.stderr.flush()
+
+    def skip(self, reason, n=1):
+        if n:
+            self.skipped[reason] += n
+
+    @property
+    def total(self):
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def summary(self):
+        return {
+            'script': self.script,
+            'total_seconds': round(self.total, 4),
+            'phases': {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            'rows': {
+                'read': self.counts['read'],
+                'skipped': sum(self.skipped.values()),
+                'emitted': self.counts['emitted'],
+            },
+            'skip_reasons': dict(self.skipped.most_common()),
+            'counts': {name: n for name, n in self.counts.items() if name not in ('read', 'emitted')},
+            'memory': self.memory,
+        }
+
+    def _stop(self):
+        self.stopped = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory:
+            import tracemalloc
+
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.memory = {
+                'current_kib': current // 1024,
+                'peak_kib': peak // 1024,
+                'top': [
+                    {'site': str(stat.traceback), 'kib': stat.size // 1024, 'blocks': stat.count}
+                    for stat in snapshot.statistics('lineno')[:TOP_ENTRIES]
+                ],
+            }
+
+    def finish(self, output):
+        """Stop profiling, print the summary and write <output stem>.metrics.json."""
+        self._stop()
+        if self.progress:
+            self.report_progress()
+        summary = self.summary()
+        rows = summary['rows']
+
+        print('')
+        print('Timings:')
+        for name, seconds in summary['phases'].items():
+            print(f'  {name}: {seconds:.3f}s')
+        print(f"  total: {summary['total_seconds']:.3f}s")
+        print(f"Rows: {rows['read']} read, {rows['skipped']} skipped, {rows['emitted']} emitted")
+        for reason, n in summary['skip_reasons'].items():
+            print(f'  skipped ({reason}): {n}')
+        if self.memory is not None:
+            print(f"Peak traced memory: {self.memory['peak_kib']} KiB")
+
+        if self.profiler is not None:
+            path = profile_path(output)
+            self.profiler.dump_stats(path)
+            print(f'Profile written to {path}')
+            import pstats
+
+            pstats.Stats(self.profiler).sort_stats('cumulative').print_stats(TOP_ENTRIES)
+
+        path = metrics_path(output)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp, path)
+        print(f'Metrics written to {path}')
+        return path
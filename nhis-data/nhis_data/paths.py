@@ -0,0 +1,32 @@
+"""
+Default locations of the NHIS source documents and generated files.
+
+Everything lives in the nhis-data directory, wherever the scripts are run
+from.
+"""
+
+import os
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GDRG_DOCX = os.path.join(DATA_DIR, 'Private Primary Care Hospital (Catering Exclusive) Tariff JAN 2023-1.docx')
+MEDICINES_PDF = os.path.join(DATA_DIR, '2O25 NHIS ML.pdf')
+
+GDRG_TARIFFS_CSV = os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv')
+NHIS_TARIFFS_CSV = os.path.join(DATA_DIR, 'nhis_tariffs_import.csv')
+
+LAB_SERVICES_CSV = os.path.join(DATA_DIR, 'nhis_lab_services_for_import.csv')
+PROCEDURES_CSV = os.path.join(DATA_DIR, 'nhis_procedures_for_import.csv')
+DRUGS_CSV = os.path.join(DATA_DIR, 'nhis_drugs_for_import.csv')
+
+TARIFF_HISTORY_DB = os.path.join(DATA_DIR, 'tariff_history.sqlite')
+
+MEMO_DIR = os.path.join(DATA_DIR, '.classification-memo')
+
+SEARCH_INDEX_JSON = os.path.join(DATA_DIR, 'tariff_search_index.json')
+
+# The pricing dashboard's export with the NHIS plan selected, and the cube made from it
+HOSPITAL_PRICES_CSV = os.path.join(DATA_DIR, 'hospital_prices.csv')
+PRICE_CUBE_CSV = os.path.join(DATA_DIR, 'tariff_price_cube.csv')
+
+JOBS_DIR = os.path.join(DATA_DIR, '.jobs')
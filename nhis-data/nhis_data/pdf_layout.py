@@ -0,0 +1,86 @@
+"""
+Positioned text of PDF pages, for tables that extract_text() flattens.
+
+PyPDF2 reports every text run it shows to a visitor together with its text
+and transformation matrices, so one extraction pass gives (x, y, text)
+fragments in page coordinates (y grows up the page). A table's column
+edges are found from the left edges of its header labels, and every
+fragment is assigned to a column by its x-coordinate.
+
+A cell that wraps is several fragments in the same column: fragments on
+one baseline are joined in x order, then the lines are joined top to
+bottom.
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+
+Fragment = namedtuple('Fragment', 'x y text')
+
+# Points a cell may start left of its header label (labels and values are
+# centred differently) and baselines closer than this are one line
+COLUMN_TOLERANCE = 12
+LINE_TOLERANCE = 2
+
+
+def page_fragments(page):
+    """
+    Text fragments of a PyPDF2 page, in content-stream order. Runs of spaces
+    are kept: some words are separated only by a separately drawn space.
+    """
+    fragments = []
+
+    def visit(text, cm, tm, font_dict, font_size):
+        if text:
+            # Text space -> page space: the text matrix origin through the CTM
+            x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+            y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+            fragments.append(Fragment(x, y, text))
+
+    page.extract_text(visitor_text=visit)
+    return fragments
+
+
+class Columns:
+    """Column edges of a table, from the fragments of its header row."""
+
+    def __init__(self, edges, header_y):
+        self.names = [name for name, _ in edges]
+        self.lefts = [left for _, left in edges]
+        self.header_y = header_y
+
+    @classmethod
+    def detect(cls, fragments, labels):
+        """
+        Columns from a {column: (label, ...)} mapping of the exact header
+        texts, or None if the page has no header. A column starts
+        COLUMN_TOLERANCE left of its leftmost label.
+        """
+        found = {}
+        header_ys = []
+        for fragment in fragments:
+            text = fragment.text.strip()
+            for name, column_labels in labels.items():
+                if text in column_labels:
+                    found[name] = min(found.get(name, fragment.x), fragment.x)
+                    header_ys.append(fragment.y)
+        if len(found) < len(labels):
+            return None
+        edges = sorted(found.items(), key=lambda item: item[1])
+        edges = [(name, left - COLUMN_TOLERANCE if i else float('-inf')) for i, (name, left) in enumerate(edges)]
+        return cls(edges, min(header_ys))
+
+    def column(self, x):
+        return self.names[bisect_right(self.lefts, x) - 1]
+
+
+def cell_text(fragments, separator=' '):
+    """Text of one cell: fragments on a baseline joined in x order, lines top to bottom."""
+    lines = []
+    for fragment in sorted(fragments, key=lambda f: -f.y):
+        if lines and abs(lines[-1][0].y - fragment.y) <= LINE_TOLERANCE:
+            lines[-1].append(fragment)
+        else:
+            lines.append([fragment])
+    texts = (''.join(f.text for f in sorted(line, key=lambda f: f.x)) for line in lines)
+    return separator.join(' '.join(text.split()) for text in texts)
@@ -0,0 +1,239 @@
+"""
+Run the NHIS data refresh as one dependency graph.
+
+    docx -> gdrg_tariffs -> {lab, procedure}
+    pdf  -> nhis_tariffs -> drugs
+    {gdrg_tariffs, nhis_tariffs} -> history, search_index
+    {gdrg_tariffs, nhis_tariffs, drugs} + hospital_prices.csv -> price_cube
+
+Usage (from the nhis-data directory):  python -m nhis_data [--force] [stage ...]
+A single tool runs as  python -m nhis_data <command> [options]  (see
+nhis_data.commands).
+
+Each stage runs its script as a subprocess as soon as the stages it depends
+on have finished, so the G-DRG and medicines branches run side by side. A
+stage is skipped when its script, its inputs and the nhis_data package
+(nhis_data.commands included, where the scripts' code lives) are
+byte-for-byte what they were on its last successful run and its outputs
+still exist. Fingerprints are kept in .pipeline-state.json.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from nhis_data import paths
+
+STATE_FILE = os.path.join(paths.DATA_DIR, '.pipeline-state.json')
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Stage:
+    def __init__(self, name, script, inputs, outputs, args=()):
+        self.name = name
+        self.script = os.path.join(paths.DATA_DIR, script)
+        self.inputs = inputs
+        self.outputs = outputs
+        self.args = list(args)
+        self.deps = []
+
+
+STAGES = [
+    Stage('gdrg_tariffs', 'extract_gdrg.py', [paths.GDRG_DOCX], [paths.GDRG_TARIFFS_CSV]),
+    Stage('lab', 'convert_gdrg_to_lab_import.py', [paths.GDRG_TARIFFS_CSV], [paths.LAB_SERVICES_CSV]),
+    Stage('procedure', 'convert_gdrg_to_procedure_import.py', [paths.GDRG_TARIFFS_CSV], [paths.PROCEDURES_CSV]),
+    Stage('nhis_tariffs', 'extract_nhis_ml.py', [paths.MEDICINES_PDF], [paths.NHIS_TARIFFS_CSV]),
+    Stage('drugs', 'convert_nhis_to_drug_import.py', [paths.NHIS_TARIFFS_CSV], [paths.DRUGS_CSV]),
+    Stage('history', 'tariff_history.py', [paths.GDRG_TARIFFS_CSV, paths.NHIS_TARIFFS_CSV], [paths.TARIFF_HISTORY_DB],
+          args=['record', paths.GDRG_TARIFFS_CSV, paths.NHIS_TARIFFS_CSV]),
+    Stage('search_index', 'search_tariffs.py', [paths.GDRG_TARIFFS_CSV, paths.NHIS_TARIFFS_CSV],
+          [paths.SEARCH_INDEX_JSON], args=['build']),
+    Stage('price_cube', 'tariff_cube.py',
+          [paths.GDRG_TARIFFS_CSV, paths.NHIS_TARIFFS_CSV, paths.DRUGS_CSV, paths.HOSPITAL_PRICES_CSV],
+          [paths.PRICE_CUBE_CSV]),
+]
+
+
+def link(stages):
+    """Make each stage depend on whichever stages produce its inputs; return the stages."""
+    producers = {output: stage for stage in stages for output in stage.outputs}
+    for stage in stages:
+        stage.deps = [producers[i] for i in stage.inputs if i in producers]
+    return stages
+
+
+link(STAGES)
+
+
+def file_digest(path, digest):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+
+def package_fingerprint(package_dir=PACKAGE_DIR):
+    """Digest of every module of the package, nhis_data.commands included, with its path."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(package_dir):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, package_dir).encode())
+                file_digest(path, digest)
+    return digest.hexdigest()
+
+
+def fingerprint(stage, package):
+    digest = hashlib.sha256(package.encode())
+    digest.update(' '.join(stage.args).encode())
+    for path in [stage.script] + stage.inputs:
+        digest.update(path.encode())
+        if os.path.exists(path):
+            file_digest(path, digest)
+    return digest.hexdigest()
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def run_stage(stage):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, stage.script] + stage.args,
+        cwd=paths.DATA_DIR,
+        capture_output=True,
+        text=True,
+    )
+    return proc, time.perf_counter() - started
+
+
+def select(names, stages=STAGES):
+    """The named stages plus everything they depend on, in the order of stages."""
+    if not names:
+        return list(stages)
+    by_name = {stage.name: stage for stage in stages}
+    wanted = set()
+    pending = [by_name[name] for name in names]
+    while pending:
+        stage = pending.pop()
+        if stage.name not in wanted:
+            wanted.add(stage.name)
+            pending.extend(stage.deps)
+    return [stage for stage in stages if stage.name in wanted]
+
+
+def decide(stage, results, state, package, force=False):
+    """
+    ('blocked' or 'skipped' or None, fingerprint) for a stage whose
+    dependencies have finished; None means it has to run.
+    """
+    upstream = {results[dep.name][0] for dep in stage.deps if dep.name in results}
+    if upstream & {'failed', 'blocked'}:
+        return 'blocked', None
+    key = fingerprint(stage, package)
+    up_to_date = state.get(stage.name) == key and all(os.path.exists(o) for o in stage.outputs)
+    if up_to_date and not force and 'would run' not in upstream:
+        return 'skipped', key
+    return None, key
+
+
+def run(stages, force=False, jobs=None, verbose=False, dry_run=False):
+    """Run the stages in dependency order; return {name: (status, seconds)}."""
+    state = load_state()
+    package = package_fingerprint()
+    results = {}
+    remaining = list(stages)
+    running = {}
+
+    def ready(stage):
+        return all(dep.name in results or dep not in stages for dep in stage.deps)
+
+    with ThreadPoolExecutor(max_workers=jobs or len(stages) or 1) as pool:
+        while remaining or running:
+            for stage in [s for s in remaining if ready(s)]:
+                remaining.remove(stage)
+
+                status, key = decide(stage, results, state, package, force)
+                if status is not None:
+                    results[stage.name] = (status, 0.0)
+                    continue
+                if dry_run:
+                    results[stage.name] = ('would run', 0.0)
+                    continue
+
+                print(f'[{stage.name}] started')
+                running[pool.submit(run_stage, stage)] = (stage, key)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                proc, seconds = future.result()
+                if proc.returncode == 0:
+                    state[stage.name] = key
+                    save_state(state)
+                    results[stage.name] = ('ok', seconds)
+                else:
+                    results[stage.name] = ('failed', seconds)
+
+                print(f'[{stage.name}] {results[stage.name][0]} in {seconds:.2f}s')
+                if verbose or proc.returncode != 0:
+                    for line in (proc.stdout + proc.stderr).splitlines():
+                        print(f'[{stage.name}]   {line}')
+
+    return results
+
+
+def main(argv=None):
+    from nhis_data.commands import COMMANDS
+
+    parser = argparse.ArgumentParser(
+        prog='python -m nhis_data', description='Refresh the NHIS tariff and import files.',
+        epilog='Single tools run as python -m nhis_data <command> [options]: ' + ', '.join(COMMANDS) + '.')
+    parser.add_argument('stages', nargs='*', metavar='stage',
+                        help='stages to bring up to date, with their dependencies (default: all): '
+                             + ', '.join(s.name for s in STAGES))
+    parser.add_argument('--force', action='store_true', help='run stages even if their inputs are unchanged')
+    parser.add_argument('-j', '--jobs', type=int, help='maximum stages to run at once (default: no limit)')
+    parser.add_argument('-v', '--verbose', action='store_true', help="print each stage's output")
+    parser.add_argument('-n', '--dry-run', action='store_true', help='show what would run without running it')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.stages) - {s.name for s in STAGES}
+    if unknown:
+        parser.error(f'unknown stage: {", ".join(sorted(unknown))}')
+
+    started = time.perf_counter()
+    results = run(select(args.stages), force=args.force, jobs=args.jobs,
+                  verbose=args.verbose, dry_run=args.dry_run)
+    total = time.perf_counter() - started
+
+    print('')
+    print(f'{"stage":<15}{"status":<12}{"time":>8}')
+    for stage in STAGES:
+        if stage.name in results:
+            status, seconds = results[stage.name]
+            print(f'{stage.name:<15}{status:<12}{seconds:>7.2f}s')
+    print(f'{"total":<27}{total:>7.2f}s')
+
+    return 1 if any(status in ('failed', 'blocked') for status, _ in results.values()) else 0
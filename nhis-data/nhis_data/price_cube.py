@@ -0,0 +1,205 @@
+"""
+Precomputed price aggregates of the tariffs, for the pricing dashboard.
+
+PricingDashboardService works out coverage and price comparisons with
+live queries over every drug, lab service and procedure, although the
+tariffs only change when these scripts run. The cube is computed once,
+when the tariff files are generated, and written to tariff_price_cube.csv
+(or a typed Parquet/Arrow file with --format): one row per (dimension,
+value), so a dashboard load reads a few dozen rows however large the
+catalogue grows.
+
+    all                 every tariff and hospital item (value '')
+    category            tariff category: medicine, lab or procedure
+    form                dosage form of a medicine, as the drug import has it
+    mdc_category        G-DRG MDC category
+    age_category        G-DRG age category (adult, child, all)
+    procedure_type      minor or major by get_procedure_type(), for the G-DRG
+                        procedures
+    hospital_category   the dashboard's own categories (drugs, lab,
+                        consultation, procedure) of the hospital items
+
+The hospital prices are the dashboard's export with the NHIS plan selected
+(Code, Category, Cash Price, NHIS Code ...), saved as hospital_prices.csv.
+An item is mapped when its NHIS code is a current tariff; without an NHIS
+Code column its own code is used, as the import tables keep the NHIS code
+as the item code. An item is priced when its cash price is above 0, as in
+applyPricingStatusFilter(). Unmapped items only count under 'all' and
+'hospital_category', since they have no tariff to place them by.
+
+Each row holds
+
+    tariffs, unmapped_tariffs     tariff codes, and those no item maps to
+    items, unmapped_items,        hospital items, those without a current
+    priced_items                  tariff and those with a cash price
+    below_tariff, at_tariff,      priced mapped items whose cash price is below,
+    above_tariff                  equal to (to the cent) or above the tariff
+    tariff_*, price_*,            min, p25, median, p75, p90, max and mean of the
+    pct_of_tariff_*               tariffs, the cash prices, and the cash price
+                                  as a percentage of the tariff
+
+Percentiles are interpolated between ranks, as PERCENTILE_CONT does. Prices
+are kept in exact cents until they are written. Without hospital prices
+the cube still has the tariff columns, and every tariff is unmapped.
+"""
+
+import csv
+import os
+from collections import defaultdict
+from decimal import InvalidOperation
+
+from nhis_data.history import cents
+from nhis_data.lookup import gdrg_category
+from nhis_data.rules import get_procedure_type
+
+DIMENSIONS = ['all', 'category', 'form', 'mdc_category', 'age_category', 'procedure_type', 'hospital_category']
+PERCENTILES = [('min', 0), ('p25', 25), ('median', 50), ('p75', 75), ('p90', 90), ('max', 100)]
+STATISTICS = [name for name, _ in PERCENTILES] + ['mean']
+# Metric -> the divisor from its stored values (cents, percent) to what is written
+METRICS = {'tariff': 100, 'price': 100, 'pct_of_tariff': 1}
+COUNT_FIELDS = ['tariffs', 'unmapped_tariffs', 'items', 'unmapped_items', 'priced_items',
+                'below_tariff', 'at_tariff', 'above_tariff']
+STAT_FIELDS = [f'{metric}_{name}' for metric in METRICS for name in STATISTICS]
+FIELDNAMES = ['dimension', 'value'] + COUNT_FIELDS + STAT_FIELDS
+
+# Typed columns for --format parquet/arrow
+COLUMN_TYPES = {
+    'dimension': 'category',
+    'value': 'category',
+    **{name: 'count' for name in COUNT_FIELDS},
+    **{name: 'decimal' for name in STAT_FIELDS},
+}
+
+
+def price_cents(text):
+    """Exact cents of a price cell; None for a blank or a cell that is not a number."""
+    try:
+        return cents(text)
+    except InvalidOperation:
+        return None
+
+
+def percentile(values, q):
+    """The q-th percentile of sorted values, interpolated linearly between ranks."""
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def tariff_groups(nhis, gdrg, forms=None):
+    """
+    code -> (tariff in cents or None, [(dimension, value), ...]) of the
+    medicines and G-DRG TariffTables; the first occurrence of a code wins,
+    medicines first. forms is {nhis_code: form} from the drug import.
+    """
+    forms = forms or {}
+    tariffs = {}
+    for row in nhis.first_rows():
+        code = nhis.codes[row]
+        groups = [('all', ''), ('category', nhis.categories[row] or 'medicine'), ('form', forms.get(code, ''))]
+        tariffs[code] = (price_cents(nhis.price_text[row]), groups)
+    for row in gdrg.first_rows():
+        code = gdrg.codes[row]
+        if code in tariffs:
+            continue
+        mdc_category = gdrg.categories[row]
+        category = gdrg_category(mdc_category)
+        groups = [('all', ''), ('category', category), ('mdc_category', mdc_category),
+                  ('age_category', gdrg.age_categories[row])]
+        if category == 'procedure':
+            groups.append(('procedure_type', get_procedure_type(gdrg.names[row], gdrg.price_text[row])))
+        tariffs[code] = (price_cents(gdrg.price_text[row]), groups)
+    return {
+        code: (price, [(dimension, value) for dimension, value in groups if value or dimension == 'all'])
+        for code, (price, groups) in tariffs.items()
+    }
+
+
+def read_prices(path):
+    """
+    (category, nhis code, cash price in cents or None) of each row of a
+    pricing dashboard export; no rows if there is no export.
+    """
+    if not path or not os.path.exists(path):
+        return []
+    items = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            # Headers as the dashboard import reads them: trimmed, any case
+            row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+            code = row['nhis code'] if 'nhis code' in row else row.get('code', '')
+            cash = price_cents(row.get('cash price'))
+            items.append((row.get('category', ''), code, cash if cash and cash > 0 else None))
+    return items
+
+
+def _new_group():
+    return {
+        'codes': set(), 'mapped': set(), 'items': 0, 'unmapped_items': 0,
+        'below_tariff': 0, 'at_tariff': 0, 'above_tariff': 0,
+        'tariff': [], 'price': [], 'pct_of_tariff': [],
+    }
+
+
+def statistics(metric, values):
+    """The STATISTICS columns of a metric for its values, as text; blank when there are none."""
+    if not values:
+        return {f'{metric}_{name}': '' for name in STATISTICS}
+    values = sorted(values)
+    stats = {f'{metric}_{name}': percentile(values, q) for name, q in PERCENTILES}
+    stats[f'{metric}_mean'] = sum(values) / len(values)
+    return {key: f'{value / METRICS[metric]:.2f}' for key, value in stats.items()}
+
+
+def build_cube(tariffs, items):
+    """Rows of the cube (dicts of FIELDNAMES), in DIMENSIONS order and then by value."""
+    groups = defaultdict(_new_group)
+    for code, (price, keys) in tariffs.items():
+        for key in keys:
+            groups[key]['codes'].add(code)
+            if price is not None:
+                groups[key]['tariff'].append(price)
+
+    for category, code, cash in items:
+        tariff = tariffs.get(code)
+        keys = list(tariff[1]) if tariff is not None else [('all', '')]
+        if category:
+            keys.append(('hospital_category', category))
+        price = tariff[0] if tariff is not None else None
+        side = None
+        if cash is not None and price:
+            side = 'below_tariff' if cash < price else 'at_tariff' if cash == price else 'above_tariff'
+        for key in keys:
+            group = groups[key]
+            group['items'] += 1
+            if tariff is None:
+                group['unmapped_items'] += 1
+            else:
+                group['mapped'].add(code)
+            if cash is not None:
+                group['price'].append(cash)
+            if side is not None:
+                group['pct_of_tariff'].append(cash * 100 / price)
+                group[side] += 1
+
+    order = {dimension: i for i, dimension in enumerate(DIMENSIONS)}
+    rows = []
+    for dimension, value in sorted(groups, key=lambda key: (order[key[0]], key[1])):
+        group = groups[(dimension, value)]
+        row = {
+            'dimension': dimension,
+            'value': value,
+            'tariffs': len(group['codes']),
+            'unmapped_tariffs': len(group['codes'] - group['mapped']),
+            'items': group['items'],
+            'unmapped_items': group['unmapped_items'],
+            'priced_items': len(group['price']),
+            'below_tariff': group['below_tariff'],
+            'at_tariff': group['at_tariff'],
+            'above_tariff': group['above_tariff'],
+        }
+        for metric in METRICS:
+            row.update(statistics(metric, group[metric]))
+        rows.append(row)
+    return rows
@@ -0,0 +1,162 @@
+"""
+Keyword tables for classifying NHIS lab tests, procedures and drugs.
+
+Each table lists its rules in priority order; the first rule with a keyword
+found in the (lowercased) name wins, exactly like the if/elif ladders the
+converters used to carry. The tables are compiled once per process into a
+RuleEngine, so every label for a name comes out of a single scan.
+The *_RULES_VERSION digests key the converters' classification memo, so
+editing a table invalidates the results memoised under the old one.
+"""
+
+from nhis_data.matcher import RuleEngine, RuleSet
+from nhis_data.memo import rules_version
+
+IMAGING_KEYWORDS = ['x-ray', 'xray', 'ct scan', 'mri', 'ultrasound', 'scan', 'mammogram', 'doppler']
+
+# Lab test category (convert_gdrg_to_lab_import.py)
+LAB_CATEGORY_RULES = [
+    ('Imaging', IMAGING_KEYWORDS + ['barium', 'urography', 'venogram', 'myelogram', 'sialogram', 'cystogram', 'fistulogram', 'ductologram', 'hysterosalpingogram', 'urethrogram', 'cholangiography']),
+    ('Hematology', ['blood count', 'fbc', 'haemoglobin', 'hemoglobin', 'hematocrit', 'platelet', 'reticulocyte', 'esr', 'bleeding', 'clotting', 'prothrombin', 'factor viii', 'factor ix', 'sickling', 'electrophoresis', 'bone marrow', 'coombs', 'blood grouping', 'grouping', 'rh typing', 'leucocyte', 'wbc', 'aec']),
+    ('Biochemistry', ['glucose', 'sugar', 'urea', 'creatinine', 'electrolyte', 'sodium', 'potassium', 'chloride', 'calcium', 'phosphorus', 'magnesium', 'bilirubin', 'protein', 'albumin', 'cholesterol', 'triglyceride', 'lipid', 'hdl', 'ldl', 'vldl', 'lft', 'alt', 'ast', 'ggt', 'alkaline phosphatase', 'ldh', 'amylase', 'uric acid', 'iron', 'ferritin', 'tibc', 'renal function', 'ogtt', 'hba1c', 'glycosylated']),
+    ('Microbiology', ['c/s', 'culture', 'sensitivity', 'swab', 'stool', 'urine c/', 'csf', 'fungal']),
+    ('Serology', ['hiv', 'hepatitis', 'hbsag', 'hbv', 'vdrl', 'widal', 'aso', 'rheumatoid', 'le cell', 'cd4', 'viral serology', 'anti-streptolysin', 'c reactive', 'typhi dot', 'helicobacter']),
+    ('Hormones', ['hormone', 'fsh', 'lh', 'tsh', 'thyroid', 't3', 't4', 'ft3', 'ft4', 'prolactin', 'testosterone', 'estrogen', 'progesterone', 'cortisol', 'acth', 'dhea', 'hcg', 'beta-human']),
+    ('Tumor Markers', ['psa', 'cea', 'afp', 'alpha-fetoprotein', 'cancer antigen', 'ca 19']),
+    ('Parasitology', ['malaria', 'parasite', 'trophozoite', 'skin snip', 'skin scrapping']),
+    ('Histopathology', ['histopathology', 'biopsy', 'cytology', 'pap smear', 'fine needle', 'immunostaining']),
+    ('Cardiac', ['ecg', 'troponin', 'ck-mb', 'creatine kinase', 'holter', 'myocardial']),
+    ('Special Tests', ['g6pd', 'heinz', 'guthrie', 'semen', 'pregnancy', 'arterial blood gas', 'abg', 'pulmonary function', 'eeg', 'gonioscopy', 'keratometry', 'a-scan', 'biomicroscopy', 'vitality', 'vct']),
+    ('Urinalysis', ['urine', '24hr', 'bence jones']),
+]
+
+# Lab sample type; None means imaging/recording with no sample
+LAB_SAMPLE_RULES = [
+    ('Urine', ['urine', '24hr urine']),
+    ('Stool', ['stool']),
+    ('CSF', ['csf', 'cerebrospinal']),
+    ('Swab', ['swab', 'hvs', 'high vaginal']),
+    ('Sputum', ['sputum']),
+    ('Tissue', ['biopsy', 'tissue', 'aspirate', 'bone marrow']),
+    ('Skin', ['skin scrapping', 'skin snip']),
+    ('Semen', ['semen']),
+    (None, IMAGING_KEYWORDS + ['ecg', 'eeg', 'holter']),
+    ('Blood', ['blood', 'serum', 'plasma', 'haemoglobin', 'fbc', 'glucose', 'sugar', 'urea', 'creatinine', 'electrolyte', 'cholesterol', 'lipid', 'lft', 'hormone', 'hiv', 'hepatitis', 'grouping']),
+]
+
+# Lab turnaround time per category, with keyword overrides inside a category
+LAB_TURNAROUND_TIMES = {
+    'Imaging': ([('24 hours', ['mri', 'ct scan'])], '2 hours'),
+    'Hematology': ([], '2 hours'),
+    'Biochemistry': ([], '4 hours'),
+    'Microbiology': ([], '48-72 hours'),
+    'Serology': ([], '24 hours'),
+    'Hormones': ([], '24 hours'),
+    'Tumor Markers': ([], '24-48 hours'),
+    'Histopathology': ([], '5-7 days'),
+    'Cardiac': ([('30 minutes', ['ecg'])], '4 hours'),
+}
+DEFAULT_TURNAROUND_TIME = '24 hours'
+
+# Procedures that are minor regardless of price (convert_gdrg_to_procedure_import.py)
+MINOR_PROCEDURE_KEYWORDS = [
+    'extraction', 'filling', 'scaling', 'polishing', 'dressing',
+    'catheter', 'circumcision', 'bandaging', 'cast', 'pop',
+    'incision and drainage', 'i & d', 'nail avulsion', 'removal of foreign body',
+    'examination', 'biopsy', 'excision biopsy', 'detention', 'observation',
+    'opd procedure', 'manual reduction', 'pessary insertion',
+]
+MINOR_PROCEDURE_PRICE = 400
+
+# Drug form (convert_nhis_to_drug_import.py)
+DRUG_FORM_RULES = [
+    ('tablet', ['tablet', 'tab']),
+    ('capsule', ['capsule', 'cap']),
+    ('syrup', ['syrup', 'syr']),
+    ('suspension', ['suspension', 'susp']),
+    ('injection', ['injection', 'inj']),
+    ('cream', ['cream']),
+    ('ointment', ['ointment']),
+    ('drops', ['drops', 'drop']),
+    ('inhaler', ['inhaler']),
+    ('patch', ['patch']),
+    ('other', ['powder', 'granul']),
+    ('other', ['lotion', 'solution']),
+    ('other', ['suppository', 'supp']),
+]
+
+# Drug category by common drug names
+DRUG_CATEGORY_RULES = [
+    ('antibiotics', ['amoxicillin', 'ampicillin', 'penicillin', 'cephalosporin', 'cefuroxime', 'ceftriaxone', 'azithromycin', 'erythromycin', 'metronidazole', 'ciprofloxacin', 'gentamicin', 'cloxacillin', 'flucloxacillin', 'doxycycline', 'tetracycline', 'cotrimoxazole', 'chloramphenicol']),
+    ('analgesics', ['paracetamol', 'ibuprofen', 'diclofenac', 'aspirin', 'tramadol', 'morphine', 'codeine', 'pethidine', 'acetylsalicylic']),
+    ('antivirals', ['acyclovir', 'zidovudine', 'lamivudine', 'efavirenz', 'nevirapine', 'tenofovir', 'abacavir']),
+    ('antifungals', ['fluconazole', 'ketoconazole', 'nystatin', 'clotrimazole', 'miconazole', 'griseofulvin']),
+    ('cardiovascular', ['amlodipine', 'atenolol', 'propranolol', 'nifedipine', 'lisinopril', 'enalapril', 'losartan', 'digoxin', 'furosemide', 'hydrochlorothiazide', 'aspirin', 'warfarin', 'heparin', 'clopidogrel']),
+    ('diabetes', ['metformin', 'glibenclamide', 'gliclazide', 'insulin', 'glimepiride']),
+    ('respiratory', ['salbutamol', 'aminophylline', 'theophylline', 'beclomethasone', 'budesonide', 'prednisolone', 'hydrocortisone']),
+    ('gastrointestinal', ['omeprazole', 'ranitidine', 'antacid', 'magnesium trisilicate', 'metoclopramide', 'domperidone', 'loperamide', 'oral rehydration']),
+    ('neurological', ['diazepam', 'phenytoin', 'carbamazepine', 'phenobarbital', 'valproate', 'levodopa']),
+    ('psychiatric', ['amitriptyline', 'fluoxetine', 'haloperidol', 'chlorpromazine', 'risperidone', 'olanzapine']),
+    ('dermatological', ['hydrocortisone cream', 'betamethasone', 'calamine', 'benzoyl peroxide', 'permethrin', 'benzyl benzoate']),
+    ('vaccines', ['vaccine', 'immunoglobulin', 'tetanus', 'hepatitis']),
+    ('vitamins', ['vitamin', 'folic acid', 'ferrous', 'iron', 'calcium', 'zinc', 'multivitamin']),
+]
+
+_lab_tables = {
+    'category': RuleSet(LAB_CATEGORY_RULES, 'General'),
+    'sample_type': RuleSet(LAB_SAMPLE_RULES, 'Blood'),
+}
+for _category, (_rules, _default) in LAB_TURNAROUND_TIMES.items():
+    _lab_tables['turnaround:' + _category] = RuleSet(_rules, _default)
+
+LAB_ENGINE = RuleEngine(_lab_tables)
+
+PROCEDURE_ENGINE = RuleEngine({
+    'minor': RuleSet([(True, MINOR_PROCEDURE_KEYWORDS)], False),
+})
+
+DRUG_ENGINE = RuleEngine({
+    'form': RuleSet(DRUG_FORM_RULES, 'other'),
+    'category': RuleSet(DRUG_CATEGORY_RULES, 'other'),
+})
+
+LAB_RULES_VERSION = rules_version(LAB_CATEGORY_RULES, LAB_SAMPLE_RULES, LAB_TURNAROUND_TIMES, DEFAULT_TURNAROUND_TIME)
+PROCEDURE_RULES_VERSION = rules_version(MINOR_PROCEDURE_KEYWORDS, MINOR_PROCEDURE_PRICE)
+
+
+def classify_test(name):
+    """Return (category, sample_type, turnaround_time) for a lab test name."""
+    labels = LAB_ENGINE.classify(name)
+    category = labels['category']
+    turnaround_time = labels.get('turnaround:' + category, DEFAULT_TURNAROUND_TIME)
+    return category, labels['sample_type'], turnaround_time
+
+
+def categorize_test(name):
+    return classify_test(name)[0]
+
+
+def get_sample_type(name):
+    return classify_test(name)[1]
+
+
+def get_turnaround_time(category, name):
+    labels = LAB_ENGINE.classify(name)
+    return labels.get('turnaround:' + category, DEFAULT_TURNAROUND_TIME)
+
+
+def get_procedure_type(name, price):
+    """Minor if the name has a minor keyword or the price is under the threshold."""
+    # Its only rule is 'minor', so any match decides; scan() skips building the labels
+    if PROCEDURE_ENGINE.scan(name)[0] is not None:
+        return 'minor'
+    price_val = float(price) if price else 0
+    if price_val < MINOR_PROCEDURE_PRICE:
+        return 'minor'
+    return 'major'
+
+
+def classify_drug(name):
+    """Return (form, category) for a drug name."""
+    labels = DRUG_ENGINE.classify(name)
+    return labels['form'], labels['category']
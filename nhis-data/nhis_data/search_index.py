@@ -0,0 +1,211 @@
+"""
+Prefix and trigram search index over the NHIS and G-DRG tariffs, for the
+mapping screen.
+
+NhisTariffService::searchTariffs() runs LIKE '%...%' over the tariff table
+on every keystroke. The index is built once, when the tariff files are
+generated, and written to tariff_search_index.json:
+
+    entries   [[code, name, category, source, price, generic_name, strength], ...]
+              sorted by name, as searchTariffs() orders its results
+    terms     word -> [entry, ...]  the normalized words of the name, generic
+              name and strength (mapping.normalize(), so "Caps" finds "Capsule")
+    grams     trigram -> [entry, ...]  boundary-marked trigrams of those words
+
+Medicines get the generic name and strength that drug_features() derives
+for the drug import. G-DRG categories are mapped as the lookup service
+maps them: INVESTIGATION is 'lab' and the rest 'procedure'.
+
+A query is split into words the same way. Each word is scored against an
+entry by its best match:
+
+    exact word     EXACT_SCORE x the indexed word's IDF
+    word prefix    PREFIX_SCORE x the indexed word's IDF (a bisect over the
+                   sorted words)
+    trigrams       TRIGRAM_SCORE x the share of the word's trigrams the
+                   entry has, if at least MIN_TRIGRAM_SHARE; only for words
+                   that are no prefix of any indexed word, i.e. infixes
+                   ("cillin") and misspellings ("amoxycilin")
+
+The IDF (as in mapping.NameIndex) makes a rare word like "paracetamol"
+count for more than "tablet". Entries matching more of the query's words
+rank first, then by score, then by name. A query that is a code, or the start of one, ranks those
+codes above everything else. A search touches only the postings of its
+own words, so it takes well under a millisecond.
+"""
+
+import heapq
+import json
+import math
+import os
+from bisect import bisect_left
+from collections import defaultdict
+
+from nhis_data.drugs import drug_features, repair_name
+from nhis_data.lookup import gdrg_category
+from nhis_data.manifest import guess_engine
+from nhis_data.mapping import normalize
+
+INDEX_VERSION = 1
+ENTRY_FIELDS = ['code', 'name', 'category', 'source', 'price', 'generic_name', 'strength']
+
+CODE_SCORE = 10.0
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+TRIGRAM_SCORE = 1.0
+MIN_TRIGRAM_SHARE = 0.5
+
+
+def trigrams(word):
+    """Boundary-marked character trigrams of a word, as mapping.features() makes them."""
+    padded = f'<{word}>'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def tariff_entries(nhis_rows, gdrg_rows, engine=None):
+    """
+    Index entries of the medicines and G-DRG rows; the first occurrence of a
+    code wins, medicines first. engine is the extract_nhis_ml.py engine that
+    wrote the medicines rows (see manifest.tariff_engine()), guessed from the
+    rows if not given.
+    """
+    nhis_rows = [row for row in nhis_rows if row['nhis_code'].strip()]
+    # Names from the text engine were cut at the column edge, as in convert_nhis_to_drug_import.py
+    layout = (engine or guess_engine(nhis_rows)) == 'layout'
+    names = [row['name'] if layout else repair_name(row['name'], row.get('unit', '')) for row in nhis_rows]
+    features = drug_features(names, [row['unit'] for row in nhis_rows] if layout else None)
+
+    entries = {}
+    for i, row in enumerate(nhis_rows):
+        price = row.get('price', '').strip()
+        entries.setdefault(row['nhis_code'].strip(), [
+            row['nhis_code'].strip(), row['name'], row.get('category', ''), 'nhis', float(price) if price else None,
+            features['generic_name'][i], features['strength'][i],
+        ])
+    for row in gdrg_rows:
+        price = row.get('tariff_price', '').strip()
+        entries.setdefault(row['code'].strip(), [
+            row['code'].strip(), row['name'], gdrg_category(row.get('mdc_category', '')), 'gdrg',
+            float(price) if price else None, '', '',
+        ])
+    entries.pop('', None)
+    return sorted(entries.values(), key=lambda entry: (entry[1].lower(), entry[0]))
+
+
+def build_index(nhis_rows, gdrg_rows, engine=None):
+    """The serializable index ({version, fields, entries, terms, grams}) of the tariff rows."""
+    entries = tariff_entries(nhis_rows, gdrg_rows, engine)
+    terms = defaultdict(list)
+    grams = defaultdict(list)
+    for i, entry in enumerate(entries):
+        words = set(normalize(f'{entry[1]} {entry[5]} {entry[6]}'))
+        for word in words:
+            terms[word].append(i)
+        for gram in set().union(*(trigrams(word) for word in words if len(word) > 2 and not word[0].isdigit())):
+            grams[gram].append(i)
+    return {
+        'version': INDEX_VERSION,
+        'fields': ENTRY_FIELDS,
+        'entries': entries,
+        'terms': dict(sorted(terms.items())),
+        'grams': dict(sorted(grams.items())),
+    }
+
+
+def write_index(index, path):
+    """Write the index as compact JSON, replacing path only once it is complete."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+class SearchIndex:
+    """Ranked search over a built index."""
+
+    def __init__(self, index):
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f"search index version {index.get('version')}; expected {INDEX_VERSION}, rebuild it")
+        self.entries = [dict(zip(index['fields'], entry)) for entry in index['entries']]
+        self.terms = index['terms']
+        self.grams = index['grams']
+        self.words = sorted(self.terms)
+        total = len(self.entries)
+        self.idf = {word: math.log((total + 1) / (len(ids) + 1)) + 1 for word, ids in self.terms.items()}
+        self.codes = sorted((entry['code'].upper(), i) for i, entry in enumerate(self.entries))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _words_from(self, prefix):
+        """The indexed words that start with prefix."""
+        words = self.words
+        start = bisect_left(words, prefix)
+        end = start
+        while end < len(words) and words[end].startswith(prefix):
+            end += 1
+        return words[start:end]
+
+    def _word_scores(self, word):
+        """{entry: score} of one query word."""
+        scores = {}
+        prefixed = self._words_from(word)
+        for term in prefixed:
+            score = (EXACT_SCORE if term == word else PREFIX_SCORE) * self.idf[term]
+            for i in self.terms[term]:
+                if scores.get(i, 0) < score:
+                    scores[i] = score
+        if prefixed or len(word) < 3 or word[0].isdigit():
+            return scores
+
+        grams = trigrams(word)
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in self.grams.get(gram, ()):
+                shared[i] += 1
+        for i, n in shared.items():
+            share = n / len(grams)
+            if share >= MIN_TRIGRAM_SHARE:
+                scores[i] = TRIGRAM_SCORE * share
+        return scores
+
+    def search(self, query, category=None, limit=50):
+        """
+        The best `limit` entries for a query, best first, as dicts of
+        ENTRY_FIELDS plus 'score'; only those of `category` if given.
+        """
+        matched = defaultdict(int)
+        scores = defaultdict(float)
+        words = list(dict.fromkeys(normalize(query)))
+        for word in words:
+            for i, score in self._word_scores(word).items():
+                matched[i] += 1
+                scores[i] += score
+
+        code = query.strip().upper()
+        if code and ' ' not in code:
+            for prefix_code, i in self._codes_from(code):
+                matched[i] = len(words) + 1
+                scores[i] += CODE_SCORE if prefix_code == code else CODE_SCORE / 2
+
+        entries = self.entries
+        ranked = heapq.nsmallest(
+            limit,
+            (i for i in scores if category is None or entries[i]['category'] == category),
+            key=lambda i: (-matched[i], -scores[i], i),
+        )
+        return [dict(entries[i], score=round(scores[i], 3)) for i in ranked]
+
+    def _codes_from(self, prefix):
+        """(code, entry) of the codes that start with prefix."""
+        codes = self.codes
+        start = bisect_left(codes, (prefix,))
+        end = start
+        while end < len(codes) and codes[end][0].startswith(prefix):
+            end += 1
+        return codes[start:end]
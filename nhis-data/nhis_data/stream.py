@@ -0,0 +1,74 @@
+"""
+Chunked, single-pass plumbing for the converters.
+
+A converter is a pipeline over its input: read -> filter -> enrich ->
+write. The input is read lazily, CHUNK_ROWS rows at a time. Each chunk is
+filtered and enriched (the batch rules, such as drug_features(), run on
+the whole chunk), then handed to every writer, and the breakdown counters
+are updated from it. Peak memory therefore depends on the chunk size, not
+on the input size, and the input is read exactly once. Only per-code
+state is kept across chunks: the codes already seen, to drop duplicates,
+and the previous tariff file in --previous mode.
+"""
+
+import time
+from collections import Counter, deque
+
+from nhis_data.formats import iter_table
+
+CHUNK_ROWS = 2048
+
+
+def chunked(rows, size=CHUNK_ROWS):
+    """Lists of up to `size` consecutive rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def in_order(pool, fn, tasks, window):
+    """fn(task) for each task, computed in the pool with at most `window` in flight; results in task order."""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def read_chunks(path, metrics=None, size=CHUNK_ROWS):
+    """
+    Chunks of the rows of a CSV, Parquet or Arrow file. With a Metrics, the
+    time spent reading goes into the 'read' phase and the rows are counted.
+    """
+    chunks = chunked(iter_table(path), size)
+    while True:
+        started = time.perf_counter()
+        chunk = next(chunks, None)
+        if metrics is not None:
+            metrics.add_time('read', time.perf_counter() - started)
+        if chunk is None:
+            return
+        if metrics is not None:
+            metrics.count('read', len(chunk))
+        yield chunk
+
+
+class Tally:
+    """Running counts of the values of some output columns, for the breakdowns."""
+
+    def __init__(self, *fields):
+        self.counts = {field: Counter() for field in fields}
+
+    def update(self, rows):
+        for field, counter in self.counts.items():
+            counter.update(row[field] for row in rows)
+
+    def __getitem__(self, field):
+        return self.counts[field]
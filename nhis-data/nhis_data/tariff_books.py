@@ -0,0 +1,84 @@
+"""
+Batch extraction of several G-DRG tariff books (one per facility tier).
+
+NHIA publishes a book per facility tier and region, named like
+
+    Private Primary Care Hospital (Catering Exclusive) Tariff JAN 2023-1.docx
+
+The tier and the effective date (the first of the month) come from the
+file name. Each book is parsed by the XML reader in its own worker
+process, so the whole batch takes about as long as its slowest book.
+Every row is tagged with its book's tier and effective_date. The rows
+are then consolidated into one table keyed by (code, tier,
+effective_date), or written as one file per book.
+"""
+
+import glob
+import os
+import re
+import time
+
+from nhis_data.gdrg import COLUMN_TYPES, FIELDNAMES, iter_tariffs, iter_xml_cell_rows
+
+BATCH_FIELDNAMES = FIELDNAMES + ['tier', 'effective_date']
+BATCH_COLUMN_TYPES = dict(COLUMN_TYPES, tier='category', effective_date='category')
+
+BOOK_NAME_RE = re.compile(r'^(?P<tier>.+?)\s+Tariff\s+(?P<month>[A-Za-z]+)\.?\s+(?P<year>\d{4})\b', re.IGNORECASE)
+MONTHS = {name: i for i, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+
+def book_info(path):
+    """(tier, effective_date) from a book's file name; ('<file stem>', '') if it does not follow the pattern."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = BOOK_NAME_RE.match(stem)
+    month = MONTHS.get(match.group('month')[:3].lower()) if match else None
+    if month is None:
+        return stem, ''
+    return match.group('tier').strip(), f"{match.group('year')}-{month:02d}-01"
+
+
+def find_books(pattern):
+    """The .docx files of a directory, or the files a glob pattern matches, sorted."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.docx')
+    return sorted(path for path in glob.glob(pattern) if not os.path.basename(path).startswith('~$'))
+
+
+def extract_book(path):
+    """(path, tagged records, seconds) of one book; runs in a worker process."""
+    started = time.perf_counter()
+    tier, effective_date = book_info(path)
+    records = []
+    for record in iter_tariffs(iter_xml_cell_rows(path)):
+        record['tier'] = tier
+        record['effective_date'] = effective_date
+        records.append(record)
+    return path, records, time.perf_counter() - started
+
+
+def extract_books(paths, jobs=None):
+    """[(path, records, seconds), ...] in the order of paths, parsed in up to `jobs` processes."""
+    if len(paths) <= 1 or jobs == 1:
+        return [extract_book(path) for path in paths]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(paths))) as pool:
+        return list(pool.map(extract_book, paths))
+
+
+def consolidate(results):
+    """
+    One row per (code, tier, effective_date), in book order. Within a book the
+    first occurrence of a code wins, as TariffTable.row_for() does.
+    """
+    seen = set()
+    rows = []
+    for _, records, _ in results:
+        for record in records:
+            key = (record['code'], record['tier'], record['effective_date'])
+            if key not in seen:
+                seen.add(key)
+                rows.append(record)
+    return rows
@@ -0,0 +1,132 @@
+"""
+Columnar, read-only view of a generated tariff file (gdrg_tariffs_import.csv
+or nhis_tariffs_import.csv, or their Parquet/Arrow versions).
+
+The converters stream their input (nhis_data.stream), but the claim-price
+lookup, the claim checks and the price cube need the whole table with
+random access by code. They used to build a dict per row each, from the
+same files. This table is loaded once and stores each column once: codes
+and names as lists, categories and age categories as interned strings,
+prices as an array of doubles next to their CSV text. It keeps two
+indexes:
+
+  * code -> row of the first occurrence of that code (blank codes are
+    not indexed), which is the occurrence every consumer uses
+  * category -> list of (start, stop) row ranges (categories come in
+    contiguous blocks in the tariff book, so this is usually one range)
+
+A Parquet or Arrow file is read from its typed columns: prices come
+straight from the decimal column instead of float() on every cell.
+"""
+
+import sys
+from array import array
+
+from nhis_data.formats import float_column, format_of, iter_table, read_arrow, text_column
+
+# file layout -> (code column, price column, category column)
+LAYOUTS = {
+    'nhis': ('nhis_code', 'price', 'category'),
+    'gdrg': ('code', 'tariff_price', 'mdc_category'),
+}
+
+
+class TariffTable:
+    def __init__(self, layout='gdrg'):
+        self.layout = layout
+        self.codes = []
+        self.names = []
+        self.categories = []
+        self.age_categories = []
+        self.price_text = []
+        self.prices = array('d')
+        self.code_index = {}
+        self.category_ranges = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_records(cls, records, layout='gdrg'):
+        table = cls(layout)
+        for record in records:
+            table.append(record)
+        return table
+
+    @classmethod
+    def from_arrow(cls, arrow, layout='gdrg'):
+        columns = {name: text_column(arrow, name) for name in arrow.column_names}
+        prices = float_column(arrow, LAYOUTS[layout][1])
+        names = list(columns)
+        table = cls(layout)
+        for values, price in zip(zip(*columns.values()), prices):
+            table.append(dict(zip(names, values)), price)
+        return table
+
+    @classmethod
+    def from_path(cls, path, layout='gdrg'):
+        """Table of a tariff CSV, Parquet or Arrow file, by extension."""
+        if format_of(path) == 'csv':
+            return cls.from_records(iter_table(path), layout)
+        return cls.from_arrow(read_arrow(path), layout)
+
+    def append(self, record, price_value=None):
+        code_field, price_field, category_field = LAYOUTS[self.layout]
+        row = len(self.codes)
+        code = record[code_field].strip()
+        category = sys.intern(record.get(category_field, ''))
+        price = record.get(price_field, '').strip()
+        if price_value is None:
+            price_value = float(price) if price else 0.0
+
+        self.codes.append(code)
+        self.names.append(record.get('name', ''))
+        self.categories.append(category)
+        self.age_categories.append(sys.intern(record.get('age_category', '')))
+        self.price_text.append(price)
+        self.prices.append(price_value)
+        if code:
+            self.code_index.setdefault(code, row)
+
+        ranges = self.category_ranges.setdefault(category, [])
+        if ranges and ranges[-1][1] == row:
+            ranges[-1] = (ranges[-1][0], row + 1)
+        else:
+            ranges.append((row, row + 1))
+
+    def rows_in(self, *categories):
+        """Row numbers in any of the given categories, in file order."""
+        rows = []
+        for category in categories:
+            for start, stop in self.category_ranges.get(category, ()):
+                rows.extend(range(start, stop))
+        rows.sort()
+        return rows
+
+    def row_for(self, code):
+        """Row of the first occurrence of a code, or None."""
+        return self.code_index.get(code)
+
+    def first_rows(self):
+        """Rows of the first occurrence of each code, in file order."""
+        return self.code_index.values()
+
+    def price(self, row):
+        """Price of a row as a float, None when its cell is blank."""
+        return self.prices[row] if self.price_text[row] else None
+
+    def category_stats(self):
+        """{category: {count, min, max, total}} from one pass over the columns."""
+        stats = {}
+        for category, price in zip(self.categories, self.prices):
+            entry = stats.get(category)
+            if entry is None:
+                stats[category] = {'count': 1, 'min': price, 'max': price, 'total': price}
+                continue
+            entry['count'] += 1
+            entry['total'] += price
+            if price < entry['min']:
+                entry['min'] = price
+            if price > entry['max']:
+                entry['max'] = price
+        return stats
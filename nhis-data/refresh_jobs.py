@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Run nhis-data refreshes as background jobs.
+The tool lives in nhis_data/commands/refresh_jobs.py.
+"""
+
+from nhis_data.commands.refresh_jobs import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
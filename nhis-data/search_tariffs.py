@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Build and query the tariff search index.
+The tool lives in nhis_data/commands/search_tariffs.py.
+"""
+
+from nhis_data.commands.search_tariffs import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
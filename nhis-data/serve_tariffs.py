@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Claim-price lookup service over the generated tariff files.
+The tool lives in nhis_data/commands/serve_tariffs.py.
+"""
+
+from nhis_data.commands.serve_tariffs import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
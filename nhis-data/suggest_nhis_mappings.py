@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Suggest NHIS codes for catalogue items that have no NHIS mapping yet.
+The tool lives in nhis_data/commands/suggest_nhis_mappings.py.
+"""
+
+from nhis_data.commands.suggest_nhis_mappings import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Precompute the tariff price cube for the pricing dashboard.
+The tool lives in nhis_data/commands/tariff_cube.py.
+"""
+
+from nhis_data.commands.tariff_cube import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Effective-dated tariff history (tariff_history.sqlite).
+The tool lives in nhis_data/commands/tariff_history.py.
+"""
+
+from nhis_data.commands.tariff_history import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
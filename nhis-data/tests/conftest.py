@@ -0,0 +1,71 @@
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+sys.path.insert(0, DATA_DIR)
+
+
+def pytest_addoption(parser):
+    parser.addoption('--nhis-scales', default='1,10,100,1000',
+                     help='comma-separated input scale factors for the nhis-data benchmarks')
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption('--nhis-scales').split(',')]
+        metafunc.parametrize('scale', scales, ids=[f'{s}x' for s in scales])
+
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def scale_rows(rows, factor, code_fields):
+    """Repeat rows `factor` times; copy k > 0 gets '-k' appended to its codes."""
+    scaled = []
+    for k in range(factor):
+        for row in rows:
+            if k:
+                row = dict(row)
+                for field in code_fields:
+                    row[field] = f'{row[field]}-{k}'
+            scaled.append(row)
+    return scaled
+
+
+def run_script(script, *args):
+    """Run an nhis-data script; return (seconds, peak RSS in KiB, stdout)."""
+    with tempfile.TemporaryFile('w+') as out, tempfile.TemporaryFile('w+') as err:
+        started = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, os.path.join(DATA_DIR, script)] + list(args),
+                                cwd=DATA_DIR, stdout=out, stderr=err)
+        # wait4 reports the resource usage of this one child
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        elapsed = time.perf_counter() - started
+        out.seek(0)
+        err.seek(0)
+        assert proc.returncode == 0, err.read()
+        return elapsed, usage.ru_maxrss, out.read()
+
+
+def assert_same_rows(actual_path, expected_rows):
+    """Compare CSV output row by row, reporting the first difference."""
+    actual = read_csv(actual_path)
+    for i, (got, want) in enumerate(zip(actual, expected_rows)):
+        assert got == want, f'row {i + 2} differs'
+    assert len(actual) == len(expected_rows)
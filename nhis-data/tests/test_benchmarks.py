@@ -0,0 +1,143 @@
+"""
+Throughput benchmarks for the nhis-data extractors, converters and their hot
+functions, on the bundled inputs and on inputs scaled up synthetically.
+
+    python -m pytest nhis-data/tests/test_benchmarks.py --nhis-scales 1,10,100,1000
+
+Each benchmark records rows (or names/pages) per second in extra_info, the
+script runs also record the child's peak RSS, and every scaled converter
+run is golden-checked, so a speed-up that changes an output fails.
+"""
+
+import os
+
+import pytest
+
+from conftest import DATA_DIR, assert_same_rows, read_csv, run_script, scale_rows, write_csv
+from test_golden import CONVERTERS
+
+pytest.importorskip('pytest_benchmark')
+
+from nhis_data.drugs import drug_features  # noqa: E402
+from nhis_data.gdrg import iter_tariffs  # noqa: E402
+from nhis_data.rules import categorize_test, classify_test, get_procedure_type  # noqa: E402
+from nhis_data.search_index import SearchIndex, build_index  # noqa: E402
+
+
+def record_throughput(benchmark, count, unit):
+    benchmark.extra_info[unit] = count
+    benchmark.extra_info[f'{unit}_per_second'] = round(count / benchmark.stats.stats.mean)
+
+
+def unique_names(names, factor):
+    """Scale a name list, tagging each copy so no two names are identical."""
+    return [name if not k else name.replace(' ', f' v{k} ', 1)
+            for k in range(factor) for name in names]
+
+
+@pytest.fixture(scope='module')
+def gdrg_rows():
+    return read_csv(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv'))
+
+
+@pytest.fixture(scope='module')
+def drug_names():
+    return [row['name'] for row in read_csv(os.path.join(DATA_DIR, 'nhis_drugs_for_import.csv'))]
+
+
+@pytest.mark.parametrize('converter', sorted(CONVERTERS))
+def test_converter_script(benchmark, converter, scale, tmp_path):
+    script, source, golden, input_codes, output_codes = CONVERTERS[converter]
+    rows = scale_rows(read_csv(os.path.join(DATA_DIR, source)), scale, input_codes)
+    scaled_input = str(tmp_path / source)
+    output = str(tmp_path / golden)
+    write_csv(scaled_input, rows)
+
+    peak = []
+
+    def run():
+        # A memo of this test's own, not the one in the source tree
+        _, rss, _ = run_script(script, '--input', scaled_input, '--output', output,
+                               '--memo-dir', str(tmp_path / 'memo'))
+        peak.append(rss)
+
+    benchmark.pedantic(run, rounds=1 if scale >= 100 else 3)
+    record_throughput(benchmark, len(rows), 'rows')
+    benchmark.extra_info['peak_rss_kib'] = max(peak)
+
+    assert_same_rows(output, scale_rows(read_csv(os.path.join(DATA_DIR, golden)), scale, output_codes))
+
+
+@pytest.mark.parametrize('script,module,args', [
+    ('extract_gdrg.py', 'lxml', ['--reader', 'xml']),
+    ('extract_gdrg.py', 'docx', ['--reader', 'docx']),
+    ('extract_nhis_ml.py', 'PyPDF2', ['--engine', 'layout']),
+    ('extract_nhis_ml.py', 'PyPDF2', ['--engine', 'text']),
+], ids=['gdrg-xml', 'gdrg-docx', 'nhis-ml-layout', 'nhis-ml-text'])
+def test_extractor_script(benchmark, script, module, args, tmp_path):
+    pytest.importorskip(module)
+    output = str(tmp_path / 'out.csv')
+    peak = []
+
+    def run():
+        _, rss, _ = run_script(script, '--no-cache', *args, '--output', output)
+        peak.append(rss)
+
+    benchmark.pedantic(run, rounds=3)
+    record_throughput(benchmark, len(read_csv(output)), 'rows')
+    benchmark.extra_info['peak_rss_kib'] = max(peak)
+
+
+def test_categorize_test(benchmark, gdrg_rows, scale):
+    names = unique_names([r['name'] for r in gdrg_rows if r['mdc_category'] == 'INVESTIGATION'], scale)
+    benchmark(lambda: [categorize_test(name) for name in names])
+    record_throughput(benchmark, len(names), 'names')
+
+
+def test_classify_test(benchmark, gdrg_rows, scale):
+    names = unique_names([r['name'] for r in gdrg_rows if r['mdc_category'] == 'INVESTIGATION'], scale)
+    benchmark(lambda: [classify_test(name) for name in names])
+    record_throughput(benchmark, len(names), 'names')
+
+
+def test_get_procedure_type(benchmark, gdrg_rows, scale):
+    items = [(r['name'], r['tariff_price']) for r in gdrg_rows if r['mdc_category'] != 'INVESTIGATION'] * scale
+    benchmark(lambda: [get_procedure_type(name, price) for name, price in items])
+    record_throughput(benchmark, len(items), 'names')
+
+
+def test_drug_features(benchmark, drug_names, scale):
+    names = unique_names(drug_names, scale)
+    benchmark(drug_features, names)
+    record_throughput(benchmark, len(names), 'names')
+
+
+def test_tariff_search(benchmark, gdrg_rows, scale):
+    nhis_rows = scale_rows(read_csv(os.path.join(DATA_DIR, 'nhis_tariffs_import.csv')), scale, ['nhis_code'])
+    index = SearchIndex(build_index(nhis_rows, scale_rows(gdrg_rows, scale, ['code'])))
+    # Keystrokes of a mapping session: prefixes, codes, abbreviations and misspellings
+    queries = ['p', 'pa', 'para', 'paracetamol', 'paracetamol 500', 'amoxycilin', 'caps 250mg', 'ASUR0', 'fbc', 'x-ray']
+    benchmark(lambda: [index.search(query) for query in queries])
+    record_throughput(benchmark, len(queries), 'queries')
+
+
+def test_gdrg_row_rules(benchmark, gdrg_rows, scale):
+    cells = [[r['code'], r['name'], r['tariff_price']] for r in gdrg_rows] * scale
+    benchmark(lambda: list(iter_tariffs(cells)))
+    record_throughput(benchmark, len(cells), 'rows')
+
+
+def test_medicines_page_parser(benchmark, scale):
+    PyPDF2 = pytest.importorskip('PyPDF2')
+    from nhis_data.medicines import FIRST_PAGE, PageStitcher, parse_page
+
+    reader = PyPDF2.PdfReader(os.path.join(DATA_DIR, '2O25 NHIS ML.pdf'))
+    texts = [page.extract_text() for page in reader.pages[FIRST_PAGE:]] * scale
+
+    def run():
+        stitcher = PageStitcher()
+        records = [r for text in texts for r in stitcher.add(parse_page(text))]
+        return records + stitcher.finish()
+
+    benchmark(run)
+    record_throughput(benchmark, len(texts), 'pages')
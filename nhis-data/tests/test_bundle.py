@@ -0,0 +1,61 @@
+"""
+Validated import bundles written by the converters with --bundle.
+"""
+
+import json
+
+import pytest
+from conftest import read_csv, run_script
+
+from nhis_data.bundle import build, bundle_path, read_bundle, write_bundle
+
+
+def test_drug_rows_are_typed_and_resolved():
+    rows = [{'drug_code': 'D1', 'name': ' Amoxicillin ', 'form': 'Caps', 'category': 'Antibiotic',
+             'unit_price': '2.50', 'unit_type': 'ampoule', 'bottle_size': '100.0', 'nhis_code': ''}]
+    (record,), rejected, _ = build('drugs', rows)
+
+    assert rejected == []
+    assert record['name'] == 'Amoxicillin'
+    assert (record['form'], record['category'], record['unit_type']) == ('capsule', 'antibiotics', 'vial')
+    assert record['unit_price'] == 2.5 and record['bottle_size'] == 100
+    assert record['generic_name'] is None and record['nhis_code'] is None
+    assert (record['minimum_stock_level'], record['maximum_stock_level']) == (10, 1000)
+
+
+def test_duplicates_keep_last_row_and_rejects_are_reported():
+    rows = [
+        {'code': 'P1', 'name': 'First', 'price': '10'},
+        {'code': '', 'name': 'No code', 'price': '5'},
+        {'code': 'P2', 'name': 'Bad price', 'price': 'abc'},
+        {'code': 'P1', 'name': 'Second', 'price': '12', 'type': 'MAJOR'},
+    ]
+    records, rejected, duplicates = build('procedures', rows)
+
+    assert [(r['code'], r['name'], r['type']) for r in records] == [('P1', 'Second', 'major')]
+    assert duplicates == 1
+    assert rejected == [{'row': 3, 'error': 'Missing code'},
+                        {'row': 4, 'error': 'Invalid price (must be numeric)'}]
+
+
+def test_read_bundle_verifies_checksum(tmp_path):
+    path = str(tmp_path / 'labs.bundle.jsonl')
+    header = write_bundle(path, 'lab_services', [{'code': 'L1', 'name': 'FBC', 'price': '20', 'nhis_code': 'X1'}])
+
+    assert header['count'] == header['mapped'] == 1
+    assert read_bundle(path)[1][0]['price'] == 20.0
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'code': 'L2', 'name': 'Extra'}) + '\n')
+    with pytest.raises(ValueError, match='checksum'):
+        read_bundle(path)
+
+
+def test_converter_bundle_matches_its_csv(tmp_path):
+    output = str(tmp_path / 'drugs.csv')
+    run_script('convert_nhis_to_drug_import.py', '--output', output, '--bundle', '--no-memo')
+
+    header, records = read_bundle(bundle_path(output))
+    rows = read_csv(output)
+    assert header['kind'] == 'drugs' and header['rejected'] == []
+    assert [r['drug_code'] for r in records] == [r['drug_code'] for r in rows]
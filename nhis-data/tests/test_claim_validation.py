@@ -0,0 +1,108 @@
+"""
+Pre-submission claim checks against the generated tariff tables.
+"""
+
+import os
+
+import pytest
+
+from conftest import GOLDEN_DIR, read_csv, write_csv
+
+from nhis_data.claim_validation import ClaimTables, age_on, validate_batch
+from nhis_data.commands.validate_claims import main
+
+DUMP_DIR = os.path.join(GOLDEN_DIR, 'claims_batch')
+
+
+@pytest.fixture(scope='module')
+def tables():
+    return ClaimTables()
+
+
+def claim(claim_id, dob='1990-01-02', gdrg='', amount=''):
+    return {'id': claim_id, 'claim_check_code': f'CCC{claim_id}', 'membership_id': f'M{claim_id}',
+            'patient_dob': dob, 'date_of_attendance': '2024-03-01 08:00:00', 'gdrg_tariff_code': gdrg,
+            'gdrg_amount': amount}
+
+
+def item(claim_id, item_type, code, price):
+    return {'claim_id': claim_id, 'item_type': item_type, 'code': 'LOCAL', 'nhis_code': code, 'nhis_price': price}
+
+
+def write_dump(path, claims, items):
+    path.mkdir()
+    write_csv(str(path / 'claims.csv'), claims)
+    if items:
+        write_csv(str(path / 'items.csv'), items)
+    return str(path)
+
+
+def problems(report):
+    return [(row['claim_id'], row['code'], row['severity'], row['check']) for row in read_csv(report)]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_each_problem_is_reported_in_batch_order(tables, tmp_path, jobs):
+    dump = write_dump(tmp_path / 'dump', [
+        claim('1', gdrg='ASUR02A', amount='1475.61'),
+        claim('2', dob='2020-06-01', gdrg='ASUR02A', amount='1400'),
+        claim('3', dob=''),
+    ], [
+        item('1', 'drug', 'PARACETA1', '0.12'),
+        item('1', 'lab', 'INVE01D', ''),
+        item('2', 'drug', 'ASUR03A', ''),
+        item('2', 'procedure', 'NOSUCH', '1'),
+        item('3', 'lab', '', ''),
+        item('3', 'procedure', 'PARACETA1', '0.10'),
+    ])
+    report = str(tmp_path / 'report.csv')
+
+    summary = validate_batch(dump, report, tables, jobs=jobs, chunk_claims=1)
+
+    assert problems(report) == [
+        ('1', 'INVE01D', 'warning', 'missing_price'),
+        ('2', 'ASUR02A', 'error', 'price_mismatch'),
+        ('2', 'ASUR02A', 'error', 'age_mismatch'),
+        ('2', 'ASUR03A', 'error', 'wrong_type'),
+        ('2', 'ASUR03A', 'warning', 'not_in_catalogue'),
+        ('2', 'ASUR03A', 'warning', 'missing_price'),
+        ('2', 'ASUR03A', 'error', 'age_mismatch'),
+        ('2', 'NOSUCH', 'error', 'unknown_code'),
+        ('3', 'LOCAL', 'warning', 'unmapped'),
+        ('3', 'PARACETA1', 'error', 'wrong_type'),
+        ('3', 'PARACETA1', 'warning', 'not_in_catalogue'),
+        ('3', 'PARACETA1', 'error', 'price_mismatch'),
+    ]
+    assert (summary['claims'], summary['with_errors'], summary['with_warnings']) == (3, 2, 3)
+    assert summary['checks']['age_mismatch'] == 2
+
+
+def test_age_limits_follow_the_tariff_suffix(tables, tmp_path):
+    # ASUR02A is for adults (>=12 Yrs), PSUR02C its child counterpart
+    dump = write_dump(tmp_path / 'dump', [
+        claim('1', dob='2012-03-01', gdrg='ASUR02A', amount='1475.61'),
+        claim('2', dob='2012-03-02', gdrg='ASUR02A', amount='1475.61'),
+        claim('3', dob='2012-03-02', gdrg='PSUR02C', amount='1135.20'),
+    ], [])
+    report = str(tmp_path / 'report.csv')
+
+    validate_batch(dump, report, tables)
+    assert problems(report) == [('2', 'ASUR02A', 'error', 'age_mismatch')]
+
+    validate_batch(dump, report, tables, child_age_limit=13)
+    assert problems(report) == [('1', 'ASUR02A', 'error', 'age_mismatch'), ('2', 'ASUR02A', 'error', 'age_mismatch')]
+    assert age_on('2012-02-29', '2024-02-28') == 11
+    assert age_on('', '2024-02-28') is None
+
+
+def test_script_exits_with_errors_and_summarises(tmp_path, capsys):
+    report = str(tmp_path / 'report.csv')
+
+    assert main([DUMP_DIR, '--output', report]) == 1
+
+    assert problems(report) == [
+        ('2', 'OPDC06A', 'warning', 'missing_dob'),
+        ('2', 'AMOXICCA1', 'error', 'unknown_code'),
+        ('2', 'LAB1', 'warning', 'unmapped'),
+    ]
+    assert 'Checked 2 claims: 1 with errors, 1 with warnings' in capsys.readouterr().out
@@ -0,0 +1,70 @@
+"""
+Claim batch XML: the output writeXmlToStream() gives for the same batch,
+whether rendered in one process or a pool.
+"""
+
+import os
+import shutil
+
+import pytest
+
+from conftest import GOLDEN_DIR, run_script
+
+from nhis_data.claims_xml import attendance_code, prescription_unparsed, write_batch_xml
+
+DUMP_DIR = os.path.join(GOLDEN_DIR, 'claims_batch')
+
+
+def expected_xml():
+    with open(os.path.join(GOLDEN_DIR, 'claims_batch.xml'), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_batch_matches_the_service_output(jobs, tmp_path):
+    output = str(tmp_path / 'claims.xml')
+
+    assert write_batch_xml(DUMP_DIR, output, jobs=jobs, chunk_claims=1) == 2
+    with open(output, 'rb') as f:
+        assert f.read() == expected_xml()
+
+
+def test_output_parses_back_to_the_escaped_values(tmp_path):
+    etree = pytest.importorskip('lxml.etree')
+    output = str(tmp_path / 'claims.xml')
+    write_batch_xml(DUMP_DIR, output)
+
+    claim = etree.parse(output).getroot()[0]
+    # escapeXml() runs before the writer escapes, so the portal sees the entities
+    assert claim.findtext('surname') == 'Mensah &amp; Sons'
+    assert [d.findtext('ICD10') for d in claim.findall('diagnosis')] == ['O80', '']
+    assert claim.find('procedure').findtext('gdrgCode') == 'ASUR02A'
+
+
+def test_service_mappings():
+    assert [attendance_code(v) for v in ['', 'anc', 'Routine visit', 'follow-up', 'something']] == \
+        ['EAE', 'ANC', 'EAE', 'REV', 'EAE']
+    assert prescription_unparsed({'dose': '2', 'frequency': 'bd', 'prescription_duration': '5days'}) == '2 BD X 5DAYS'
+    assert prescription_unparsed({'dose': '0'}) == ''
+
+
+def test_rows_out_of_claim_order_are_refused(tmp_path):
+    dump = tmp_path / 'dump'
+    shutil.copytree(DUMP_DIR, dump)
+    lines = (dump / 'items.csv').read_text(encoding='utf-8').splitlines(keepends=True)
+    (dump / 'items.csv').write_text(lines[0] + lines[3] + lines[1] + lines[2] + lines[4], encoding='utf-8')
+    output = str(tmp_path / 'claims.xml')
+
+    with pytest.raises(ValueError, match='not in claims.csv order'):
+        write_batch_xml(str(dump), output)
+    assert os.listdir(tmp_path) == ['dump']
+
+
+def test_script_writes_the_batch(tmp_path):
+    dump = tmp_path / 'dump'
+    shutil.copytree(DUMP_DIR, dump)
+
+    _, _, stdout = run_script('export_claims_xml.py', str(dump), '--jobs', '2')
+
+    assert f'Created {dump / "claims.xml"} with 2 claims' in stdout
+    assert (dump / 'claims.xml').read_bytes() == expected_xml()
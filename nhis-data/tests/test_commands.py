@@ -0,0 +1,55 @@
+"""
+The command modules: dispatch through python -m nhis_data and a --help that
+does not load the PDF, docx, Arrow or process-pool machinery.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import DATA_DIR, read_csv
+
+from nhis_data.commands import COMMANDS
+from nhis_data.pipeline import PACKAGE_DIR, package_fingerprint
+
+HEAVY_MODULES = ['PyPDF2', 'docx', 'lxml', 'pyarrow', 'concurrent.futures.process', 'cProfile', 'tracemalloc']
+
+
+@pytest.mark.parametrize('name', sorted(COMMANDS))
+def test_help_does_not_import_heavy_modules(name):
+    code = (
+        'import sys\n'
+        'from nhis_data.commands import run\n'
+        'try:\n'
+        f'    run({name!r}, ["--help"])\n'
+        'except SystemExit as e:\n'
+        '    assert e.code == 0, e.code\n'
+        f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n'
+    )
+    proc = subprocess.run([sys.executable, '-c', code], cwd=DATA_DIR, capture_output=True, text=True, check=True)
+
+    assert proc.stdout.splitlines()[-1] == ''
+    assert 'usage:' in proc.stdout
+
+
+def test_module_dispatch_runs_a_command(tmp_path):
+    output = str(tmp_path / 'lab.csv')
+    subprocess.run([sys.executable, '-m', 'nhis_data', 'convert-lab', '--output', output, '--no-memo'],
+                   cwd=DATA_DIR, capture_output=True, check=True)
+
+    assert read_csv(output) == read_csv(os.path.join(DATA_DIR, 'nhis_lab_services_for_import.csv'))
+    assert os.path.exists(str(tmp_path / 'lab.metrics.json'))
+
+
+def test_editing_a_command_module_changes_the_package_fingerprint(tmp_path):
+    package = str(tmp_path / 'nhis_data')
+    shutil.copytree(PACKAGE_DIR, package, ignore=shutil.ignore_patterns('__pycache__'))
+    before = package_fingerprint(package)
+
+    with open(os.path.join(package, 'commands', 'convert_gdrg_to_lab_import.py'), 'a', encoding='utf-8') as f:
+        f.write('# changed\n')
+
+    assert package_fingerprint(package) != before
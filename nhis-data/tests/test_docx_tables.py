@@ -0,0 +1,90 @@
+"""
+The streaming document.xml reader returns what python-docx's row.cells does.
+"""
+
+import zipfile
+
+import pytest
+
+pytest.importorskip('lxml')
+
+from nhis_data.docx_tables import iter_table_rows  # noqa: E402
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def tc(text, props=''):
+    return f'<w:tc><w:tcPr>{props}</w:tcPr><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:tc>'
+
+
+BODY = f'''
+<w:p><w:r><w:t>Before the tables</w:t></w:r></w:p>
+<w:tbl>
+  <w:tblGrid><w:gridCol/><w:gridCol/><w:gridCol/></w:tblGrid>
+  <w:tr>{tc('G-DRG')}{tc('ADULT SURGERY')}{tc('TARIFF')}</w:tr>
+  <w:tr>{tc('ASUR01A')}{tc('Merged', '<w:gridSpan w:val="2"/>')}</w:tr>
+  <w:tr>{tc('ASUR02A', '<w:vMerge w:val="restart"/>')}{tc('Hernia')}{tc('1,200.00')}</w:tr>
+  <w:tr>{tc('', '<w:vMerge/>')}{tc('Repeat')}{tc('300')}</w:tr>
+  <w:tr>
+    <w:tc><w:p><w:r><w:t>TAB</w:t><w:tab/><w:t>X</w:t><w:br/><w:t>Y</w:t><w:br w:type="page"/></w:r></w:p>
+          <w:p><w:hyperlink><w:r><w:t>link</w:t></w:r></w:hyperlink><w:r><w:noBreakHyphen/></w:r></w:p></w:tc>
+    <w:tc>
+      <w:tbl><w:tr>{tc('nested')}{tc('row')}{tc('skipped')}</w:tr></w:tbl>
+      <w:p><w:r><w:t xml:space="preserve"> outer </w:t></w:r></w:p>
+    </w:tc>
+    {tc('5')}
+  </w:tr>
+  <w:tr><w:trPr><w:gridBefore w:val="1"/></w:trPr>{tc('late')}{tc('start')}</w:tr>
+</w:tbl>
+<w:p/>
+<w:tbl><w:tr>{tc('A')}{tc('B')}{tc('C')}</w:tr></w:tbl>
+'''
+
+DOCUMENT = f'<w:document xmlns:w="{W_NS}"><w:body>{BODY}<w:sectPr/></w:body></w:document>'
+
+CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>'''
+
+RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Target="word/document.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>
+</Relationships>'''
+
+
+@pytest.fixture
+def docx_path(tmp_path):
+    path = str(tmp_path / 'tables.docx')
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('[Content_Types].xml', CONTENT_TYPES)
+        z.writestr('_rels/.rels', RELS)
+        z.writestr('word/document.xml', DOCUMENT)
+    return path
+
+
+def test_rows_match_python_docx(docx_path):
+    docx = pytest.importorskip('docx')
+
+    expected = [
+        [cell.text for cell in row.cells]
+        for table in docx.Document(docx_path).tables
+        for row in table.rows
+    ]
+
+    assert list(iter_table_rows(docx_path)) == expected
+
+
+def test_merged_and_nested_cells(docx_path):
+    rows = list(iter_table_rows(docx_path))
+
+    assert rows[1] == ['ASUR01A', 'Merged', 'Merged']
+    assert rows[3][0] == 'ASUR02A'
+    assert rows[4] == ['TAB\tX\nY\nlink-', ' outer ', '5']
+    assert rows[5] == ['late', 'start']
+    assert rows[6] == ['A', 'B', 'C']
+    assert len(rows) == 7
@@ -0,0 +1,80 @@
+"""
+Parquet and Arrow outputs: typed columns that read back as the CSV rows.
+"""
+
+import os
+
+import pytest
+
+from conftest import DATA_DIR, read_csv, run_script
+from test_golden import CONVERTERS
+
+from nhis_data import gdrg, medicines
+from nhis_data.formats import open_table, read_arrow, read_table
+from nhis_data.tariff_table import TariffTable
+
+pa = pytest.importorskip('pyarrow')
+
+TARIFFS = {
+    'gdrg': ('gdrg_tariffs_import.csv', gdrg.FIELDNAMES, gdrg.COLUMN_TYPES),
+    'nhis': ('nhis_tariffs_import.csv', medicines.FIELDNAMES, medicines.COLUMN_TYPES),
+}
+
+
+def write_typed(path, source, fieldnames, column_types):
+    rows = read_csv(os.path.join(DATA_DIR, source))
+    with open_table(str(path), fieldnames, column_types) as writer:
+        writer.writerows(rows)
+    return rows
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+@pytest.mark.parametrize('tariffs', sorted(TARIFFS))
+def test_typed_tariffs_read_back_as_csv_rows(tariffs, fmt, tmp_path):
+    path = tmp_path / f'tariffs.{fmt}'
+    rows = write_typed(path, *TARIFFS[tariffs])
+
+    assert read_table(str(path)) == (TARIFFS[tariffs][1], rows)
+
+
+def test_drug_columns_are_typed(tmp_path):
+    output = str(tmp_path / 'drugs.csv')
+    run_script('convert_nhis_to_drug_import.py', '--output', output, '--format', 'arrow', '--no-memo')
+
+    table = read_arrow(str(tmp_path / 'drugs.arrow'))
+    assert table.schema.field('unit_price').type == pa.decimal128(12, 2)
+    assert table.schema.field('form').type == pa.dictionary(pa.int32(), pa.string())
+    bottle_size = table.column('bottle_size')
+    assert bottle_size.type == pa.int32()
+    assert 0 < bottle_size.null_count < len(table)
+
+
+@pytest.mark.parametrize('layout,source', [('gdrg', 'gdrg_tariffs_import.csv'), ('nhis', 'nhis_tariffs_import.csv')])
+def test_tariff_table_from_parquet_matches_csv(layout, source, tmp_path):
+    path = tmp_path / 'tariffs.parquet'
+    write_typed(path, *TARIFFS[layout])
+
+    from_csv = TariffTable.from_path(os.path.join(DATA_DIR, source), layout)
+    from_parquet = TariffTable.from_path(str(path), layout)
+
+    assert from_parquet.codes == from_csv.codes and from_parquet.price_text == from_csv.price_text
+    assert from_parquet.prices == from_csv.prices
+    assert from_parquet.code_index == from_csv.code_index
+    assert from_parquet.category_ranges == from_csv.category_ranges
+
+
+@pytest.mark.parametrize('converter', sorted(CONVERTERS))
+def test_converter_reads_and_writes_typed_files(converter, tmp_path):
+    script, source, golden, _, _ = CONVERTERS[converter]
+    typed_input = tmp_path / source.replace('.csv', '.arrow')
+    write_typed(typed_input, *TARIFFS['gdrg' if 'gdrg' in source else 'nhis'])
+
+    run_script(script, '--input', str(typed_input), '--output', str(tmp_path / golden), '--format', 'parquet',
+               '--no-memo')
+
+    output = str(tmp_path / golden.replace('.csv', '.parquet'))
+    assert read_table(output)[1] == read_csv(os.path.join(DATA_DIR, golden))
+    schema = read_arrow(output).schema
+    assert pa.types.is_dictionary(schema.field('category').type)
+    price = 'unit_price' if converter == 'drugs' else 'price'
+    assert pa.types.is_decimal(schema.field(price).type)
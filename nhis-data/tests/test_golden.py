@@ -0,0 +1,72 @@
+"""
+Golden-output checks for the nhis-data extractors and converters.
+
+The converters are checked against the committed *_for_import.csv files,
+the G-DRG extractor against the committed gdrg_tariffs_import.csv, and the
+medicines list extractor against tests/golden/nhis_tariffs_layout.csv (layout
+engine) and tests/golden/nhis_tariffs_extracted.csv (text engine).
+A change that moves a single category, sample type or price fails here.
+"""
+
+import os
+
+import pytest
+
+from conftest import DATA_DIR, GOLDEN_DIR, assert_same_rows, read_csv, run_script, scale_rows, write_csv
+
+# script, input CSV, golden output CSV, code columns in the input, code columns in the output
+CONVERTERS = {
+    'lab': ('convert_gdrg_to_lab_import.py', 'gdrg_tariffs_import.csv',
+            'nhis_lab_services_for_import.csv', ['code'], ['code', 'nhis_code']),
+    'procedure': ('convert_gdrg_to_procedure_import.py', 'gdrg_tariffs_import.csv',
+                  'nhis_procedures_for_import.csv', ['code'], ['code', 'nhis_code']),
+    'drugs': ('convert_nhis_to_drug_import.py', 'nhis_tariffs_import.csv',
+              'nhis_drugs_for_import.csv', ['nhis_code'], ['drug_code', 'nhis_code']),
+}
+
+
+@pytest.mark.parametrize('converter', sorted(CONVERTERS))
+def test_converter_matches_golden(converter, tmp_path):
+    script, source, golden, _, _ = CONVERTERS[converter]
+    output = str(tmp_path / golden)
+
+    # Without the memo, so the classifiers themselves are checked
+    run_script(script, '--input', os.path.join(DATA_DIR, source), '--output', output, '--no-memo')
+
+    assert_same_rows(output, read_csv(os.path.join(DATA_DIR, golden)))
+
+
+@pytest.mark.parametrize('converter', sorted(CONVERTERS))
+def test_scaled_converter_output_repeats_golden(converter, tmp_path):
+    script, source, golden, input_codes, output_codes = CONVERTERS[converter]
+    scaled_input = str(tmp_path / source)
+    output = str(tmp_path / golden)
+    write_csv(scaled_input, scale_rows(read_csv(os.path.join(DATA_DIR, source)), 10, input_codes))
+
+    run_script(script, '--input', scaled_input, '--output', output, '--no-memo')
+
+    assert_same_rows(output, scale_rows(read_csv(os.path.join(DATA_DIR, golden)), 10, output_codes))
+
+
+@pytest.mark.parametrize('reader,module', [('xml', 'lxml'), ('docx', 'docx')])
+def test_extract_gdrg_matches_golden(reader, module, tmp_path):
+    pytest.importorskip(module)
+    output = str(tmp_path / 'gdrg_tariffs_import.csv')
+
+    run_script('extract_gdrg.py', '--reader', reader, '--no-cache', '--output', output)
+
+    assert_same_rows(output, read_csv(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv')))
+
+
+@pytest.mark.parametrize('engine,golden', [
+    ('layout', 'nhis_tariffs_layout.csv'),
+    ('text', 'nhis_tariffs_extracted.csv'),
+])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_extract_nhis_ml_matches_golden(workers, engine, golden, tmp_path):
+    pytest.importorskip('PyPDF2')
+    output = str(tmp_path / 'nhis_tariffs_import.csv')
+
+    run_script('extract_nhis_ml.py', '--no-cache', '--engine', engine, '--workers', str(workers), '--output', output)
+
+    assert_same_rows(output, read_csv(os.path.join(GOLDEN_DIR, golden)))
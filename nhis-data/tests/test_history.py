@@ -0,0 +1,136 @@
+"""
+Effective-dated tariff history: intervals, point-in-time and bulk lookups.
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import DATA_DIR, read_csv, run_script, write_csv
+
+from nhis_data.history import TariffHistory
+from nhis_data.manifest import manifest_path
+
+
+@pytest.fixture
+def history(tmp_path):
+    with TariffHistory(str(tmp_path / 'history.sqlite')) as history:
+        yield history
+
+
+def gdrg(*rows):
+    return [{'code': code, 'name': f'Tariff {code}', 'mdc_category': 'ADULT SURGERY', 'tariff_price': price,
+             'age_category': 'adult'} for code, price in rows]
+
+
+def test_intervals_open_only_on_change(history):
+    assert history.record('gdrg', gdrg(('A1', '100.00'), ('B1', '50.00')), '2023-01-01') == \
+        {'added': 2, 'changed': 0, 'retired': 0, 'rows': 2}
+    assert history.record('gdrg', gdrg(('A1', '100.00'), ('B1', '55.00')), '2024-01-01') == \
+        {'added': 0, 'changed': 1, 'retired': 0, 'rows': 2}
+    assert history.record('gdrg', gdrg(('B1', '55.00'), ('C1', '7.10')), '2025-01-01') == \
+        {'added': 1, 'changed': 0, 'retired': 1, 'rows': 2}
+
+    assert history.price_at('A1', '2022-12-31') is None
+    assert history.price_at('A1', '2023-01-01') == 100.0
+    assert history.price_at('A1', '2024-12-31') == 100.0
+    assert history.price_at('A1', '2025-01-01') is None
+    assert history.price_at('B1', '2023-12-31') == 50.0
+    assert history.price_at('B1', '2024-01-01') == 55.0
+    assert history.tariff_at('B1', '2030-01-01')['valid_from'] == '2024-01-01'
+    assert history.price_at('C1', '2025-06-30') == 7.1
+
+    items = [('A1', '2023-06-01'), ('B1', '2023-06-01'), ('B1', '2024-06-01'), ('C1', '2023-06-01'), ('X', '2024-01-01')]
+    assert history.prices_at(items) == [history.price_at(code, day) for code, day in items] == \
+        [100.0, 50.0, 55.0, None, None]
+    # A claim row without a readable date is unpriced instead of failing the batch; codes are trimmed
+    assert history.prices_at([('A1', ''), (' A1 ', '2023-06-01'), ('A1', '02/01/2024'), ('A1', None)]) == \
+        [None, 100.0, None, None]
+
+
+def test_snapshots_are_recorded_in_date_order(history):
+    history.record('gdrg', gdrg(('A1', '100.00')), '2024-01-01')
+    history.record('gdrg', gdrg(('A1', '120.00')), '2024-01-01')
+
+    # The same-day correction replaced the first interval instead of leaving an empty one
+    assert history.db.execute('SELECT COUNT(*) FROM tariffs').fetchone()[0] == 1
+    assert history.price_at('A1', '2024-01-01') == 120.0
+    with pytest.raises(ValueError, match='backfill'):
+        history.record('gdrg', gdrg(('A1', '90.00')), '2023-01-01')
+
+
+def test_medicines_win_over_gdrg_codes(history):
+    history.record('gdrg', gdrg(('SHARED1', '99.00')), '2023-01-01')
+    history.record('nhis', [{'nhis_code': 'SHARED1', 'name': 'Medicine', 'category': 'medicine', 'price': '5'}],
+                   '2023-01-01')
+
+    assert history.tariff_at('SHARED1', '2023-02-01')['source'] == 'nhis'
+    assert history.prices_at([('SHARED1', '2023-02-01')]) == [5.0]
+
+
+def test_record_file_uses_the_book_date_and_skips_repeats(history, tmp_path):
+    path = str(tmp_path / 'gdrg_tariffs_import.csv')
+    write_csv(path, read_csv(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv')))
+    with open(manifest_path(path), 'w', encoding='utf-8') as f:
+        json.dump({'source': 'Private Primary Care Hospital (Catering Exclusive) Tariff JAN 2023-1.docx',
+                   'generated_at': '2024-05-02T10:00:00'}, f)
+
+    assert [(tier, day, counts['added']) for tier, day, counts in history.record_file(path)] == \
+        [('', '2023-01-01', 617)]
+    assert history.record_file(path) == []
+    assert history.price_at('ASUR02A', '2023-03-01') == 1475.61
+
+
+def test_consolidated_file_records_a_snapshot_per_tier(history, tmp_path):
+    rows = [dict(row, tier=tier, effective_date=day) for row in gdrg(('A1', '10.00'))
+            for tier, day in [('District', '2024-07-01'), ('Teaching', '2024-03-01'), ('Teaching', '2025-03-01')]]
+    rows[2]['tariff_price'] = '12.00'
+    path = str(tmp_path / 'gdrg_tariffs_by_tier.csv')
+    write_csv(path, rows)
+
+    assert [(tier, day) for tier, day, _ in history.record_file(path)] == \
+        [('Teaching', '2024-03-01'), ('District', '2024-07-01'), ('Teaching', '2025-03-01')]
+    assert history.price_at('A1', '2024-08-01', tier='Teaching') == 10.0
+    assert history.price_at('A1', '2025-08-01', tier='Teaching') == 12.0
+    assert history.price_at('A1', '2024-06-01', tier='District') is None
+    assert history.price_at('A1', '2024-08-01') is None
+
+    # The next consolidated file repeats the recorded books next to a new one
+    rows.append(dict(rows[0], tier='Regional', effective_date='2024-01-01'))
+    write_csv(path, rows)
+    assert [(tier, day) for tier, day, _ in history.record_file(path)] == \
+        [('Regional', '2024-01-01'), ('District', '2024-07-01'), ('Teaching', '2025-03-01')]
+
+
+def test_tier_lookups_find_the_untiered_medicines(history, tmp_path):
+    rows = [dict(row, tier='Teaching', effective_date='2024-03-01') for row in gdrg(('A1', '10.00'), ('B1', '20.00'))]
+    path = str(tmp_path / 'gdrg_tariffs_by_tier.csv')
+    write_csv(path, rows)
+    history.record_file(path)
+    history.record('gdrg', gdrg(('A1', '8.00'), ('C1', '30.00')), '2024-01-01')
+    history.record('nhis', [{'nhis_code': 'PARACETA1', 'name': 'Paracetamol', 'category': 'medicine', 'price': '1.50'}],
+                   '2024-01-01')
+
+    items = [('A1', '2024-04-01'), ('PARACETA1', '2024-04-01'), ('C1', '2024-04-01'), ('B1', '2024-02-01')]
+    # The tier's own G-DRG wins over the single-book one; medicines have no tier
+    assert history.prices_at(items, tier='Teaching') == [10.0, 1.5, 30.0, None]
+    assert history.tariff_at('PARACETA1', '2024-04-01', tier='Teaching')['price'] == 1.5
+    assert history.price_at('A1', '2024-04-01', tier='Teaching') == 10.0
+    assert history.price_at('A1', '2024-04-01') == 8.0
+
+
+def test_script_reprices_a_claims_file(tmp_path):
+    db = str(tmp_path / 'history.sqlite')
+    with TariffHistory(db) as history:
+        history.record('gdrg', gdrg(('A1', '100.00')), '2023-01-01')
+        history.record('gdrg', gdrg(('A1', '110.00')), '2024-01-01')
+    claims = tmp_path / 'claims.csv'
+    claims.write_text('id,nhis_code,item_date\n1,A1,2023-12-31\n2,A1,2024-01-02\n3,ZZ,2024-01-02\n'
+                      '4,A1,\n5,A1,02/01/2024\n', encoding='utf-8')
+
+    _, _, stdout = run_script('tariff_history.py', '--db', db, 'reprice', str(claims))
+
+    assert [row['tariff_price'] for row in read_csv(tmp_path / 'claims.repriced.csv')] == \
+        ['100.00', '110.00', '', '', '']
+    assert '(3 without a tariff on their date, 2 of them without a readable date)' in stdout
@@ -0,0 +1,224 @@
+"""
+Background refresh jobs: stage order, concurrency, progress events and the
+atomic outputs an import controller reads while a job runs.
+"""
+
+import asyncio
+import json
+import os
+import textwrap
+
+import pytest
+
+from conftest import DATA_DIR
+
+from nhis_data import jobs
+from nhis_data.formats import open_table
+from nhis_data.jobs import JobRunner, drop_request, read_status
+from nhis_data.metrics import PROGRESS_PREFIX, Metrics
+from nhis_data.pipeline import Stage, link
+
+# A stage script: copies its input to its output, counting rows as a real script does
+COPY = """
+import sys, time
+from nhis_data.metrics import Metrics
+
+source, output = sys.argv[1:3]
+metrics = Metrics('copy.py')
+time.sleep(float(sys.argv[3]) if len(sys.argv) > 3 else 0)
+with open(source) as f:
+    lines = f.readlines()
+metrics.count('emitted', len(lines))
+if 'fail' in lines[0]:
+    sys.exit('boom: ' + lines[0].strip())
+with open(output, 'w') as f:
+    f.writelines(lines)
+metrics.finish(output)
+"""
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # The stage scripts live outside nhis-data, so they need it on the path
+    monkeypatch.setenv('PYTHONPATH', DATA_DIR)
+    (tmp_path / 'copy.py').write_text(textwrap.dedent(COPY), encoding='utf-8')
+    (tmp_path / 'source.txt').write_text('one\ntwo\n', encoding='utf-8')
+    return tmp_path
+
+
+def copy_stage(workdir, name, source, output, sleep=0):
+    source, output = str(workdir / source), str(workdir / output)
+    return Stage(name, str(workdir / 'copy.py'), [source], [output], args=[source, output, str(sleep)])
+
+
+def runner(workdir, stages, limit=2):
+    return JobRunner(str(workdir / 'jobs'), limit=limit, stages=link(stages),
+                     state_file=str(workdir / 'state.json'), log=lambda line: None)
+
+
+def events(workdir, job_id):
+    with open(workdir / 'jobs' / f'{job_id}.events.jsonl', 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_dropped_job_runs_its_stages_in_order_with_progress(workdir):
+    stages = [copy_stage(workdir, 'a', 'source.txt', 'a.txt'), copy_stage(workdir, 'b', 'a.txt', 'b.txt')]
+    job_id = drop_request({'stages': ['b']}, str(workdir / 'jobs'))
+
+    [status] = asyncio.run(runner(workdir, stages).run_pending())
+
+    assert status == read_status(job_id, str(workdir / 'jobs'))
+    assert status['status'] == 'ok' and status['error'] is None
+    assert {name: stage['status'] for name, stage in status['stages'].items()} == {'a': 'ok', 'b': 'ok'}
+    assert status['stages']['b']['counts'] == {'emitted': 2}
+    assert (workdir / 'b.txt').read_text(encoding='utf-8') == 'one\ntwo\n'
+    assert [(e['event'], e.get('stage')) for e in events(workdir, job_id)] == [
+        ('queued', None), ('job started', None),
+        ('stage started', 'a'), ('progress', 'a'), ('stage finished', 'a'),
+        ('stage started', 'b'), ('progress', 'b'), ('stage finished', 'b'),
+        ('job finished', None),
+    ]
+    assert os.listdir(workdir / 'jobs' / 'inbox') == []
+
+    # Nothing changed, so the same request again skips both stages
+    drop_request({'id': 'again'}, str(workdir / 'jobs'))
+    [status] = asyncio.run(runner(workdir, stages).run_pending())
+    assert [stage['status'] for stage in status['stages'].values()] == ['skipped', 'skipped']
+
+
+def test_stages_run_at_most_limit_at_once(workdir):
+    stages = [copy_stage(workdir, name, 'source.txt', f'{name}.txt', sleep=0.3) for name in 'abc']
+    job_id = drop_request({}, str(workdir / 'jobs'))
+
+    asyncio.run(runner(workdir, stages, limit=2).run_pending())
+
+    running, most = 0, 0
+    for event in events(workdir, job_id):
+        running += {'stage started': 1, 'stage finished': -1}.get(event['event'], 0)
+        most = max(most, running)
+    assert most == 2
+
+
+def test_failed_stage_blocks_its_dependents(workdir):
+    (workdir / 'source.txt').write_text('fail\n', encoding='utf-8')
+    stages = [copy_stage(workdir, 'a', 'source.txt', 'a.txt'), copy_stage(workdir, 'b', 'a.txt', 'b.txt')]
+    drop_request({'id': 'broken'}, str(workdir / 'jobs'))
+
+    [status] = asyncio.run(runner(workdir, stages).run_pending())
+
+    assert status['status'] == 'failed' and status['error'] == 'failed stages: a, b'
+    assert status['stages']['a']['status'] == 'failed'
+    assert status['stages']['a']['output'] == ['boom: fail']
+    assert status['stages']['b']['status'] == 'blocked'
+
+
+def test_invalid_requests_are_recorded_as_failed(workdir):
+    jobs_dir = str(workdir / 'jobs')
+    drop_request({'id': 'typo', 'stages': ['nope']}, jobs_dir)
+    drop_request({'id': 'upload', 'inputs': {'gdrg_docx': str(workdir / 'missing.docx')}}, jobs_dir)
+
+    statuses = asyncio.run(runner(workdir, [copy_stage(workdir, 'a', 'source.txt', 'a.txt')]).run_pending())
+
+    assert read_status('typo', jobs_dir)['error'] == 'unknown stage: nope'
+    assert [status['id'] for status in statuses] == ['upload']
+    assert statuses[0]['error'].startswith('cannot install input')
+
+
+def test_uploaded_input_replaces_the_source_document(workdir, monkeypatch):
+    monkeypatch.setitem(jobs.INPUTS, 'gdrg_docx', str(workdir / 'source.txt'))
+    (workdir / 'upload.txt').write_text('new\n', encoding='utf-8')
+    drop_request({'inputs': {'gdrg_docx': str(workdir / 'upload.txt')}}, str(workdir / 'jobs'))
+
+    asyncio.run(runner(workdir, [copy_stage(workdir, 'a', 'source.txt', 'a.txt')]).run_pending())
+
+    assert (workdir / 'a.txt').read_text(encoding='utf-8') == 'new\n'
+
+
+def test_a_job_that_raises_fails_and_the_next_still_runs(workdir, monkeypatch):
+    job_runner = runner(workdir, [copy_stage(workdir, 'a', 'source.txt', 'a.txt')])
+    run_stage = job_runner._run_stage
+    calls = []
+
+    async def flaky(job, stage):
+        calls.append(job.id)
+        if len(calls) == 1:
+            raise OSError('disk full')
+        return await run_stage(job, stage)
+
+    monkeypatch.setattr(job_runner, '_run_stage', flaky)
+    job_runner.submit({'id': 'first'})
+    job_runner.submit({'id': 'second', 'force': True})
+
+    first, second = asyncio.run(job_runner.run_pending())
+
+    assert (first['status'], first['error']) == ('failed', 'OSError: disk full')
+    assert read_status('first', str(workdir / 'jobs'))['status'] == 'failed'
+    assert second['status'] == 'ok'
+
+
+def test_serve_stops_when_the_worker_does(workdir, monkeypatch):
+    job_runner = runner(workdir, [copy_stage(workdir, 'a', 'source.txt', 'a.txt')])
+
+    async def broken():
+        raise RuntimeError('worker died')
+
+    monkeypatch.setattr(job_runner, '_work', broken)
+    job_runner.poll = 0.01
+
+    with pytest.raises(RuntimeError, match='worker died'):
+        asyncio.run(asyncio.wait_for(job_runner.serve(), 5))
+
+
+def test_socket_submit_returns_before_the_job_runs(workdir):
+    socket_path = str(workdir / 'jobs.sock')
+    job_runner = runner(workdir, [copy_stage(workdir, 'a', 'source.txt', 'a.txt', sleep=0.3)])
+
+    async def session():
+        server = asyncio.create_task(job_runner.serve(socket_path))
+        while not os.path.exists(socket_path):
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+
+        async def ask(request):
+            writer.write(json.dumps(request).encode('utf-8') + b'\n')
+            return json.loads(await reader.readline())
+
+        queued = await ask({'id': 'live'})
+        rejected = await ask({'id': 'live'})
+        while (await ask({'status': 'live'}))['status'] != 'ok':
+            await asyncio.sleep(0.05)
+        writer.close()
+        server.cancel()
+        return queued, rejected
+
+    queued, rejected = asyncio.run(asyncio.wait_for(session(), 30))
+
+    assert queued['status'] == 'queued'
+    assert rejected['error'].startswith('job live is already')
+    assert (workdir / 'a.txt').exists()
+    assert not os.path.exists(socket_path)
+
+
+def test_csv_outputs_replace_the_previous_file_only_when_complete(tmp_path):
+    path = str(tmp_path / 'lab.csv')
+    with open_table(path, ['code'], {}) as writer:
+        writer.writerow({'code': 'OLD'})
+
+    with pytest.raises(RuntimeError):
+        with open_table(path, ['code'], {}) as writer:
+            writer.writerow({'code': 'NEW'})
+            assert open(path, encoding='utf-8').read().split() == ['code', 'OLD']
+            raise RuntimeError('interrupted')
+
+    assert open(path, encoding='utf-8').read().split() == ['code', 'OLD']
+    assert os.listdir(tmp_path) == ['lab.csv']
+
+
+def test_metrics_report_progress_when_asked(monkeypatch, capsys, tmp_path):
+    monkeypatch.setenv('NHIS_DATA_PROGRESS', '1')
+    metrics = Metrics('test.py')
+    metrics.count('pages', 3)
+    metrics.finish(str(tmp_path / 'out.csv'))
+
+    lines = [line for line in capsys.readouterr().err.splitlines() if line.startswith(PROGRESS_PREFIX)]
+    assert json.loads(lines[-1][len(PROGRESS_PREFIX):])['counts'] == {'pages': 3}
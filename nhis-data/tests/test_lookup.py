@@ -0,0 +1,132 @@
+"""
+Claim-price lookups: the in-memory index, hot reload and the HTTP/Unix socket service.
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from conftest import DATA_DIR, write_csv
+
+from nhis_data.commands.serve_tariffs import MAX_BODY, make_server
+from nhis_data.lookup import ReloadingIndex, TariffIndex
+
+NHIS_ROWS = [
+    {'nhis_code': 'ACETAZTA1', 'name': 'Acetazolamide Tablet, 250 mg', 'category': 'medicine', 'price': '0.88', 'unit': ''},
+    {'nhis_code': 'SHARED1', 'name': 'Listed in both', 'category': 'medicine', 'price': '5', 'unit': ''},
+]
+GDRG_ROWS = [
+    {'code': 'ASUR01A', 'name': 'Operations of thyroid', 'mdc_category': 'ADULT SURGERY', 'tariff_price': '961.83', 'age_category': 'adult'},
+    {'code': 'INVE01D', 'name': '2 Hour Post Prandial Blood Glucose', 'mdc_category': 'INVESTIGATION', 'tariff_price': '12.50', 'age_category': 'all'},
+    {'code': 'SHARED1', 'name': 'G-DRG duplicate', 'mdc_category': 'INVESTIGATION', 'tariff_price': '99.00', 'age_category': 'all'},
+    {'code': 'ASUR01A', 'name': 'Second occurrence', 'mdc_category': 'ADULT SURGERY', 'tariff_price': '1.00', 'age_category': 'adult'},
+]
+
+
+@pytest.fixture
+def sources(tmp_path):
+    nhis, gdrg = tmp_path / 'nhis.csv', tmp_path / 'gdrg.csv'
+    write_csv(nhis, NHIS_ROWS)
+    write_csv(gdrg, GDRG_ROWS)
+    return [('nhis', str(nhis)), ('gdrg', str(gdrg))]
+
+
+def test_index_follows_tariff_service_precedence(sources):
+    tariffs = TariffIndex(sources).lookup(['ACETAZTA1', 'ASUR01A', 'INVE01D', 'SHARED1', 'NOPE'])
+
+    assert tariffs['ACETAZTA1']['price'] == 0.88
+    assert tariffs['ASUR01A'] == {'code': 'ASUR01A', 'name': 'Operations of thyroid', 'price': 961.83,
+                                  'category': 'procedure', 'source': 'gdrg'}
+    assert tariffs['INVE01D']['category'] == 'lab'
+    assert tariffs['SHARED1']['source'] == 'nhis'
+    assert tariffs['NOPE'] is None
+
+
+def test_index_loads_the_committed_tariff_files():
+    index = TariffIndex([('nhis', os.path.join(DATA_DIR, 'nhis_tariffs_import.csv')),
+                         ('gdrg', os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv'))])
+
+    assert index.lookup(['ACETAZIN1'])['ACETAZIN1']['price'] == 17.16
+    assert index.lookup(['ASUR02A'])['ASUR02A']['price'] == 1475.61
+
+
+def test_reload_swaps_in_new_files_and_survives_bad_ones(sources):
+    index = ReloadingIndex(sources, interval=0)
+    gdrg = sources[1][1]
+    first = index.current()
+
+    assert index.reload() is False
+    write_csv(gdrg, [dict(GDRG_ROWS[0], tariff_price='1000.00')])
+    os.utime(gdrg, ns=(1, 1))
+
+    assert index.current() is not first
+    assert index.current().lookup(['ASUR01A'])['ASUR01A']['price'] == 1000.0
+    assert index.generation == 2
+    # A snapshot keeps its own generation after a reload swaps it out
+    assert (first.generation, index.current().generation) == (1, 2)
+
+    with open(gdrg, 'w', encoding='utf-8') as f:
+        f.write('code,name,mdc_category,tariff_price\nASUR01A,x,SURGERY,not a price\n')
+    assert index.reload() is False
+    assert 'ValueError' in index.status()['error']
+    assert index.current().lookup(['ASUR01A'])['ASUR01A']['price'] == 1000.0
+
+
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def request(connection, method, path, payload=None):
+    body = None if payload is None else json.dumps(payload)
+    connection.request(method, path, body=body)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.mark.parametrize('transport', ['tcp', 'unix'])
+def test_service_answers_batches(sources, tmp_path, transport):
+    socket_path = str(tmp_path / 'tariffs.sock') if transport == 'unix' else None
+    server = make_server(ReloadingIndex(sources), port=0, socket_path=socket_path, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        if socket_path:
+            connection = UnixConnection(socket_path)
+        else:
+            connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+
+        status, body = request(connection, 'POST', '/lookup', {'codes': ['ASUR01A', 'ACETAZTA1', 'NOPE']})
+        assert status == 200
+        assert body['tariffs']['ASUR01A']['price'] == 961.83
+        assert body['tariffs']['ACETAZTA1']['category'] == 'medicine'
+        assert body['tariffs']['NOPE'] is None
+
+        # Same keep-alive connection
+        status, body = request(connection, 'GET', '/lookup?code=INVE01D')
+        assert body['tariffs'] == {'INVE01D': TariffIndex(sources).lookup(['INVE01D'])['INVE01D']}
+
+        assert request(connection, 'POST', '/lookup', {'codes': 'ASUR01A'})[0] == 400
+        assert request(connection, 'GET', '/health')[1]['codes'] == 4
+        assert request(connection, 'POST', '/reload')[1]['generation'] == 2
+        connection.close()
+
+        # A body too large is not read, so the connection closes instead of parsing it as a request
+        connection.request('POST', '/lookup', headers={'Content-Length': str(MAX_BODY + 1)})
+        connection.send(b'GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = connection.getresponse()
+        assert response.status == 413 and response.will_close
+        response.read()
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,67 @@
+"""
+Fuzzy NHIS-code suggestions for hand-entered catalogue names.
+"""
+
+import csv
+import math
+import os
+from collections import Counter
+
+from conftest import DATA_DIR, run_script
+
+from nhis_data.mapping import NameIndex, features, normalize
+
+
+def drug_index():
+    with open(os.path.join(DATA_DIR, 'nhis_drugs_for_import.csv'), 'r', encoding='utf-8') as f:
+        return NameIndex((row['nhis_code'], row['name']) for row in csv.DictReader(f))
+
+
+def test_normalize_unifies_abbreviations_and_units():
+    assert normalize("AMOXYCILLIN CAPS 500MG (21's)") == ['amoxycillin', 'capsule', '500', 'mg']
+    assert normalize('Amoxicillin Capsule, 500 mg') == ['amoxicillin', 'capsule', '500', 'mg']
+
+
+def test_abbreviated_names_find_their_tariff():
+    index = drug_index()
+
+    assert index.search('ACETAZOLAMIDE TABS 250MG', 1)[0][0] == 'ACETAZTA1'
+    assert index.search('Acyclovir eye oint 3%', 1)[0][0] == 'ACICLOEO1'
+
+
+def test_scores_equal_brute_force_cosine():
+    index = drug_index()
+    query = 'Artemether Lumefantrine tabs 20/120mg'
+
+    def vector(name):
+        return index._vector(Counter(features(name)))
+
+    q = vector(query)
+    scores = [sum(w * vector(name).get(g, 0.0) for g, w in q.items()) for name in index.names]
+    # Ties go to the entry listed first, as in search()
+    expected = sorted(range(len(scores)), key=lambda i: (-round(scores[i], 9), i))[:3]
+
+    got = index.search(query, 3)
+    assert [code for code, _, _ in got] == [index.codes[i] for i in expected]
+    assert all(math.isclose(score, round(scores[i], 4)) for (_, _, score), i in zip(got, expected))
+
+
+def test_script_writes_candidates_and_mapping(tmp_path):
+    catalogue = tmp_path / 'unmapped.csv'
+    catalogue.write_text(
+        'item_type,item_code,item_name,nhis_code\n'
+        'drug,D1,ACETAZOLAMIDE TABS 250MG,\n'
+        'lab_service,L1,24 hr urine protein,\n'
+        'equipment,E1,Oxygen cylinder,\n',
+        encoding='utf-8',
+    )
+    mapping = tmp_path / 'mapping.csv'
+
+    run_script('suggest_nhis_mappings.py', str(catalogue), '--top-k', '2', '--mapping', str(mapping))
+
+    with open(tmp_path / 'unmapped.candidates.csv', 'r', encoding='utf-8') as f:
+        candidates = list(csv.DictReader(f))
+    assert [(c['item_code'], c['rank']) for c in candidates] == [('D1', '1'), ('D1', '2'), ('L1', '1'), ('L1', '2')]
+    assert candidates[2]['nhis_code'] == 'INVE02D'
+    # The mapping import resolves medicines codes only, so the G-DRG lab candidate is left out
+    assert mapping.read_text(encoding='utf-8').splitlines()[1:] == ['drug,D1,ACETAZTA1']
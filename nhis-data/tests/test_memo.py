@@ -0,0 +1,95 @@
+"""
+Classification memo: LRU eviction, invalidation on rule edits, and
+converter reruns that reuse it without changing their output.
+"""
+
+import os
+import shutil
+
+from conftest import DATA_DIR, read_csv, run_script
+
+from nhis_data import rules
+from nhis_data.drugs import drug_features, memoized_features
+from nhis_data.memo import CLASSIFIER_MODULES, CODE_VERSION, ClassificationMemo, code_version, rules_version
+
+
+def test_memo_computes_only_missing_keys_and_evicts_least_recent(tmp_path):
+    computed = []
+
+    def compute(keys):
+        computed.append(keys)
+        return [key.upper() for key in keys]
+
+    memo = ClassificationMemo('test', 'v1', str(tmp_path), max_entries=3)
+    assert memo.map(['a', 'b', 'a', 'c'], compute) == ['A', 'B', 'A', 'C']
+    assert memo.map(['d', 'a'], compute) == ['D', 'A']
+    assert computed == [['a', 'b', 'c'], ['d']]
+    assert (memo.hits, memo.misses) == (1, 4)
+    # Evicted as it goes, not only when saved
+    assert list(memo.entries) == ['c', 'd', 'a']
+    memo.save()
+
+    # 'b' was the least recently used of the four
+    memo = ClassificationMemo('test', 'v1', str(tmp_path), max_entries=3)
+    assert list(memo.entries) == ['c', 'd', 'a']
+    assert memo.map(['a', 'b'], compute) == ['A', 'B']
+    assert computed[-1] == ['b']
+
+    assert ClassificationMemo('test', 'v2', str(tmp_path)).entries == {}
+
+
+def test_rules_version_follows_the_keyword_tables():
+    edited = [(label, keywords + ['new keyword']) for label, keywords in rules.LAB_CATEGORY_RULES]
+
+    assert rules_version(rules.LAB_CATEGORY_RULES) == rules_version(list(rules.LAB_CATEGORY_RULES))
+    assert rules_version(edited) != rules_version(rules.LAB_CATEGORY_RULES)
+    assert rules.LAB_RULES_VERSION != rules.PROCEDURE_RULES_VERSION
+
+
+def test_code_version_follows_the_classifier_source(tmp_path):
+    package = os.path.dirname(rules.__file__)
+    for name in CLASSIFIER_MODULES:
+        shutil.copy(os.path.join(package, name), str(tmp_path / name))
+    assert code_version(str(tmp_path)) == CODE_VERSION
+
+    with open(str(tmp_path / 'rules.py'), 'a', encoding='utf-8') as f:
+        f.write("\n# category = 'Chemistry'\n")
+    assert code_version(str(tmp_path)) != CODE_VERSION
+
+
+def test_memoized_drug_features_match_drug_features(tmp_path):
+    names = ['Amoxicillin Capsule, 500 mg', 'Paracetamol Syrup, 120 mg/5 mL 100 mL', 'Amoxicillin Capsule, 500 mg']
+    units = ['', '100 mL', 'Capsule']
+    memo = ClassificationMemo('drugs', 'v1', str(tmp_path))
+
+    assert memoized_features(memo, names) == drug_features(names)
+    assert memoized_features(memo, names, units) == drug_features(names, units)
+    assert memoized_features(memo, names, units) == drug_features(names, units)
+    assert memo.hits == 3
+
+
+def test_no_memo_keeps_nothing_between_calls():
+    memo = ClassificationMemo('test', 'v1', None)
+    computed = []
+
+    def compute(keys):
+        computed.append(keys)
+        return [key.upper() for key in keys]
+
+    assert memo.map(['a', 'b', 'a'], compute) == ['A', 'B', 'A']
+    assert memo.map(['a'], compute) == ['A']
+    assert computed == [['a', 'b'], ['a']]
+    assert memo.entries == {}
+
+
+def test_converter_rerun_reuses_the_memo(tmp_path):
+    memo_dir = str(tmp_path / 'memo')
+    outputs = []
+    for run in ('first', 'second'):
+        output = str(tmp_path / f'procedures_{run}.csv')
+        _, _, stdout = run_script('convert_gdrg_to_procedure_import.py', '--output', output, '--memo-dir', memo_dir)
+        outputs.append(read_csv(output))
+
+    assert 'Names classified: 0, reused from memo: 330' in stdout
+    assert outputs[0] == outputs[1] == read_csv(os.path.join(DATA_DIR, 'nhis_procedures_for_import.csv'))
+    assert os.listdir(memo_dir) == ['procedures.memo.json']
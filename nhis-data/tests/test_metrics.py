@@ -0,0 +1,59 @@
+"""
+The metrics summary every script writes next to its output.
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import DATA_DIR, run_script
+from test_golden import CONVERTERS
+
+from nhis_data.metrics import metrics_path
+
+
+def read_summary(output):
+    with open(metrics_path(output), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('converter', sorted(CONVERTERS))
+def test_converter_rows_add_up(converter, tmp_path):
+    script, source, golden, _, _ = CONVERTERS[converter]
+    output = str(tmp_path / golden)
+
+    run_script(script, '--input', os.path.join(DATA_DIR, source), '--output', output, '--no-memo')
+
+    summary = read_summary(output)
+    rows = summary['rows']
+    assert summary['script'] == script
+    assert rows['read'] == rows['skipped'] + rows['emitted']
+    assert rows['skipped'] == sum(summary['skip_reasons'].values())
+    assert {'read', 'classify', 'csv write'} <= set(summary['phases'])
+
+
+def test_extract_gdrg_skip_reasons(tmp_path):
+    pytest.importorskip('docx')
+    output = str(tmp_path / 'gdrg_tariffs_import.csv')
+
+    run_script('extract_gdrg.py', '--reader', 'docx', '--no-cache', '--trace-memory', '--output', output)
+
+    summary = read_summary(output)
+    assert summary['rows']['emitted'] == 617
+    assert summary['rows']['read'] == summary['rows']['skipped'] + summary['rows']['emitted']
+    assert set(summary['skip_reasons']) == {'MDC header row', 'non-numeric tariff'}
+    assert 'docx table traversal' in summary['phases']
+    assert summary['memory']['peak_kib'] > 0
+
+
+def test_medicine_without_price_is_counted():
+    pytest.importorskip('PyPDF2')
+    from nhis_data.medicines import PageStitcher, parse_page
+
+    stitcher = PageStitcher()
+    records = stitcher.add(parse_page('AMOXICCA1 Amoxicillin Capsule\n2.50\nPRICING PRICE\nZINCSUTA1 Zinc Tablet'))
+    records += stitcher.finish()
+
+    assert [r['nhis_code'] for r in records] == ['AMOXICCA1']
+    assert stitcher.skipped == {'column header': 1, 'no price': 1}
@@ -0,0 +1,87 @@
+"""
+Layout engine for the medicines list: cells assigned by position.
+"""
+
+from nhis_data.drugs import drug_features
+from nhis_data.medicines import CellParser, PageStitcher, parse_layout_page, price_text
+from nhis_data.pdf_layout import Columns, Fragment, cell_text
+
+HEADER = [
+    Fragment(41.6, 736.1, 'CODE'),
+    Fragment(122.7, 736.1, 'GENERIC NAME, DOSAGE FORM, STRENGTH'),
+    Fragment(389.9, 741.8, 'UNIT OF '),
+    Fragment(390.2, 730.4, 'PRICING'),
+    Fragment(449.1, 741.8, 'PRICE '),
+    Fragment(449.5, 730.4, '(GHC)'),
+    Fragment(501.1, 741.8, 'LEVEL OF '),
+    Fragment(493.8, 730.4, 'PRESCRIBING'),
+    Fragment(144.5, 53.2, 'NHIS Medicines List 202'),
+    Fragment(488.8, 53.2, 'Page '),
+]
+
+
+def row(y, code, name_lines, unit, price_lines, level='A'):
+    fragments = [Fragment(41.6, y, code), Fragment(393.1, y, unit), Fragment(515.6, y - 6.2, level)]
+    top = y + 6.2 * (len(name_lines) - 1)
+    fragments += [Fragment(122.7, top - 12.5 * i, text) for i, text in enumerate(name_lines)]
+    # Price lines are centred on the row too, a baseline below the name
+    price_top = y - 6.2 + 6.2 * (len(price_lines) - 1)
+    fragments += [Fragment(442.7 + 31.5 * i, price_top - 12.4 * i, text) for i, text in enumerate(price_lines)]
+    return fragments
+
+
+def test_columns_from_header_labels():
+    columns = Columns.detect(HEADER, {'code': ('CODE',), 'unit': ('UNIT OF', 'PRICING'), 'price': ('PRICE',)})
+
+    assert columns.names == ['code', 'unit', 'price']
+    assert [columns.column(x) for x in (10, 122.7, 380, 442.7)] == ['code', 'code', 'unit', 'price']
+    assert columns.header_y == 730.4
+    assert Columns.detect(HEADER[:1], {'code': ('CODE',), 'unit': ('UNIT OF',)}) is None
+
+
+def test_cell_text_joins_runs_then_lines():
+    fragments = [Fragment(122.7, 500, 'microgram/metered dose'), Fragment(193.7, 512.4, '  '),
+                 Fragment(197.0, 512.4, 'dipropionate Inhaler, 100 '), Fragment(122.7, 512.4, 'Beclometasone')]
+
+    assert cell_text(fragments) == 'Beclometasone dipropionate Inhaler, 100 microgram/metered dose'
+    assert cell_text([Fragment(442.7, 126.8, '2,300.0'), Fragment(474.2, 114.4, '0 ')], '') == '2,300.00'
+
+
+def test_price_text():
+    assert price_text('2,300.00') == '2300'
+    assert price_text('0.70') == '0.7'
+    assert price_text('11.55') == '11.55'
+    assert price_text('B2') is None
+
+
+def test_layout_page_keeps_wrapped_names_and_prices_in_their_cells():
+    fragments = HEADER + row(692.7, 'AMOARTPO2', ['Amodiaquine + Artesunate Granular Powder, 150 ', 'mg + 50 mg'],
+                             'Sachet', ['5.78 ']) \
+        + row(653.9, 'RITUXIIN1', ['Rituximab Injection 100mg/10ml'], 'Vial', ['2,300.0', '0 ']) \
+        + row(627.2, '5FLUORIN1', ['5-Fluorouracil Injection, 50 mg/mL'], '10 mL', ['14.47 '])
+
+    lead, records, state, skipped = parse_layout_page(fragments)
+    stitcher = PageStitcher(CellParser)
+    records = stitcher.add((lead, records, state, skipped)) + stitcher.finish()
+
+    assert lead == []
+    assert records == [
+        {'nhis_code': 'AMOARTPO2', 'name': 'Amodiaquine + Artesunate Granular Powder, 150 mg + 50 mg',
+         'category': 'medicine', 'price': '5.78', 'unit': 'Sachet'},
+        {'nhis_code': 'RITUXIIN1', 'name': 'Rituximab Injection 100mg/10ml',
+         'category': 'medicine', 'price': '2300', 'unit': 'Vial'},
+        {'nhis_code': '5FLUORIN1', 'name': '5-Fluorouracil Injection, 50 mg/mL',
+         'category': 'medicine', 'price': '14.47', 'unit': '10 mL'},
+    ]
+
+
+def test_page_without_header_yields_nothing():
+    assert parse_layout_page([Fragment(242.4, 428.0, 'Copyright @ 202')]) == ([], [], None, {})
+
+
+def test_drug_features_read_volume_and_form_from_unit():
+    features = drug_features(['Calcium Gluconate Injection, 100 mg/mL in 10 mL', 'Fluticasone MDI, 125 microgram'],
+                             ['10 mL', 'Inhaler'])
+
+    assert features['bottle_size'] == [10, None]
+    assert features['form'] == ['injection', 'inhaler']
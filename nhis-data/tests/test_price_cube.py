@@ -0,0 +1,99 @@
+"""
+Tariff price cube: group counts, percentiles and the typed cube file.
+"""
+
+import os
+
+import pytest
+
+from conftest import DATA_DIR, read_csv, run_script, write_csv
+
+from nhis_data.formats import iter_table
+from nhis_data.price_cube import build_cube, percentile, read_prices, tariff_groups
+from nhis_data.tariff_table import TariffTable
+
+NHIS_ROWS = [
+    {'nhis_code': 'PARACETA1', 'name': 'Paracetamol Tablet, 500 mg', 'category': 'medicine', 'price': '1.00'},
+    {'nhis_code': 'AMOXICCA2', 'name': 'Amoxicillin Capsule, 250 mg', 'category': 'medicine', 'price': '2'},
+]
+GDRG_ROWS = [
+    {'code': 'INVE01D', 'name': 'Blood Glucose', 'mdc_category': 'INVESTIGATION', 'tariff_price': '10.00',
+     'age_category': 'all'},
+    {'code': 'ASUR01A', 'name': 'Operations of thyroid & parathyroid glands >=12 Yrs', 'mdc_category': 'ADULT SURGERY',
+     'tariff_price': '961.83', 'age_category': 'adult'},
+]
+PRICES = [
+    {'Code': 'D1', 'Name': 'Panadol', 'Category': 'drugs', 'Cash Price': '2', 'NHIS Code': 'PARACETA1'},
+    {'Code': 'D2', 'Name': 'Paracetamol', 'Category': 'drugs', 'Cash Price': '1.00', 'NHIS Code': 'PARACETA1'},
+    {'Code': 'D3', 'Name': 'Amoxicillin', 'Category': 'drugs', 'Cash Price': '', 'NHIS Code': 'AMOXICCA2'},
+    {'Code': 'D4', 'Name': 'Vitamin C', 'Category': 'drugs', 'Cash Price': '5', 'NHIS Code': ''},
+    {'Code': 'L1', 'Name': 'Glucose', 'Category': 'lab', 'Cash Price': 'N/A', 'NHIS Code': 'INVE01D'},
+    {'Code': 'L2', 'Name': 'Old test', 'Category': 'lab', 'Cash Price': '3', 'NHIS Code': 'RETIRED1'},
+]
+
+
+@pytest.fixture
+def cube(tmp_path):
+    write_csv(str(tmp_path / 'prices.csv'), PRICES)
+    tariffs = tariff_groups(TariffTable.from_records(NHIS_ROWS, 'nhis'), TariffTable.from_records(GDRG_ROWS),
+                            {'PARACETA1': 'tablet', 'AMOXICCA2': 'capsule'})
+    rows = build_cube(tariffs, read_prices(str(tmp_path / 'prices.csv')))
+    return {(row['dimension'], row['value']): row for row in rows}
+
+
+def test_groups_count_tariffs_items_and_unmapped(cube):
+    assert list(cube) == [
+        ('all', ''), ('category', 'lab'), ('category', 'medicine'), ('category', 'procedure'),
+        ('form', 'capsule'), ('form', 'tablet'), ('mdc_category', 'ADULT SURGERY'), ('mdc_category', 'INVESTIGATION'),
+        ('age_category', 'adult'), ('age_category', 'all'), ('procedure_type', 'major'),
+        ('hospital_category', 'drugs'), ('hospital_category', 'lab'),
+    ]
+    counts = ['tariffs', 'unmapped_tariffs', 'items', 'unmapped_items', 'priced_items',
+              'below_tariff', 'at_tariff', 'above_tariff']
+    assert [cube[('all', '')][name] for name in counts] == [4, 1, 6, 2, 4, 0, 1, 1]
+    assert [cube[('form', 'tablet')][name] for name in counts] == [1, 0, 2, 0, 2, 0, 1, 1]
+    assert [cube[('procedure_type', 'major')][name] for name in counts] == [1, 1, 0, 0, 0, 0, 0, 0]
+    # Unmapped items count under their dashboard category, which has no tariffs of its own
+    assert [cube[('hospital_category', 'lab')][name] for name in counts] == [0, 0, 2, 1, 1, 0, 0, 0]
+
+
+def test_percentiles_are_interpolated_in_exact_cents(cube):
+    everything = cube[('all', '')]
+    # Cash prices 1.00, 2.00, 3.00 and 5.00
+    assert [everything[f'price_{name}'] for name in ['min', 'p25', 'median', 'p75', 'p90', 'max', 'mean']] == [
+        '1.00', '1.75', '2.50', '3.50', '4.40', '5.00', '2.75']
+    assert everything['tariff_median'] == '6.00'
+    assert everything['pct_of_tariff_min'] == '100.00' and everything['pct_of_tariff_max'] == '200.00'
+    # No priced items: the statistics are blank, not 0
+    assert cube[('procedure_type', 'major')]['price_median'] == ''
+    assert cube[('hospital_category', 'drugs')]['tariff_median'] == ''
+    assert percentile([7], 90) == 7
+
+
+def test_dimensions_match_the_import_tables():
+    drugs = list(iter_table(os.path.join(DATA_DIR, 'nhis_drugs_for_import.csv')))
+    tariffs = tariff_groups(TariffTable.from_path(os.path.join(DATA_DIR, 'nhis_tariffs_import.csv'), 'nhis'),
+                            TariffTable.from_path(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv')),
+                            {row['nhis_code']: row['form'] for row in drugs})
+
+    for row in read_csv(os.path.join(DATA_DIR, 'nhis_procedures_for_import.csv')):
+        assert ('procedure_type', row['type']) in tariffs[row['nhis_code']][1]
+    for row in drugs:
+        assert ('form', row['form']) in tariffs[row['nhis_code']][1]
+
+
+def test_script_writes_the_cube_as_csv_and_typed(tmp_path):
+    write_csv(str(tmp_path / 'prices.csv'), PRICES)
+    output = str(tmp_path / 'cube.csv')
+    run_script('tariff_cube.py', '--prices', str(tmp_path / 'prices.csv'), '--output', output)
+
+    rows = read_csv(output)
+    assert (rows[0]['dimension'], rows[0]['items'], rows[0]['unmapped_items']) == ('all', '6', '2')
+    assert {row['value'] for row in rows if row['dimension'] == 'hospital_category'} == {'drugs', 'lab'}
+
+    pytest.importorskip('pyarrow')
+    from nhis_data.formats import read_table
+
+    run_script('tariff_cube.py', '--prices', str(tmp_path / 'prices.csv'), '--output', output, '--format', 'arrow')
+    # Zero counts stay 0 in the typed file
+    assert read_table(str(tmp_path / 'cube.arrow'))[1] == rows
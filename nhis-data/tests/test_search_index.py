@@ -0,0 +1,99 @@
+"""
+Tariff search index: ranking, serialization and the build/query tool.
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import DATA_DIR, run_script, write_csv
+
+from nhis_data.formats import iter_table
+from nhis_data.manifest import manifest_path, tariff_engine
+from nhis_data.search_index import SearchIndex, build_index, write_index
+
+
+@pytest.fixture(scope='module')
+def built():
+    return build_index(iter_table(os.path.join(DATA_DIR, 'nhis_tariffs_import.csv')),
+                       iter_table(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv')))
+
+
+@pytest.fixture(scope='module')
+def index(built):
+    return SearchIndex(built)
+
+
+def codes(results):
+    return [entry['code'] for entry in results]
+
+
+def test_codes_rank_above_names(index):
+    assert codes(index.search('asur02a', limit=1)) == ['ASUR02A']
+    assert codes(index.search('INVE5', limit=3)) == ['INVE50D', 'INVE51D', 'INVE52D']
+
+
+def test_words_match_whole_or_by_prefix_in_name_order(index):
+    results = index.search('paracetamol tab', limit=3)
+    # Then the entries matching only some words, the rare "paracetamol" before the common "tablet"
+    assert codes(results) == ['PARACETA1', 'PARACERE1', 'PARACERE2']
+    assert results[0]['generic_name'] == 'Paracetamol' and results[0]['strength'] == '500 mg'
+
+    # Every word of the query matched first, ties in name order as searchTariffs() lists them
+    names = [entry['name'] for entry in index.search('full blood', limit=3)]
+    assert names == sorted(names) and all(name.startswith('Full Blood Count') for name in names)
+    # "caps" is the catalogue spelling of "capsule"; "fbc" is expanded to "full blood count"
+    assert codes(index.search('amoxicillin caps 500', limit=1)) == ['AMOXICCA2']
+    assert codes(index.search('fbc', limit=1)) == ['INVE51D']
+
+
+def test_infixes_and_misspellings_fall_back_to_trigrams(index):
+    assert all('cillin' in entry['name'].lower() for entry in index.search('cillin', limit=10))
+    assert 'AMOXICCA2' in codes(index.search('amoxycilin', limit=10))
+    assert index.search('zzzzqqq') == []
+
+
+def test_category_filter_and_limit(index):
+    results = index.search('malaria', category='lab', limit=2)
+    assert len(results) <= 2 and {entry['category'] for entry in results} == {'lab'}
+    assert {entry['source'] for entry in index.search('malaria', category='procedure')} == {'gdrg'}
+
+
+def test_serialized_index_answers_the_same(built, index, tmp_path):
+    path = str(tmp_path / 'index.json')
+    write_index(built, path)
+    loaded = SearchIndex.load(path)
+
+    for query in ['para', 'amoxycilin', 'ASUR0', 'x-ray']:
+        assert loaded.search(query) == index.search(query)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        stale = dict(json.load(f), version=0)
+    with pytest.raises(ValueError, match='rebuild'):
+        SearchIndex(stale)
+
+
+def test_engine_is_read_from_the_manifest_or_all_rows(tmp_path):
+    path = str(tmp_path / 'nhis_tariffs_import.csv')
+    # Only the last row lacks a unit, as a text-engine file can past its first chunk
+    rows = [{'nhis_code': f'CODE{i}', 'name': 'Paracetamol Tablet', 'unit': 'Tablet' if i < 5 else '', 'price': '1'}
+            for i in range(6)]
+    write_csv(path, rows)
+    assert tariff_engine(path) == 'text'
+
+    write_csv(path, rows[:5])
+    assert tariff_engine(path) == 'layout'
+    with open(manifest_path(path), 'w', encoding='utf-8') as f:
+        json.dump({'output': 'nhis_tariffs_import.csv', 'engine': 'text'}, f)
+    assert tariff_engine(path) == 'text'
+
+
+def test_script_builds_and_queries(tmp_path):
+    path = str(tmp_path / 'index.json')
+
+    _, _, stdout = run_script('search_tariffs.py', '--index', path, 'build')
+    assert f'Created {path} with' in stdout
+
+    _, _, stdout = run_script('search_tariffs.py', '--index', path, 'query', 'ASUR02A', '--json')
+    assert json.loads(stdout)[0]['code'] == 'ASUR02A'
@@ -0,0 +1,101 @@
+"""
+Single-pass, chunked conversion: the streaming pieces give the same results
+as the whole-list functions they replace.
+"""
+
+import os
+
+import pytest
+
+from conftest import DATA_DIR, read_csv, run_script, scale_rows, write_csv
+
+from nhis_data.bundle import BundleWriter, build, read_bundle
+from nhis_data.diff import DeltaFilter, diff_tariffs
+from nhis_data.formats import BATCH_ROWS, iter_table, open_table, read_table
+from nhis_data.stream import Tally, chunked, read_chunks
+
+
+def test_chunks_and_tally():
+    rows = [{'form': form} for form in ['tablet', 'syrup', 'tablet', 'cream', 'tablet']]
+    chunks = list(chunked(rows, 2))
+    tally = Tally('form')
+    for chunk in chunks:
+        tally.update(chunk)
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert tally['form'].most_common() == [('tablet', 3), ('syrup', 1), ('cream', 1)]
+
+
+def test_delta_filter_over_chunks_matches_diff():
+    rows = read_csv(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv'))
+    previous = [dict(row) for row in rows[10:]] + [dict(rows[0], code='RETIRED1')]
+    previous[3]['tariff_price'] = '1.00'
+
+    delta = DeltaFilter(previous, 'code', 'tariff_price')
+    selected = [row for chunk in chunked(rows, 64) for row in delta.select(chunk)]
+
+    entries = diff_tariffs(previous, rows, 'code', 'tariff_price')
+    assert delta.entries() == entries
+    assert [row['code'] for row in selected] == [e['code'] for e in entries if e['change'] != 'retired'] == \
+        [row['code'] for row in rows[:10]] + [rows[13]['code']]
+
+
+def test_bundle_writer_matches_build(tmp_path):
+    rows = [
+        {'code': 'P1', 'name': 'Circumcision', 'type': 'minor', 'nhis_code': 'ZOOM01A'},
+        {'code': 'P2', 'name': '', 'type': 'major'},
+        {'code': 'P1', 'name': 'Circumcision (neonate)', 'type': 'minor'},
+        {'code': 'P3', 'name': 'Appendicectomy', 'type': 'major', 'price': 'n/a'},
+        {'code': 'P4', 'name': 'Hernia repair', 'type': 'major', 'nhis_code': 'ASUR11A'},
+    ]
+    path = str(tmp_path / 'procedures.bundle.jsonl')
+    writer = BundleWriter(path, 'procedures')
+    for chunk in chunked(rows, 2):
+        writer.writerows(chunk)
+    header = writer.close()
+
+    records, rejected, duplicates = build('procedures', rows)
+    assert read_bundle(path) == (header, records)
+    assert (header['count'], header['mapped'], header['duplicates']) == (2, 1, duplicates)
+    assert header['rejected'] == rejected
+    assert os.listdir(tmp_path) == ['procedures.bundle.jsonl']
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_typed_files_are_written_and_read_in_batches(fmt, tmp_path):
+    pytest.importorskip('pyarrow')
+    # Categories that first appear in later batches grow the Arrow dictionary
+    rows = [{'code': f'C{i}', 'form': f'form{i // 1000}', 'price': f'{i}.5'} for i in range(2 * BATCH_ROWS + 7)]
+    path = str(tmp_path / f'drugs.{fmt}')
+
+    with open_table(path, ['code', 'form', 'price'], {'form': 'category', 'price': 'decimal'}) as writer:
+        for chunk in chunked(iter(rows), 1000):
+            writer.writerows(chunk)
+
+    expected = [dict(row, price=f'{i}.50') for i, row in enumerate(rows)]
+    assert list(iter_table(path)) == expected
+    assert read_table(path)[1] == expected
+
+
+def test_read_chunks_counts_rows(tmp_path):
+    from nhis_data.metrics import Metrics
+
+    metrics = Metrics('test')
+    chunks = list(read_chunks(os.path.join(DATA_DIR, 'nhis_tariffs_import.csv'), metrics, size=100))
+
+    assert sum(len(chunk) for chunk in chunks) == metrics.counts['read'] == 525
+    assert 'read' in metrics.phases
+
+
+def test_converter_memory_does_not_grow_with_input(tmp_path):
+    rows = read_csv(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv'))
+    peaks = []
+    for scale in (1, 100):
+        source = str(tmp_path / f'gdrg_{scale}.csv')
+        write_csv(source, scale_rows(rows, scale, ['code']))
+        _, rss, _ = run_script('convert_gdrg_to_lab_import.py', '--input', source,
+                               '--output', str(tmp_path / f'lab_{scale}.csv'), '--bundle', '--no-memo')
+        peaks.append(rss)
+
+    # 100x the rows (61,700) within a few MiB of the 1x peak
+    assert peaks[1] - peaks[0] < 8 * 1024
@@ -0,0 +1,56 @@
+"""
+Batch extraction of several G-DRG tariff books, tagged by tier and effective date.
+"""
+
+import os
+import shutil
+
+from conftest import DATA_DIR, read_csv, run_script
+
+from nhis_data.tariff_books import book_info, find_books
+
+BOOK = 'Private Primary Care Hospital (Catering Exclusive) Tariff JAN 2023-1.docx'
+
+
+def test_book_info_from_file_name():
+    assert book_info(BOOK) == ('Private Primary Care Hospital (Catering Exclusive)', '2023-01-01')
+    assert book_info('/books/Teaching Hospital Tariff March 2024.docx') == ('Teaching Hospital', '2024-03-01')
+    assert book_info('regional-tariffs.docx') == ('regional-tariffs', '')
+
+
+def books(tmp_path):
+    book_dir = tmp_path / 'books'
+    book_dir.mkdir()
+    for name in [BOOK, 'Teaching Hospital Tariff JUL 2024.docx']:
+        shutil.copy(os.path.join(DATA_DIR, BOOK), book_dir / name)
+    (book_dir / f'~${BOOK}').write_bytes(b'')
+    return book_dir
+
+
+def test_consolidated_table_tags_every_book(tmp_path):
+    book_dir = books(tmp_path)
+    assert len(find_books(str(book_dir))) == 2
+    output = tmp_path / 'by_tier.csv'
+
+    run_script('extract_gdrg.py', '--books', str(book_dir), '--consolidate', '--output', str(output))
+
+    expected = read_csv(os.path.join(DATA_DIR, 'gdrg_tariffs_import.csv'))
+    rows = read_csv(output)
+    assert len(rows) == 2 * len(expected)
+    primary = [row for row in rows if row['effective_date'] == '2023-01-01']
+    assert {row['tier'] for row in primary} == {'Private Primary Care Hospital (Catering Exclusive)'}
+    assert [{k: v for k, v in row.items() if k not in ('tier', 'effective_date')} for row in primary] == expected
+    assert len({(row['code'], row['tier'], row['effective_date']) for row in rows}) == len(rows)
+
+
+def test_one_file_per_book(tmp_path):
+    book_dir = books(tmp_path)
+    out_dir = tmp_path / 'out'
+    out_dir.mkdir()
+
+    run_script('extract_gdrg.py', '--books', str(book_dir / 'Teaching*.docx'), '--output-dir', str(out_dir), '-j', '1')
+
+    rows = read_csv(out_dir / 'Teaching Hospital Tariff JUL 2024.tariffs.csv')
+    assert {(row['tier'], row['effective_date']) for row in rows} == {('Teaching Hospital', '2024-07-01')}
+    assert (out_dir / 'Teaching Hospital Tariff JUL 2024.tariffs.changes.json').exists()
+    assert not (out_dir / f'{os.path.splitext(BOOK)[0]}.tariffs.csv').exists()
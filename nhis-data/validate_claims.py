@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Check a claim batch dump against the generated tariff tables.
+The tool lives in nhis_data/commands/validate_claims.py.
+"""
+
+from nhis_data.commands.validate_claims import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
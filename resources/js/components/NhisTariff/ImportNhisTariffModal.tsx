@@ -22,13 +22,26 @@ export function ImportNhisTariffModal({
     onClose,
 }: ImportNhisTariffModalProps) {
     const fileInputRef = useRef<HTMLInputElement>(null);
+    const manifestInputRef = useRef<HTMLInputElement>(null);
     const { data, setData, post, processing, errors, reset, progress } =
         useForm<{
             file: File | null;
+            manifest: File | null;
         }>({
             file: null,
+            manifest: null,
         });
 
+    const clearInputs = () => {
+        reset();
+        if (fileInputRef.current) {
+            fileInputRef.current.value = '';
+        }
+        if (manifestInputRef.current) {
+            manifestInputRef.current.value = '';
+        }
+    };
+
     const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
         const file = e.target.files?.[0] || null;
         setData('file', file);
@@ -42,20 +55,14 @@ export function ImportNhisTariffModal({
             forceFormData: true,
             onSuccess: () => {
                 onClose();
-                reset();
-                if (fileInputRef.current) {
-                    fileInputRef.current.value = '';
-                }
+                clearInputs();
             },
         });
     };
 
     const handleClose = () => {
         onClose();
-        reset();
-        if (fileInputRef.current) {
-            fileInputRef.current.value = '';
-        }
+        clearInputs();
     };
 
     return (
@@ -90,6 +97,29 @@ export function ImportNhisTariffModal({
                         </p>
                     </div>
 
+                    <div className="space-y-2">
+                        <Label htmlFor="manifest">Changes manifest</Label>
+                        <Input
+                            ref={manifestInputRef}
+                            id="manifest"
+                            type="file"
+                            accept=".json"
+                            onChange={(e) =>
+                                setData('manifest', e.target.files?.[0] || null)
+                            }
+                        />
+                        {errors.manifest && (
+                            <p className="text-sm text-red-600">
+                                {errors.manifest}
+                            </p>
+                        )}
+                        <p className="text-sm text-gray-500">
+                            Optional: the .changes.json file written next to
+                            the tariff CSV. Only its added and changed codes
+                            are imported.
+                        </p>
+                    </div>
+
                     <div className="rounded-lg border bg-blue-50 p-4 dark:border-blue-800 dark:bg-blue-950/30">
                         <h4 className="mb-2 font-medium text-blue-900 dark:text-blue-100">
                             Expected columns:
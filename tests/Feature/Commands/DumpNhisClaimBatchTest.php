@@ -0,0 +1,103 @@
+<?php
+
+use App\Models\Charge;
+use App\Models\ClaimBatch;
+use App\Models\ClaimBatchItem;
+use App\Models\Diagnosis;
+use App\Models\Drug;
+use App\Models\InsuranceClaim;
+use App\Models\InsuranceClaimDiagnosis;
+use App\Models\InsuranceClaimItem;
+use App\Models\Prescription;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+use Illuminate\Support\Facades\File;
+
+use function Pest\Laravel\artisan;
+
+uses(RefreshDatabase::class);
+
+function readDumpCsv(string $path): array
+{
+    $handle = fopen($path, 'r');
+    $header = fgetcsv($handle, null, ',', '"', '');
+    $rows = [];
+    while (($row = fgetcsv($handle, null, ',', '"', '')) !== false) {
+        $rows[] = array_combine($header, $row);
+    }
+    fclose($handle);
+
+    return $rows;
+}
+
+beforeEach(function () {
+    $this->directory = sys_get_temp_dir().'/claim_batch_dump_'.uniqid();
+});
+
+afterEach(function () {
+    File::deleteDirectory($this->directory);
+});
+
+it('dumps the claims, diagnoses and items the XML export reads', function () {
+    $drug = Drug::factory()->create(['drug_code' => 'PARACETA1', 'nhis_claim_qty_as_one' => true]);
+    $prescription = Prescription::withoutEvents(fn () => Prescription::factory()->create([
+        'drug_id' => $drug->id,
+        'quantity' => 20,
+    ]));
+    $charge = Charge::factory()->create([
+        'prescription_id' => $prescription->id,
+        'service_type' => 'pharmacy',
+        'charge_type' => 'medication',
+    ]);
+
+    $batch = ClaimBatch::factory()->create(['status' => 'finalized']);
+    $claim = InsuranceClaim::factory()->create(['status' => 'vetted']);
+    $diagnosis = Diagnosis::factory()->create(['icd_10' => 'B54', 'diagnosis' => 'Malaria']);
+    InsuranceClaimDiagnosis::factory()->create([
+        'insurance_claim_id' => $claim->id,
+        'diagnosis_id' => $diagnosis->id,
+        'is_primary' => true,
+    ]);
+    InsuranceClaimItem::factory()->create([
+        'insurance_claim_id' => $claim->id,
+        'item_type' => 'drug',
+        'code' => 'PARACETA1',
+        'nhis_code' => 'PARACETA1',
+        'charge_id' => $charge->id,
+    ]);
+    ClaimBatchItem::factory()->create([
+        'claim_batch_id' => $batch->id,
+        'insurance_claim_id' => $claim->id,
+    ]);
+
+    artisan('nhis:dump-claim-batch', ['batch' => $batch->id, 'directory' => $this->directory])
+        ->expectsOutputToContain('Dumped 1 claims')
+        ->assertSuccessful();
+
+    $claims = readDumpCsv("{$this->directory}/claims.csv");
+    expect($claims)->toHaveCount(1)
+        ->and($claims[0]['id'])->toBe((string) $claim->id)
+        ->and($claims[0])->toHaveKeys(['patient_insurance_membership_id', 'gdrg_tariff_code']);
+
+    $diagnoses = readDumpCsv("{$this->directory}/diagnoses.csv");
+    expect($diagnoses)->toHaveCount(1)
+        ->and($diagnoses[0])->toMatchArray([
+            'claim_id' => (string) $claim->id,
+            'is_primary' => '1',
+            'icd_10' => 'B54',
+            'diagnosis' => 'Malaria',
+        ]);
+
+    $items = readDumpCsv("{$this->directory}/items.csv");
+    expect($items)->toHaveCount(1)
+        ->and($items[0])->toMatchArray([
+            'claim_id' => (string) $claim->id,
+            'nhis_code' => 'PARACETA1',
+            'prescription_quantity' => '20',
+            'drug_nhis_claim_qty_as_one' => '1',
+        ]);
+});
+
+it('fails for an unknown batch', function () {
+    artisan('nhis:dump-claim-batch', ['batch' => 999999, 'directory' => $this->directory])
+        ->assertFailed();
+});
@@ -210,6 +210,46 @@
         expect(NhisTariff::count())->toBe(2);
     });
 
+    it('imports only the codes in the changes manifest', function () {
+        $user = User::factory()->create();
+        $user->givePermissionTo('nhis-tariffs.manage');
+
+        $csvContent = "nhis_code,name,category,price,unit\n";
+        $csvContent .= "MED-001,Paracetamol 500mg,medicine,5.50,tablet\n";
+        $csvContent .= "LAB-001,Blood Test,lab,25.00,test\n";
+
+        $response = $this->actingAs($user)
+            ->post('/admin/nhis-tariffs/import', [
+                'file' => UploadedFile::fake()->createWithContent('tariffs.csv', $csvContent),
+                'manifest' => UploadedFile::fake()->createWithContent('tariffs.changes.json', json_encode([
+                    'added' => ['MED-001'],
+                    'changed' => [],
+                    'removed' => [],
+                ])),
+            ]);
+
+        $response->assertRedirect(route('admin.nhis-tariffs.index'));
+        expect(NhisTariff::count())->toBe(1)
+            ->and(NhisTariff::where('nhis_code', 'MED-001')->exists())->toBeTrue();
+    });
+
+    it('rejects a manifest without added and changed codes', function () {
+        $user = User::factory()->create();
+        $user->givePermissionTo('nhis-tariffs.manage');
+
+        $csvContent = "nhis_code,name,category,price,unit\n";
+        $csvContent .= "MED-001,Paracetamol 500mg,medicine,5.50,tablet\n";
+
+        $response = $this->actingAs($user)
+            ->post('/admin/nhis-tariffs/import', [
+                'file' => UploadedFile::fake()->createWithContent('tariffs.csv', $csvContent),
+                'manifest' => UploadedFile::fake()->createWithContent('tariffs.changes.json', '{}'),
+            ]);
+
+        $response->assertSessionHasErrors('manifest');
+        expect(NhisTariff::count())->toBe(0);
+    });
+
     it('validates file is required', function () {
         $user = User::factory()->create();
         $user->givePermissionTo('nhis-tariffs.manage');
@@ -294,3 +294,22 @@ function generateRandomTariff(?string $nhisCode = null): array
     expect($result['success'])->toBeFalse();
     expect($result['errors'])->not->toBeEmpty();
 });
+
+it('only imports the listed codes when a changed-codes list is given', function () {
+    // Arrange
+    $service = new NhisTariffService;
+    $tariffs = [generateRandomTariff(), generateRandomTariff(), generateRandomTariff()];
+
+    $csvContent = generateTariffCsvContent($tariffs);
+    $file = UploadedFile::fake()->createWithContent('tariffs.csv', $csvContent);
+
+    // Act
+    $result = $service->importTariffs($file, [$tariffs[1]['nhis_code']]);
+
+    // Assert
+    expect($result['success'])->toBeTrue();
+    expect($result['imported'])->toBe(1);
+    expect($result['skipped'])->toBe(2);
+    expect(NhisTariff::count())->toBe(1);
+    expect(NhisTariff::first()->nhis_code)->toBe($tariffs[1]['nhis_code']);
+});
@@ -0,0 +1,105 @@
+<?php
+
+use App\Imports\NhisImportBundle;
+use App\Models\BillingService;
+use App\Models\Drug;
+use App\Models\NhisItemMapping;
+use App\Models\NhisTariff;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+
+uses(RefreshDatabase::class);
+
+function writeBundle(array $rows, array $header = []): string
+{
+    $body = implode('', array_map(fn (array $row) => json_encode($row)."\n", $rows));
+    $header = array_merge([
+        'format' => 'hms-import-bundle',
+        'schema_version' => 1,
+        'kind' => 'drugs',
+        'table' => 'drugs',
+        'key' => 'drug_code',
+        'item_type' => 'drug',
+        'count' => count($rows),
+        'rejected' => [],
+        'checksum' => hash('sha256', $body),
+    ], $header);
+
+    $path = tempnam(sys_get_temp_dir(), 'bundle');
+    file_put_contents($path, json_encode($header)."\n".$body);
+
+    return $path;
+}
+
+function bundleDrug(string $code, ?string $nhisCode = null): array
+{
+    return [
+        'drug_code' => $code,
+        'name' => "Drug {$code}",
+        'generic_name' => null,
+        'form' => 'tablet',
+        'strength' => '500mg',
+        'category' => 'antibiotics',
+        'unit_price' => 2.5,
+        'unit_type' => 'piece',
+        'bottle_size' => null,
+        'description' => null,
+        'minimum_stock_level' => 10,
+        'maximum_stock_level' => 1000,
+        'is_active' => true,
+        'nhis_code' => $nhisCode,
+    ];
+}
+
+it('loads drugs with billing services and nhis mappings', function () {
+    $tariff = NhisTariff::factory()->create(['nhis_code' => 'AMOXICCA1']);
+    Drug::factory()->create(['drug_code' => 'DRG002', 'name' => 'Old Name']);
+
+    $path = writeBundle([bundleDrug('DRG001', 'AMOXICCA1'), bundleDrug('DRG002'), bundleDrug('DRG003', 'MISSING')]);
+    $results = (new NhisImportBundle)->load($path);
+
+    expect($results['created'])->toBe(2);
+    expect($results['updated'])->toBe(1);
+    expect($results['mapped'])->toBe(1);
+    expect($results['errors'])->toHaveCount(1);
+    expect($results['errors'][0]['error'])->toContain('MISSING');
+    // DRG003 is the third row, on line 4 of the bundle after the header
+    expect($results['errors'][0]['row'])->toBe(4);
+
+    expect(Drug::where('drug_code', 'DRG002')->first()->name)->toBe('Drug DRG002');
+    expect(BillingService::where('service_code', 'DRUG_DRG001')->first()->service_type)->toBe('medication');
+
+    $drug = Drug::where('drug_code', 'DRG001')->first();
+    expect(NhisItemMapping::where('item_type', 'drug')->where('item_id', $drug->id)->first()->nhis_tariff_id)
+        ->toBe($tariff->id);
+});
+
+it('keeps the brand name in the billing service name of an existing drug', function () {
+    Drug::factory()->create(['drug_code' => 'DRG002', 'name' => 'Old Name', 'brand_name' => 'Amoxil']);
+
+    (new NhisImportBundle)->load(writeBundle([bundleDrug('DRG001'), bundleDrug('DRG002')]));
+
+    expect(BillingService::where('service_code', 'DRUG_DRG002')->first()->service_name)->toBe('Drug DRG002 (Amoxil)');
+    expect(BillingService::where('service_code', 'DRUG_DRG001')->first()->service_name)->toBe('Drug DRG001');
+});
+
+it('reports rows rejected by the converter as skipped', function () {
+    $path = writeBundle([bundleDrug('DRG001')], ['rejected' => [['row' => 3, 'error' => 'Missing name']]]);
+    $results = (new NhisImportBundle)->load($path);
+
+    expect($results['created'])->toBe(1);
+    expect($results['skipped'])->toBe(1);
+    expect($results['errors'][0])->toBe(['row' => 3, 'error' => 'Missing name']);
+});
+
+it('rejects a bundle that fails its checksum', function () {
+    $path = writeBundle([bundleDrug('DRG001')], ['checksum' => str_repeat('0', 64)]);
+
+    expect(fn () => (new NhisImportBundle)->load($path))->toThrow(RuntimeException::class, 'checksum');
+    expect(Drug::count())->toBe(0);
+});
+
+it('rejects an unsupported schema version', function () {
+    $path = writeBundle([bundleDrug('DRG001')], ['schema_version' => 2]);
+
+    expect(fn () => (new NhisImportBundle)->load($path))->toThrow(RuntimeException::class, 'schema version');
+});